@@ -38,6 +38,7 @@ def create_database_if_not_exists():
         )
     
     connection = None
+    cursor = None
     try:
         # Connect without specifying database
         connection = mysql.connector.connect(**config)
@@ -51,8 +52,9 @@ def create_database_if_not_exists():
     except Error as e:
         raise RuntimeError(f"Failed to create database: {e}")
     finally:
-        if connection and connection.is_connected():
+        if cursor is not None:
             cursor.close()
+        if connection is not None:
             connection.close()
 
 def recreate_schema():
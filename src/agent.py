@@ -5,8 +5,9 @@ OpenAI Agents SDK agent setup with MCP integration.
 import os
 import json
 import re
+import sys
 import time
-from typing import Optional, Dict, Any, List, Any as AnyType
+from typing import Optional, Dict, Any, List, Generator, Tuple, Any as AnyType
 from dotenv import load_dotenv
 
 from agents import Agent, Runner, Tool, trace, ModelSettings
@@ -17,6 +18,7 @@ from research_orchestrator import ResearchOrchestrator
 from synthesis_agent import SynthesisAgent
 from report_storage import ReportStorage
 from report_chat_agent import ReportChatAgent
+from agent_streaming import stream_agent_run
 
 # Load environment variables
 load_dotenv()
@@ -37,6 +39,35 @@ ORCHESTRATOR_MAX_MESSAGE_CHARS = int(
 ORCHESTRATOR_DEBUG_TOKEN_LOG = os.getenv(
     "ORCHESTRATOR_DEBUG_TOKEN_LOG", "false"
 ).lower() == "true"
+# Older turns are folded into one summary message once history exceeds this
+ORCHESTRATOR_MEMORY_MAX_MESSAGES = int(
+    os.getenv("ORCHESTRATOR_MEMORY_MAX_MESSAGES", "20")
+)
+ORCHESTRATOR_MEMORY_KEEP_LAST = int(
+    os.getenv("ORCHESTRATOR_MEMORY_KEEP_LAST", "6")
+)
+# Continue turns server-side via previous_response_id (sends only the new message)
+ORCHESTRATOR_CHAIN_RESPONSES = os.getenv(
+    "ORCHESTRATOR_CHAIN_RESPONSES", "false"
+).lower() == "true"
+
+
+def build_report_context(conversation_history: List[Dict[str, Any]]) -> str:
+    """
+    Collect the user's answers from a conversation as report context.
+    
+    Args:
+        conversation_history: Message dicts with role/content keys
+    
+    Returns:
+        One "User: ..." line per user message
+    """
+    user_lines = [
+        f"User: {msg.get('content', '')}"
+        for msg in conversation_history
+        if msg.get('role') == 'user'
+    ]
+    return "\n".join(user_lines) + "\n" if user_lines else ""
 
 
 class StockResearchAgent:
@@ -60,6 +91,7 @@ class StockResearchAgent:
         self.current_trade_type: Optional[str] = None
         self.current_report_id: Optional[str] = None
         self.last_report_text: Optional[str] = None
+        self.last_response_id: Optional[str] = None
         self.research_orchestrator = ResearchOrchestrator(api_key=self.api_key)
         self.synthesis_agent = SynthesisAgent(api_key=self.api_key)
         self.report_storage = ReportStorage()
@@ -102,10 +134,7 @@ class StockResearchAgent:
             """
             try:
                 # Extract context from conversation history
-                context_str = ""
-                for msg in self.conversation_history:
-                    if msg.get('role') == 'user':
-                        context_str += f"User: {msg.get('content', '')}\n"
+                context_str = build_report_context(self.conversation_history)
                 
                 # Generate report (this is synchronous but called from async function - OK)
                 report_text = self.generate_report(context=context_str)
@@ -148,8 +177,10 @@ class StockResearchAgent:
         Returns:
             Initial response from the agent (may include follow-up questions)
         """
-        self.current_ticker = ticker.upper()
-        self.current_trade_type = trade_type
+        # Interned: these are hashed for every prompt-cache and dict lookup in the session
+        self.current_ticker = sys.intern(ticker.upper())
+        self.current_trade_type = sys.intern(trade_type)
+        self.last_response_id = None
         
         # Get orchestration instructions
         system_instructions = get_orchestration_instructions(ticker, trade_type)
@@ -168,6 +199,36 @@ class StockResearchAgent:
         
         return response
     
+    def restore_session(
+        self,
+        ticker: str,
+        trade_type: str,
+        conversation_history: List[Dict[str, str]],
+        report_id: Optional[str] = None,
+    ):
+        """
+        Rebuild research state persisted outside this process.
+        
+        Args:
+            ticker: Stock ticker symbol
+            trade_type: Type of trade
+            conversation_history: Stored user/assistant messages
+            report_id: Current report ID, if one was generated
+        """
+        # Interned: these are hashed for every prompt-cache and dict lookup in the session
+        self.current_ticker = sys.intern(ticker.upper())
+        self.current_trade_type = sys.intern(trade_type)
+        self.current_report_id = report_id
+        self.last_response_id = None
+        self.conversation_history = [
+            {"role": "system", "content": get_orchestration_instructions(ticker, trade_type)}
+        ]
+        self.conversation_history.extend(
+            {"role": msg["role"], "content": msg.get("content", "")}
+            for msg in conversation_history
+            if msg.get("role") in ("user", "assistant")
+        )
+    
     def continue_conversation(self, user_response: str) -> str:
         """
         Continue the conversation with a user response.
@@ -181,16 +242,175 @@ class StockResearchAgent:
         # Add user message to history
         self.conversation_history.append({"role": "user", "content": user_response})
         
-        # Get system instructions from history
-        system_instructions = next(
+        # Get agent response
+        response = self._get_agent_response(user_response, self._get_system_instructions())
+        self.trim_memory()
+        
+        return response
+    
+    def stream_continue(self, user_response: str) -> Generator[str, None, str]:
+        """
+        Continue the conversation, yielding the agent's reply as it is generated.
+        
+        The final reply is appended to the conversation history once the run
+        completes, exactly as continue_conversation() does.
+        
+        Args:
+            user_response: User's response to agent's question or instruction
+        
+        Yields:
+            Text deltas of the agent's response
+        
+        Returns:
+            Agent's full response (the generator's return value)
+        """
+        self.conversation_history.append({"role": "user", "content": user_response})
+        
+        if not self.agent:
+            error_msg = "Error: Agent not initialized. Please check your configuration."
+            yield error_msg
+            return error_msg
+        
+        try:
+            agent_with_instructions, run_input = self._prepare_agent_run(
+                user_response, self._get_system_instructions()
+            )
+            run_state: Dict[str, Any] = {}
+            assistant_message = yield from stream_agent_run(
+                agent_with_instructions,
+                run_input,
+                max_turns=ORCHESTRATOR_MAX_TURNS,
+                trace_name="Stock Research Agent Run",
+                trace_metadata=self._trace_metadata(),
+                previous_response_id=self._previous_response_id(),
+                run_state=run_state,
+            )
+            self._record_response_id(run_state.get("last_response_id"))
+        except Exception as e:
+            error_msg = f"Error generating response: {str(e)}"
+            print(f"Agent execution error: {e}")
+            yield error_msg
+            return error_msg
+        
+        assistant_message = str(assistant_message)
+        self.conversation_history.append({"role": "assistant", "content": assistant_message})
+        self.trim_memory()
+        return assistant_message
+    
+    def trim_memory(
+        self,
+        keep_last: int = ORCHESTRATOR_MEMORY_KEEP_LAST,
+        max_messages: int = ORCHESTRATOR_MEMORY_MAX_MESSAGES,
+    ) -> int:
+        """
+        Fold old turns into a single summary message once history grows too long.
+        
+        The user's earlier answers are kept verbatim in the summary (report
+        context is built from them); the agent's earlier questions are dropped.
+        
+        Args:
+            keep_last: Most recent messages kept as-is
+            max_messages: Non-system message count that triggers trimming
+        
+        Returns:
+            Number of messages removed
+        """
+        system = [m for m in self.conversation_history if m["role"] == "system"]
+        turns = [m for m in self.conversation_history if m["role"] != "system"]
+        if len(turns) <= max_messages:
+            return 0
+        
+        old, recent = turns[:-keep_last], turns[-keep_last:]
+        earlier_answers = [m["content"] for m in old if m["role"] == "user"]
+        summary = {
+            "role": "user",
+            "content": "<summary>Earlier answers:\n" + "\n".join(earlier_answers) + "</summary>",
+        }
+        self.conversation_history = system + [summary] + recent
+        removed = len(old) - 1
+        if ORCHESTRATOR_DEBUG_TOKEN_LOG:
+            print(f"[Orchestrator] Trimmed {removed} messages from conversation memory")
+        return removed
+    
+    def _get_system_instructions(self) -> str:
+        """Get the system instructions stored at the start of the conversation."""
+        return next(
             (msg["content"] for msg in self.conversation_history if msg["role"] == "system"),
             ""
         )
+    
+    def _trace_metadata(self) -> Dict[str, str]:
+        """Build trace metadata for an orchestrator run."""
+        return {
+            "ticker": self._extract_ticker_from_history(),
+            "trade_type": self._extract_trade_type_from_history()
+        }
+    
+    def _prepare_agent_run(self, user_message: str, system_instructions: str) -> Tuple[Agent, AnyType]:
+        """
+        Build the per-run agent and input messages for the orchestrator.
         
-        # Get agent response
-        response = self._get_agent_response(user_response, system_instructions)
+        Args:
+            user_message: Current user message
+            system_instructions: System instructions
         
-        return response
+        Returns:
+            Tuple of (agent with instructions, Runner input)
+        """
+        # Build messages for Runner
+        messages: List[Dict[str, Any]] = []
+        recent_history: List[Dict[str, str]] = []
+
+        # Add recent conversation history (excluding system messages; we'll set instructions separately)
+        # (the server already holds it when continuing from a previous response)
+        if not self._previous_response_id():
+            recent_history = self.conversation_history[-ORCHESTRATOR_MAX_HISTORY_MESSAGES:]
+        for msg in recent_history:
+            if msg["role"] != "system":
+                content = msg["content"]
+                if isinstance(content, str) and len(content) > ORCHESTRATOR_MAX_MESSAGE_CHARS:
+                    content = content[:ORCHESTRATOR_MAX_MESSAGE_CHARS] + "... [truncated]"
+                messages.append({
+                    "role": msg["role"],
+                    "content": content,
+                })
+
+        # Add current user message (also truncated defensively)
+        current_content = user_message
+        if isinstance(current_content, str) and len(current_content) > ORCHESTRATOR_MAX_MESSAGE_CHARS:
+            current_content = current_content[:ORCHESTRATOR_MAX_MESSAGE_CHARS] + "... [truncated]"
+        messages.append({
+            "role": "user",
+            "content": current_content,
+        })
+
+        # Create agent with updated instructions (include generate_report tool)
+        agent_with_instructions = Agent(
+            name=self.agent.name,
+            instructions=system_instructions,
+            model=self.agent.model,
+            tools=self.agent.tools,  # Include generate_report tool
+            model_settings=self.agent.model_settings
+        )
+
+        # Optional debug logging for approximate token usage
+        if ORCHESTRATOR_DEBUG_TOKEN_LOG:
+            approx_input_chars = len(str(messages))
+            print(
+                f"[Orchestrator] Approx input chars: {approx_input_chars}, "
+                f"history_messages={len(recent_history)}"
+            )
+
+        return agent_with_instructions, messages if len(messages) > 1 else current_content
+    
+    def _previous_response_id(self) -> Optional[str]:
+        """Return the response to continue from, if response chaining is enabled."""
+        return self.last_response_id if ORCHESTRATOR_CHAIN_RESPONSES else None
+    
+    def _record_response_id(self, response_id: Optional[str]):
+        """Remember the latest response so the next turn can continue from it."""
+        if ORCHESTRATOR_CHAIN_RESPONSES:
+            self.last_response_id = response_id
     
     def _get_agent_response(self, user_message: str, system_instructions: str) -> str:
         """
@@ -207,58 +427,20 @@ class StockResearchAgent:
             return "Error: Agent not initialized. Please check your configuration."
         
         try:
-            # Build messages for Runner
-            messages: List[Dict[str, Any]] = []
-
-            # Add recent conversation history (excluding system messages; we'll set instructions separately)
-            recent_history = self.conversation_history[-ORCHESTRATOR_MAX_HISTORY_MESSAGES:]
-            for msg in recent_history:
-                if msg["role"] != "system":
-                    content = msg["content"]
-                    if isinstance(content, str) and len(content) > ORCHESTRATOR_MAX_MESSAGE_CHARS:
-                        content = content[:ORCHESTRATOR_MAX_MESSAGE_CHARS] + "... [truncated]"
-                    messages.append({
-                        "role": msg["role"],
-                        "content": content,
-                    })
-
-            # Add current user message (also truncated defensively)
-            current_content = user_message
-            if isinstance(current_content, str) and len(current_content) > ORCHESTRATOR_MAX_MESSAGE_CHARS:
-                current_content = current_content[:ORCHESTRATOR_MAX_MESSAGE_CHARS] + "... [truncated]"
-            messages.append({
-                "role": "user",
-                "content": current_content,
-            })
-
-            # Create agent with updated instructions (include generate_report tool)
-            agent_with_instructions = Agent(
-                name=self.agent.name,
-                instructions=system_instructions,
-                model=self.agent.model,
-                tools=self.agent.tools,  # Include generate_report tool
-                model_settings=self.agent.model_settings
+            agent_with_instructions, run_input = self._prepare_agent_run(
+                user_message, system_instructions
             )
 
-            # Optional debug logging for approximate token usage
-            if ORCHESTRATOR_DEBUG_TOKEN_LOG:
-                approx_input_chars = len(str(messages))
-                print(
-                    f"[Orchestrator] Approx input chars: {approx_input_chars}, "
-                    f"history_messages={len(recent_history)}"
-                )
-
             # Wrap execution with trace for monitoring
-            with trace("Stock Research Agent Run", metadata={
-                "ticker": self._extract_ticker_from_history(),
-                "trade_type": self._extract_trade_type_from_history()
-            }):
+            with trace("Stock Research Agent Run", metadata=self._trace_metadata()):
                 # Run agent with Runner using a small retry/backoff on rate limits
                 result = _run_agent_with_retry(
                     agent_with_instructions,
-                    messages if len(messages) > 1 else current_content,
+                    run_input,
                     max_turns=ORCHESTRATOR_MAX_TURNS,
+                    previous_response_id=self._previous_response_id(),
                 )
+            self._record_response_id(getattr(result, "last_response_id", None))
             
             # Extract final output from result
             if hasattr(result, 'final_output'):
@@ -405,7 +587,13 @@ class StockResearchAgent:
         self.current_ticker = None
         self.current_trade_type = None
         self.current_report_id = None
+        self.last_response_id = None
         self.chat_agent.reset_conversation()
+    
+    def shutdown(self):
+        """Release per-session state when the agent is evicted from the session pool."""
+        self.reset_conversation()
+        self.last_report_text = None
 
 
 def _is_rate_limit_error(exc: Exception) -> bool:
@@ -421,19 +609,23 @@ def _run_agent_with_retry(
     agent: Agent,
     messages_or_prompt: AnyType,
     max_turns: int,
+    previous_response_id: Optional[str] = None,
 ) -> AnyType:
     """
     Run an agent with a small retry/backoff loop for rate limit errors.
     
     This keeps the logic localized and avoids leaking retries into callers.
     """
+    run_kwargs: Dict[str, Any] = {"max_turns": max_turns}
+    if previous_response_id:
+        run_kwargs["previous_response_id"] = previous_response_id
     max_retries = int(os.getenv("AGENT_RATE_LIMIT_MAX_RETRIES", "3"))
     base_delay = float(os.getenv("AGENT_RATE_LIMIT_BACKOFF_SECONDS", "2.0"))
     last_exc: Optional[Exception] = None
 
     for attempt in range(max_retries):
         try:
-            return Runner.run_sync(agent, messages_or_prompt, max_turns=max_turns)
+            return Runner.run_sync(agent, messages_or_prompt, **run_kwargs)
         except Exception as exc:  # noqa: BLE001
             last_exc = exc
             is_rate_limit = _is_rate_limit_error(exc)
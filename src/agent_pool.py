@@ -0,0 +1,445 @@
+"""
+Bounded, expiring storage for per-session agent instances.
+"""
+
+import os
+import hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Hashable, Optional
+
+# Maximum number of live session agents and idle lifetime (seconds)
+SESSION_POOL_MAX = int(os.getenv("SESSION_POOL_MAX", "64"))
+SESSION_POOL_TTL = float(os.getenv("SESSION_POOL_TTL", "1800"))
+
+# Maximum idle agents kept per configuration for reuse by new sessions
+AGENT_POOL_MAX_IDLE = int(os.getenv("AGENT_POOL_MAX_IDLE", "8"))
+
+# Agents built in the background at startup so the first session doesn't wait
+AGENT_POOL_PREWARM = int(os.getenv("AGENT_POOL_PREWARM", "1"))
+
+# How often (seconds) the background sweeper evicts idle sessions
+SESSION_POOL_SWEEP_SECONDS = float(os.getenv("SESSION_POOL_SWEEP_SECONDS", "60"))
+
+
+class AgentSessionCache:
+    """
+    LRU cache with idle expiry and an eviction callback.
+    
+    Every read refreshes an entry's TTL. Entries are evicted when the cache is
+    full (least recently used first) or when they have been idle longer than
+    the TTL, and the eviction callback runs for each so agents can release
+    their resources. Values taken with checkout() are in use by a request:
+    if one is evicted meanwhile, its callback waits until the last checkin().
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = SESSION_POOL_MAX,
+        ttl: float = SESSION_POOL_TTL,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            maxsize: Maximum number of entries
+            ttl: Seconds an entry may sit unused before it expires
+            on_evict: Called with (key, value) for every evicted entry
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._expires_at = {}
+        self._lock = threading.RLock()
+        # Checkout counts and evicted-while-in-use entries, keyed by id(value)
+        self._in_use: Dict[int, int] = {}
+        self._deferred: Dict[int, tuple] = {}
+        self._sweeper: Optional[threading.Thread] = None
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value for key (refreshing its TTL), or default."""
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._data or self._expires_at[key] <= now:
+                evicted = self._pop_expired(now)
+                value = default
+            else:
+                self._data.move_to_end(key)
+                self._expires_at[key] = now + self.ttl
+                return self._data[key]
+        self._notify(evicted)
+        return value
+    
+    def checkout(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the value for key (refreshing its TTL) and mark it in use.
+        
+        Every value returned (anything but default) must be handed back with
+        checkin() once the caller is done with it.
+        
+        Args:
+            key: Entry key
+            default: Returned (and not marked) when key is missing or expired
+        
+        Returns:
+            The value, or default
+        """
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._data or self._expires_at[key] <= now:
+                evicted = self._pop_expired(now)
+                value = default
+            else:
+                self._data.move_to_end(key)
+                self._expires_at[key] = now + self.ttl
+                value = self._data[key]
+                self._in_use[id(value)] = self._in_use.get(id(value), 0) + 1
+                return value
+        self._notify(evicted)
+        return value
+    
+    def checkin(self, value: Any):
+        """
+        Mark a value from checkout() (or set(..., checkout=True)) as no longer in use.
+        
+        If it was evicted while in use, its eviction callback runs now.
+        
+        Args:
+            value: Value previously checked out
+        """
+        with self._lock:
+            count = self._in_use.get(id(value), 0) - 1
+            if count > 0:
+                self._in_use[id(value)] = count
+                return
+            self._in_use.pop(id(value), None)
+            deferred = self._deferred.pop(id(value), None)
+        if deferred is not None:
+            self._notify([deferred])
+    
+    def set(self, key: Hashable, value: Any, checkout: bool = False):
+        """
+        Insert or replace an entry, evicting the least recently used if full.
+        
+        Args:
+            key: Entry key
+            value: Value to store
+            checkout: Also mark the value in use, as checkout() would
+        """
+        now = time.monotonic()
+        with self._lock:
+            evicted = self._pop_expired(now)
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = value
+            self._expires_at[key] = now + self.ttl
+            if checkout:
+                self._in_use[id(value)] = self._in_use.get(id(value), 0) + 1
+            while len(self._data) > self.maxsize:
+                old_key, old_value = self._data.popitem(last=False)
+                del self._expires_at[old_key]
+                evicted.append((old_key, old_value))
+        self._notify(evicted)
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove and return an entry without running the eviction callback."""
+        with self._lock:
+            self._expires_at.pop(key, None)
+            return self._data.pop(key, default)
+    
+    def evict(self, key: Hashable) -> bool:
+        """
+        Remove an entry and run the eviction callback for it.
+        
+        The callback is deferred until checkin() if the value is checked out.
+        
+        Returns:
+            True if an entry was removed
+        """
+        with self._lock:
+            self._expires_at.pop(key, None)
+            value = self._data.pop(key, _MISSING)
+        if value is _MISSING:
+            return False
+        self._notify([(key, value)])
+        return True
+    
+    def expire(self) -> int:
+        """
+        Evict every idle entry now.
+        
+        Expiry is otherwise lazy (checked on access), so this is what frees
+        agents for sessions that never come back.
+        
+        Returns:
+            Number of entries evicted
+        """
+        with self._lock:
+            evicted = self._pop_expired(time.monotonic())
+        self._notify(evicted)
+        return len(evicted)
+    
+    def start_sweeper(self, interval: float = SESSION_POOL_SWEEP_SECONDS) -> threading.Thread:
+        """Start a daemon thread that calls expire() every interval seconds."""
+        with self._lock:
+            if self._sweeper is None:
+                def _sweep():
+                    while True:
+                        time.sleep(interval)
+                        self.expire()
+                
+                self._sweeper = threading.Thread(target=_sweep, name="session-sweeper", daemon=True)
+                self._sweeper.start()
+            return self._sweeper
+    
+    def drain(self) -> int:
+        """
+        Evict every entry, running the eviction callback for each.
+        
+        Returns:
+            Number of entries evicted
+        """
+        with self._lock:
+            evicted = list(self._data.items())
+            self._data.clear()
+            self._expires_at.clear()
+        self._notify(evicted)
+        return len(evicted)
+    
+    def _pop_expired(self, now: float) -> list:
+        """Remove expired entries (lock must be held) and return them."""
+        expired = [key for key, expires_at in self._expires_at.items() if expires_at <= now]
+        evicted = []
+        for key in expired:
+            del self._expires_at[key]
+            evicted.append((key, self._data.pop(key)))
+        return evicted
+    
+    def _notify(self, evicted: list):
+        """Run the eviction callback outside the lock, deferring it for values in use."""
+        if not self.on_evict:
+            return
+        with self._lock:
+            ready = []
+            for key, value in evicted:
+                if id(value) in self._in_use:
+                    self._deferred[id(value)] = (key, value)
+                else:
+                    ready.append((key, value))
+        for key, value in ready:
+            try:
+                self.on_evict(key, value)
+            except Exception as e:
+                print(f"Warning: Failed to clean up session {key}: {e}")
+    
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data and self._expires_at[key] > time.monotonic()
+    
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+_MISSING = object()
+
+
+def agent_config_key() -> str:
+    """
+    Fingerprint the configuration an agent is built from.
+    
+    Covers the API keys, the model/limit env vars, and mcp.json's mtime, so a
+    pooled agent is only reused when it would be built identically today.
+    Secrets are hashed, never stored.
+    """
+    mcp_config = Path(__file__).parent.parent / "mcp.json"
+    try:
+        mcp_mtime = str(mcp_config.stat().st_mtime_ns)
+    except OSError:
+        mcp_mtime = "missing"
+    
+    parts = [f"mcp.json={mcp_mtime}"]
+    for name in sorted(os.environ):
+        if name.startswith(("OPENAI_", "PERPLEXITY_", "ORCHESTRATOR_", "SPECIALIZED_AGENT_", "RESEARCH_")):
+            parts.append(f"{name}={os.environ[name]}")
+    return hashlib.blake2b("\n".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class AgentPool:
+    """
+    Pool of idle, pre-built agents keyed by configuration.
+    
+    Building a StockResearchAgent sets up the orchestrator, synthesis, storage
+    and chat components; reusing an idle one (with its conversation reset)
+    avoids paying that for every new browser session.
+    """
+    
+    def __init__(self, factory: Callable[[], Any], max_idle: int = AGENT_POOL_MAX_IDLE):
+        """
+        Initialize the pool.
+        
+        Args:
+            factory: Zero-argument callable that builds a new agent
+            max_idle: Maximum idle agents kept per configuration key
+        """
+        self.factory = factory
+        self.max_idle = max_idle
+        self._available: Dict[str, Deque[Any]] = {}
+        # Agents being built by ensure_available(), per configuration key
+        self._building: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.releases = 0
+        self.discards = 0
+    
+    def acquire(self, config_key: Optional[str] = None) -> Any:
+        """
+        Take an idle agent for the configuration, or build a new one.
+        
+        Args:
+            config_key: Configuration fingerprint (defaults to agent_config_key())
+        
+        Returns:
+            Agent instance owned by the caller until release()
+        """
+        key = config_key or agent_config_key()
+        with self._lock:
+            idle = self._available.get(key)
+            if idle:
+                self.hits += 1
+                return idle.popleft()
+            self.misses += 1
+        agent = self.factory()
+        agent.pool_config_key = key  # Remembered so release() files it correctly
+        return agent
+    
+    def release(self, agent: Any, config_key: Optional[str] = None):
+        """
+        Return an agent to the pool with its conversation reset.
+        
+        Agents beyond max_idle, or built for a stale configuration, are shut
+        down instead.
+        
+        Args:
+            agent: Agent previously returned by acquire()
+            config_key: Configuration fingerprint it was built for
+                (defaults to the key recorded by acquire())
+        """
+        key = config_key or getattr(agent, "pool_config_key", None)
+        current_key = agent_config_key()
+        agent.reset_conversation()
+        with self._lock:
+            # Drop idle agents built for configurations that no longer apply
+            stale = [k for k in self._available if k != current_key]
+            discarded = [a for k in stale for a in self._available.pop(k)]
+            idle = self._available.setdefault(current_key, deque())
+            if key not in (None, current_key):
+                discarded.append(agent)
+            elif len(idle) < self.max_idle:
+                idle.append(agent)
+                self.releases += 1
+            else:
+                discarded.append(agent)
+            self.discards += len(discarded)
+        for old_agent in discarded:
+            old_agent.shutdown()
+    
+    def ensure_available(self, count: int = 1) -> int:
+        """
+        Build agents until at least count are idle for the current configuration.
+        
+        Agents other callers are already building count toward the target, so
+        concurrent calls (e.g. /warmup from many visitors) never build more
+        than count between them.
+        
+        Args:
+            count: Desired number of idle agents (capped at max_idle)
+        
+        Returns:
+            Number of agents built
+        """
+        key = agent_config_key()
+        target = min(count, self.max_idle)
+        built = 0
+        while True:
+            with self._lock:
+                if len(self._available.get(key, ())) + self._building.get(key, 0) >= target:
+                    return built
+                self._building[key] = self._building.get(key, 0) + 1
+            agent = None
+            try:
+                agent = self.factory()
+                agent.pool_config_key = key
+            finally:
+                with self._lock:
+                    self._building[key] -= 1
+                    if not self._building[key]:
+                        del self._building[key]
+                    if agent is not None:
+                        self._available.setdefault(key, deque()).append(agent)
+            built += 1
+    
+    def prewarm(self, count: int = AGENT_POOL_PREWARM) -> threading.Thread:
+        """
+        Build idle agents on a background thread.
+        
+        Failures (e.g. missing API key) are logged; sessions then fall back to
+        building agents on demand.
+        
+        Args:
+            count: Desired number of idle agents
+        
+        Returns:
+            The started daemon thread
+        """
+        def _warm():
+            try:
+                built = self.ensure_available(count)
+                if built:
+                    print(f"✓ Pre-warmed {built} agent(s)")
+            except Exception as e:
+                print(f"Warning: Agent warm-up failed: {e}")
+        
+        thread = threading.Thread(target=_warm, name="agent-warmup", daemon=True)
+        thread.start()
+        return thread
+    
+    def drain(self) -> int:
+        """
+        Shut down every idle agent (used at process exit).
+        
+        Returns:
+            Number of agents shut down
+        """
+        with self._lock:
+            idle = [a for agents in self._available.values() for a in agents]
+            self._available.clear()
+        for agent in idle:
+            try:
+                agent.shutdown()
+            except Exception as e:
+                print(f"Warning: Failed to shut down agent: {e}")
+        return len(idle)
+    
+    def stats(self) -> Dict[str, int]:
+        """Return pool counters for health reporting."""
+        with self._lock:
+            return {
+                "idle": sum(len(idle) for idle in self._available.values()),
+                "building": sum(self._building.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "releases": self.releases,
+                "discards": self.discards,
+            }
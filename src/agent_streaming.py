@@ -0,0 +1,81 @@
+"""
+Helpers for consuming streamed Agents SDK runs from synchronous code.
+"""
+
+import asyncio
+import queue
+import threading
+from typing import Any, Dict, Generator, Optional
+
+from agents import Agent, Runner, trace
+from openai.types.responses import ResponseTextDeltaEvent
+
+
+def stream_agent_run(
+    agent: Agent,
+    messages_or_prompt: Any,
+    max_turns: int,
+    trace_name: str,
+    trace_metadata: Dict[str, Any],
+    previous_response_id: Optional[str] = None,
+    run_state: Optional[Dict[str, Any]] = None,
+) -> Generator[str, None, Any]:
+    """
+    Run an agent in streaming mode, yielding output text deltas as they arrive.
+    
+    The run executes on its own event loop in a worker thread so synchronous
+    callers (Flask response generators) can consume it. Rate limits are not
+    retried here: once text has been sent to the client the run can't be
+    transparently restarted.
+    
+    Args:
+        agent: Agent to run
+        messages_or_prompt: Runner input (prompt string or message list)
+        max_turns: Maximum agent turns
+        trace_name: Name of the trace wrapping the run
+        trace_metadata: Trace metadata
+        previous_response_id: Response to continue from (server-side history)
+        run_state: Optional dict filled with the run's last_response_id
+    
+    Yields:
+        Output text deltas
+    
+    Returns:
+        The run's final output (the generator's return value)
+    """
+    done = object()
+    deltas: "queue.Queue[Any]" = queue.Queue()
+    outcome: Dict[str, Any] = {}
+    run_kwargs: Dict[str, Any] = {"max_turns": max_turns}
+    if previous_response_id:
+        run_kwargs["previous_response_id"] = previous_response_id
+
+    async def _pump() -> None:
+        with trace(trace_name, metadata=trace_metadata):
+            result = Runner.run_streamed(agent, messages_or_prompt, **run_kwargs)
+            async for event in result.stream_events():
+                if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                    deltas.put(event.data.delta)
+            outcome["final_output"] = result.final_output
+            if run_state is not None:
+                run_state["last_response_id"] = getattr(result, "last_response_id", None)
+
+    def _worker() -> None:
+        try:
+            asyncio.run(_pump())
+        except Exception as exc:  # noqa: BLE001
+            outcome["error"] = exc
+        finally:
+            deltas.put(done)
+
+    threading.Thread(target=_worker, daemon=True).start()
+
+    while True:
+        delta = deltas.get()
+        if delta is done:
+            break
+        yield delta
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("final_output", "")
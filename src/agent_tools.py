@@ -3,6 +3,7 @@ Agents SDK tool wrappers for MCP and Perplexity tools.
 Converts existing tool functions to Agents SDK Tool format.
 """
 
+import copy
 import json
 import asyncio
 from typing import Dict, Any, List, Optional
@@ -68,8 +69,16 @@ def create_mcp_tool_wrapper(mcp_client: MCPClient, mcp_tool_name: str, descripti
                 }
                 return json.dumps(error_result, indent=2, default=str)
             
-            # Use the original MCP tool name (not normalized) when calling
-            result = execute_tool_by_name(mcp_client, mcp_tool_name, tool_args)
+            # Only the first MAX_NEWS_ITEMS articles reach the model, so don't
+            # have Alpha Vantage send (and us parse) the default 50
+            if mcp_tool_name == "NEWS_SENTIMENT":
+                tool_args = dict(tool_args)
+                tool_args["limit"] = min(int(tool_args.get("limit") or MAX_NEWS_ITEMS), MAX_NEWS_ITEMS)
+            
+            # Use the original MCP tool name (not normalized) when calling.
+            # The MCP client blocks, so run it off the event loop that the
+            # other research agents share.
+            result = await asyncio.to_thread(execute_tool_by_name, mcp_client, mcp_tool_name, tool_args)
             
             # Convert result to string if it's a dict (Agents SDK expects string return)
             if isinstance(result, dict):
@@ -119,7 +128,7 @@ def create_mcp_tools(mcp_client: MCPClient) -> List[FunctionTool]:
     if not mcp_client:
         return []
     
-    all_tools = mcp_client.list_tools()
+    all_tools = mcp_client.list_tools_structured()
     
     # Essential tools from research_prompt.py (lines 98-120)
     # Only the 6 tools explicitly documented in the research instructions
@@ -132,14 +141,14 @@ def create_mcp_tools(mcp_client: MCPClient) -> List[FunctionTool]:
         "NEWS_SENTIMENT",     # Line 118: news articles and sentiment
     }
     
-    tools = [tool for tool in all_tools if tool.get("name", "") in essential_tool_names]
+    tools = [tool for tool in all_tools if tool.name in essential_tool_names]
     
     tool_objects = []
     
     for idx, tool in enumerate(tools):
-        mcp_tool_name = tool.get("name", "")  # Original MCP tool name (e.g., "TIME_SERIES_INTRADAY")
-        description = tool.get("description", "")
-        input_schema = tool.get("inputSchema", {})
+        mcp_tool_name = tool.name  # Original MCP tool name (e.g., "TIME_SERIES_INTRADAY")
+        description = tool.description
+        input_schema = tool.input_schema
         
         # Create wrapper function - pass original MCP tool name
         tool_func = create_mcp_tool_wrapper(mcp_client, mcp_tool_name, description, input_schema)
@@ -161,7 +170,8 @@ def create_mcp_tools(mcp_client: MCPClient) -> List[FunctionTool]:
             tool_obj = FunctionTool(
                 name=normalized_name,
                 description=description,
-                params_json_schema=input_schema,  # Use params_json_schema, not parameters
+                # Strict-schema conversion edits the schema in place; the tool list is shared
+                params_json_schema=copy.deepcopy(input_schema),  # Use params_json_schema, not parameters
                 on_invoke_tool=tool_func  # Use on_invoke_tool - must be async function
             )
             
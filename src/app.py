@@ -5,16 +5,34 @@ Flask web interface for the Stock Research AI Agent.
 import sys
 from pathlib import Path
 
-# Add project root to Python path to allow imports
+# Add project root to Python path to allow imports (once, even if reloaded)
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from flask import (
+    Flask, Response, g, render_template, request, redirect, url_for, session,
+    jsonify, make_response, stream_with_context,
+)
+import atexit
+import functools
 import os
+import json
+import re
+import signal
+import hashlib
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
 from dotenv import load_dotenv
-import uuid
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from uuid import uuid4
 
-from agent import create_agent, StockResearchAgent
+from agent import build_report_context, create_agent, StockResearchAgent
+from agent_pool import AgentPool, AgentSessionCache
+from database import check_database_config, warm_database_manager
 
 # Load environment variables
 load_dotenv()
@@ -24,15 +42,99 @@ load_dotenv()
 app = Flask(__name__, 
             template_folder=str(project_root / 'templates'), 
             static_folder=str(project_root / 'static'))
-app.secret_key = os.getenv('FLASK_SECRET_KEY', os.urandom(24).hex())
+# Only generate a random key when none is configured
+_secret_key = os.getenv('FLASK_SECRET_KEY')
+app.secret_key = _secret_key if _secret_key else os.urandom(24).hex()
 
-# Global agent instances (keyed by session ID)
-agent_sessions = {}
+
+# Idle agents ready to be handed to new sessions
+agent_pool = AgentPool(factory=create_agent)
+
+
+def _release_agent(session_id: str, agent: StockResearchAgent):
+    """
+    Return an agent evicted from the session cache to the idle pool.
+    
+    The session cache defers this until no request has the agent checked
+    out, so an agent is never reset or handed to another session mid-turn.
+    """
+    agent_pool.release(agent)
+
+
+# Global agent instances (keyed by session ID); bounded LRU with idle expiry
+agent_sessions = AgentSessionCache(on_evict=_release_agent)
+agent_sessions.start_sweeper()
+
+# Report preview shown in the conversation once a report is generated
+REPORT_PREVIEW_CHARS = 500
+_REPORT_PREVIEW_HEADER = "Report Generated:\n\n"
+_REPORT_PREVIEW_FOOTER = "...\n\n[Full report stored. You can now chat with it using the chat interface.]"
+
+# Ticker symbols: letters first, then letters/digits with optional class suffix (e.g. BRK.B)
+_TICKER_RE = re.compile(r"^[A-Z][A-Z0-9]{0,5}(?:[.\-][A-Z0-9]{1,2})?$")
+
+# Replay window for duplicate submissions (double-clicks, back/forward re-POSTs)
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "30"))
+IDEMPOTENCY_MAX_ENTRIES = 4096
+
+
+class _RecentCall:
+    """Result slot for an agent call shared by duplicate submissions."""
+
+    def __init__(self):
+        self.expires_at = float("inf")  # Never expires while in flight
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+
+
+# Recent agent calls keyed by hash of (session, route, form inputs)
+_recent_calls: Dict[str, _RecentCall] = {}
+_recent_calls_lock = threading.Lock()
+
+
+# A turn that waited this long behind a running one is dropped if a newer
+# message from the same session is also waiting (only the newest is answered)
+SESSION_LATENCY_BUDGET_SECONDS = float(os.getenv("SESSION_LATENCY_BUDGET_MS", "2000")) / 1000
+
+
+class StaleRequestError(RuntimeError):
+    """Raised for a queued turn that was superseded by a newer one."""
+
+
+class _SessionTurns:
+    """Serializes a session's agent calls and tracks the newest queued turn."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latest = 0
+
+
+# Entries disappear once no request for the session is running or waiting
+_session_turns: "weakref.WeakValueDictionary[str, _SessionTurns]" = weakref.WeakValueDictionary()
+_session_turns_lock = threading.Lock()
+
+
+# The session cookie is sent with a streamed response's headers, before the
+# turn is finished, so the final event carries the turn as a signed token that
+# the page posts back to /commit_turn. Signed with the app's secret key, so any
+# worker can apply it and nothing is kept server-side. Each token records the
+# last_submission_id it was built on and is only applied while the session is
+# still there, so a stale token can't roll the history back.
+_turn_signer = URLSafeTimedSerializer(app.secret_key, salt='stream-turn')
+STREAM_TURN_MAX_AGE_SECONDS = 600
 
 
 def initialize_session(session_id: str) -> StockResearchAgent:
     """
-    Initialize or get agent for a session.
+    Initialize or get agent for a session, checked out for the caller's turn.
+    
+    A session without an in-process agent (new worker, restart, or evicted
+    agent) gets one rebuilt from the state kept in the session cookie, so
+    agents are a per-process cache rather than the source of truth.
+    
+    The caller must hand the agent back with agent_sessions.checkin() when
+    its turn is over (session_agent() does this).
     
     Args:
         session_id: Unique session identifier
@@ -40,18 +142,279 @@ def initialize_session(session_id: str) -> StockResearchAgent:
     Returns:
         StockResearchAgent instance
     """
-    if session_id not in agent_sessions:
+    agent = agent_sessions.checkout(session_id)
+    if agent is None:
         try:
-            agent_sessions[session_id] = create_agent()
+            agent = agent_pool.acquire()
         except Exception as e:
             raise ValueError(f"Failed to initialize agent: {str(e)}")
-    return agent_sessions[session_id]
+        if session.get('current_ticker'):
+            agent.restore_session(
+                ticker=session['current_ticker'],
+                trade_type=session.get('current_trade_type', 'Investment'),
+                conversation_history=session.get('conversation_history', []),
+                report_id=session.get('current_report_id'),
+            )
+        agent_sessions.set(session_id, agent, checkout=True)
+    return agent
+
+
+@contextmanager
+def session_agent(session_id: str) -> Iterator[StockResearchAgent]:
+    """Check out the session's agent for the duration of a request."""
+    agent = initialize_session(session_id)
+    try:
+        yield agent
+    finally:
+        agent_sessions.checkin(agent)
+
+
+def build_report_preview(report_text: Optional[str]) -> str:
+    """Build the conversation preview shown for a newly generated report."""
+    if not report_text:
+        return f"{_REPORT_PREVIEW_HEADER}No report content{_REPORT_PREVIEW_FOOTER}"
+    # Slicing past the end returns the original string, so short reports aren't copied
+    return f"{_REPORT_PREVIEW_HEADER}{report_text[:REPORT_PREVIEW_CHARS]}{_REPORT_PREVIEW_FOOTER}"
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_ticker(raw: str) -> Optional[str]:
+    """
+    Normalize a submitted ticker symbol.
+    
+    Args:
+        raw: Ticker as typed by the user
+    
+    Returns:
+        Upper-cased ticker, or None if it isn't a valid symbol
+    """
+    ticker = raw.strip().upper()
+    return ticker if _TICKER_RE.match(ticker) else None
+
+
+def request_key(session_id: str, *parts: str) -> str:
+    """Hash the session, route, and submitted inputs into a compact cache key."""
+    raw = "|".join((session_id, request.path) + parts)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _claim_call(key: str):
+    """
+    Look up the result slot for a request key, creating it if none is live.
+    
+    Returns:
+        Tuple of (_RecentCall, True if the caller must perform the call)
+    """
+    now = time.monotonic()
+    with _recent_calls_lock:
+        call = _recent_calls.get(key)
+        is_owner = call is None or call.expires_at < now
+        if is_owner:
+            # Drop expired entries, then the oldest ones if still over capacity
+            for stale_key in [k for k, c in _recent_calls.items() if c.expires_at < now]:
+                del _recent_calls[stale_key]
+            while len(_recent_calls) >= IDEMPOTENCY_MAX_ENTRIES:
+                del _recent_calls[next(iter(_recent_calls))]
+            call = _RecentCall()
+            _recent_calls[key] = call
+    return call, is_owner
+
+
+def _shared_result(call: _RecentCall) -> Any:
+    """Wait for the owner of a call and return (or raise) its outcome."""
+    call.done.wait()
+    if call.error is not None:
+        raise call.error
+    return call.result
+
+
+def _fail_call(key: str, call: _RecentCall, error: Exception):
+    """Record a failed call and forget it, so the user can retry immediately."""
+    call.error = error
+    with _recent_calls_lock:
+        if _recent_calls.get(key) is call:
+            del _recent_calls[key]
+
+
+def run_once(key: str, func: Callable[[], Any]) -> Any:
+    """
+    Run an agent call at most once per key within the idempotency window.
+    
+    Duplicate submissions that arrive while the first call is still running
+    wait for it and share its result instead of triggering another LLM call.
+    Failed calls are not cached so the user can retry immediately.
+    
+    Args:
+        key: Request key from request_key()
+        func: Zero-argument callable performing the agent call
+    
+    Returns:
+        Result of func (possibly from an earlier identical submission)
+    """
+    call, is_owner = _claim_call(key)
+    if not is_owner:
+        return _shared_result(call)
+    
+    try:
+        call.result = func()
+        call.expires_at = time.monotonic() + IDEMPOTENCY_TTL_SECONDS
+        return call.result
+    except Exception as e:
+        _fail_call(key, call, e)
+        raise
+    finally:
+        call.done.set()
+
+
+def run_once_stream(key: str, stream: Callable[[], Iterator[str]]):
+    """
+    Streaming counterpart of run_once().
+    
+    The first submission yields the stream's deltas; duplicates yield nothing.
+    Either way the generator returns the stream's final value.
+    
+    Args:
+        key: Request key from request_key()
+        stream: Zero-argument callable returning a text-delta generator
+    
+    Returns:
+        Final value of the stream (possibly from an earlier identical submission)
+    """
+    call, is_owner = _claim_call(key)
+    if not is_owner:
+        return _shared_result(call)
+    
+    try:
+        call.result = yield from stream()
+        call.expires_at = time.monotonic() + IDEMPOTENCY_TTL_SECONDS
+        return call.result
+    except GeneratorExit:
+        # Client went away mid-stream; waiting duplicates must not hang
+        _fail_call(key, call, RuntimeError("The response stream was closed before it finished."))
+        raise
+    except Exception as e:
+        _fail_call(key, call, e)
+        raise
+    finally:
+        call.done.set()
+
+
+@contextmanager
+def latest_turn(session_id: str) -> Iterator[None]:
+    """
+    Run one agent turn for a session, dropping it if it went stale while queued.
+    
+    Turns for the same session run one at a time. A turn that waited longer
+    than SESSION_LATENCY_BUDGET_SECONDS while a newer one queued behind it is
+    skipped, so a burst of submissions is answered once, for the latest.
+    
+    Args:
+        session_id: Session identifier
+    
+    Raises:
+        StaleRequestError: If a newer turn superseded this one
+    """
+    with _session_turns_lock:
+        turns = _session_turns.get(session_id)
+        if turns is None:
+            turns = _SessionTurns()
+            _session_turns[session_id] = turns
+        turns.latest += 1
+        ticket = turns.latest
+    queued_at = time.monotonic()
+    
+    with turns.lock:
+        waited = time.monotonic() - queued_at
+        if ticket != turns.latest and waited > SESSION_LATENCY_BUDGET_SECONDS:
+            raise StaleRequestError("Skipped: a newer message was sent.")
+        yield
+
+
+@app.before_request
+def detect_ajax_request():
+    """Parse the AJAX marker header once per request."""
+    g.is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+
+def is_ajax_request() -> bool:
+    """Check whether the current request was sent by the page's fetch() handlers."""
+    return g.is_ajax
+
+
+def respond(endpoint: str, status: int = 200, **payload: Any):
+    """
+    Finish a POST handler.
+    
+    AJAX callers get the payload (plus the current status message) as an
+    uncacheable JSON body so the page can update in place; regular form posts
+    are redirected to the given endpoint as before.
+    
+    Args:
+        endpoint: Endpoint to redirect to (and to report to AJAX callers)
+        status: HTTP status code for the JSON response
+        **payload: JSON fields for AJAX callers
+    
+    Returns:
+        Flask response
+    """
+    if not is_ajax_request():
+        return redirect(url_for(endpoint))
+    
+    payload.setdefault('success', status < 400)
+    payload.setdefault('status_message', session.get('status_message'))
+    payload.setdefault('redirect', url_for(endpoint))
+    response = make_response(jsonify(payload), status)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def sse_event(event: Optional[str] = None, **data: Any) -> str:
+    """Format a server-sent event carrying a JSON payload."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def sse_deltas(stream: Iterator[str]):
+    """Re-emit a text-delta generator as SSE messages, returning its final value."""
+    try:
+        while True:
+            yield sse_event(delta=next(stream))
+    except StopIteration as stop:
+        return stop.value
+
+
+def stream_response(events: Iterator[str], on_close: Optional[Callable[[], None]] = None) -> Response:
+    """
+    Wrap an SSE generator in an unbuffered, uncacheable streaming response.
+    
+    Args:
+        events: SSE message generator
+        on_close: Called once the response is closed (finished, aborted, or never started)
+    
+    Returns:
+        Flask response
+    """
+    response = Response(stream_with_context(events), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'  # Don't let proxies buffer the stream
+    if on_close is not None:
+        response.call_on_close(on_close)
+    return response
+
+
+def sign_session_update(session_id: str, expected_submission_id: Optional[str], **updates: Any) -> str:
+    """Sign session values computed after a streamed response has started (see /commit_turn)."""
+    return _turn_signer.dumps({
+        'session_id': session_id,
+        'expected_submission_id': expected_submission_id,
+        'updates': updates,
+    })
 
 
 def get_or_create_session_id():
     """Get or create a session ID for the current user."""
     if 'session_id' not in session:
-        session['session_id'] = str(uuid.uuid4())
+        session['session_id'] = uuid4().hex
     return session['session_id']
 
 
@@ -87,34 +450,40 @@ def chat():
         'chat.html',
         conversation_history=conversation_history,
         current_ticker=current_ticker,
-        current_trade_type=current_trade_type
+        current_trade_type=current_trade_type,
+        submission_id=uuid4().hex
     )
 
 
 @app.route('/start_research', methods=['POST'])
 def start_research():
     """Handle form submission to start research."""
-    ticker = request.form.get('ticker', '').strip()
+    raw_ticker = request.form.get('ticker', '')
     trade_type = request.form.get('trade_type', '')
     
-    # Validate input
-    if not ticker:
+    # Validate input before an agent is acquired for the session
+    if not raw_ticker.strip():
         session['status_message'] = '❌ Please enter a stock ticker.'
-        return redirect(url_for('index'))
+        return respond('index', 400, error=session['status_message'])
+    
+    ticker = normalize_ticker(raw_ticker)
+    if ticker is None:
+        session['status_message'] = f'❌ "{raw_ticker.strip()}" is not a valid stock ticker.'
+        return respond('index', 400, error=session['status_message'])
     
     if not trade_type:
         session['status_message'] = '❌ Please select a trade type.'
-        return redirect(url_for('index'))
-    
-    ticker = ticker.upper()
+        return respond('index', 400, error=session['status_message'])
     
     try:
         session_id = get_or_create_session_id()
-        agent = initialize_session(session_id)
-        agent.reset_conversation()
-        
-        # Start research
-        response = agent.start_research(ticker, trade_type)
+        with session_agent(session_id) as agent:
+            def _start():
+                agent.reset_conversation()
+                return agent.start_research(ticker, trade_type)
+            
+            # Start research (duplicate submissions share the first call's response)
+            response = run_once(request_key(session_id, ticker, trade_type), _start)
         
         # Store conversation in session as list of message dicts
         conversation_history = [
@@ -126,11 +495,15 @@ def start_research():
         session['current_trade_type'] = trade_type
         session['status_message'] = f'✅ Research started for {ticker} ({trade_type})'
         
+        # Turn tokens from the previous conversation no longer apply (see /commit_turn)
+        session['last_submission_id'] = uuid4().hex
+        
     except Exception as e:
         session['status_message'] = f'❌ Error: {str(e)}'
         session['conversation_history'] = []
+        return respond('chat', 500, error=session['status_message'])
     
-    return redirect(url_for('chat'))
+    return respond('chat', conversation_history=conversation_history)
 
 
 @app.route('/continue', methods=['POST'])
@@ -151,7 +524,7 @@ def continue_conversation():
                 "data": {
                     "form_keys": list(request.form.keys()),
                     "user_response_raw": request.form.get('user_response', 'NOT_FOUND'),
-                    "is_ajax": request.headers.get('X-Requested-With') == 'XMLHttpRequest',
+                    "is_ajax": g.is_ajax,
                     "content_type": request.content_type
                 },
                 "timestamp": int(datetime.now().timestamp() * 1000)
@@ -160,7 +533,8 @@ def continue_conversation():
     # #endregion
     
     user_input = request.form.get('user_response', '').strip()
-    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    # Clients without a submission ID get a fresh one, so their messages are never deduplicated
+    submission_id = request.form.get('submission_id') or uuid4().hex
     
     # #region agent log
     try:
@@ -193,74 +567,160 @@ def continue_conversation():
                     "location": "app.py:continue_conversation:validation_failed",
                     "message": "Validation failed - empty input",
                     "data": {
-                        "is_ajax": is_ajax,
+                        "is_ajax": g.is_ajax,
                         "user_input": user_input
                     },
                     "timestamp": int(datetime.now().timestamp() * 1000)
                 }) + '\n')
         except: pass
         # #endregion
-        if is_ajax:
-            return jsonify({'success': False, 'error': '⚠️ Please enter a response.'}), 400
         session['status_message'] = '⚠️ Please enter a response.'
-        return redirect(url_for('chat'))
+        return respond('chat', 400, error=session['status_message'])
     
     try:
         session_id = get_or_create_session_id()
-        agent = initialize_session(session_id)
         
         # Store previous report_id to detect if a new report was generated
         previous_report_id = session.get('current_report_id')
         
-        # Get agent response
-        response = agent.continue_conversation(user_input)
+        with session_agent(session_id) as agent:
+            # Get agent response (re-sent submissions share the first call's response;
+            # keyed on the submission, so repeating a message like "yes" is a new turn)
+            with latest_turn(session_id):
+                response = run_once(
+                    request_key(session_id, submission_id),
+                    lambda: agent.continue_conversation(user_input),
+                )
+            current_report_id = agent.current_report_id
+            report_text = getattr(agent, 'last_report_text', None)
         
         # Get current conversation history
         conversation_history = session.get('conversation_history', [])
         
+        # A replayed submission is already in the history if its first response set the cookie
+        already_recorded = session.get('last_submission_id') == submission_id
+        
         # Append user message and agent response
-        conversation_history.append({"role": "user", "content": user_input})
-        conversation_history.append({"role": "assistant", "content": response})
+        if not already_recorded:
+            conversation_history.append({"role": "user", "content": user_input})
+            conversation_history.append({"role": "assistant", "content": response})
         
         # Check if a report was generated during this conversation turn
-        current_report_id = agent.current_report_id
         report_generated = False
         report_preview = None
         
-        if current_report_id and current_report_id != previous_report_id:
-            # A new report was generated - get report text from agent and add preview to conversation
-            report_text = getattr(agent, 'last_report_text', None) or session.get('report_text', '')
+        if not already_recorded and current_report_id and current_report_id != previous_report_id:
+            # A new report was generated - add its preview to the conversation
             if report_text:
-                report_preview = f"Report Generated:\n\n{report_text[:500] if report_text else 'No report content'}...\n\n[Full report stored. You can now chat with it using the chat interface.]"
+                report_preview = build_report_preview(report_text)
                 conversation_history.append({
                     "role": "assistant",
                     "content": report_preview
                 })
                 session['current_report_id'] = current_report_id
-                session['report_text'] = report_text
                 report_generated = True
         
         # Update session
         session['conversation_history'] = conversation_history
+        session['last_submission_id'] = submission_id
         session['status_message'] = '✅ Response received'
         
-        # If AJAX request, return JSON
-        if is_ajax:
-            return jsonify({
-                'success': True,
-                'user_message': user_input,
-                'assistant_message': response,
-                'conversation_history': conversation_history,
-                'report_generated': report_generated,
-                'report_preview': report_preview
-            })
+        return respond(
+            'chat',
+            user_message=user_input,
+            assistant_message=response,
+            conversation_history=conversation_history,
+            report_generated=report_generated,
+            report_preview=report_preview,
+        )
         
+    except StaleRequestError as e:
+        return respond('chat', 409, error=f'⏭️ {str(e)}')
     except Exception as e:
-        if is_ajax:
-            return jsonify({'success': False, 'error': f'❌ Error: {str(e)}'}), 500
         session['status_message'] = f'❌ Error: {str(e)}'
+        return respond('chat', 500, error=session['status_message'])
+
+
+@app.route('/continue_stream', methods=['POST'])
+def continue_conversation_stream():
+    """Continue the conversation, streaming the agent's reply as server-sent events."""
+    user_input = request.form.get('user_response', '').strip()
+    if not user_input:
+        return respond('chat', 400, error='⚠️ Please enter a response.')
+    submission_id = request.form.get('submission_id') or uuid4().hex
+    
+    try:
+        session_id = get_or_create_session_id()
+        agent = initialize_session(session_id)
+    except Exception as e:
+        return respond('chat', 500, error=f'❌ Error: {str(e)}')
+    
+    previous_report_id = session.get('current_report_id')
+    conversation_history = session.get('conversation_history', [])
+    last_submission_id = session.get('last_submission_id')
+    already_recorded = last_submission_id == submission_id
     
-    return redirect(url_for('chat'))
+    def generate():
+        try:
+            # Re-sent submissions share the first call's reply (see /continue)
+            with latest_turn(session_id):
+                response = yield from sse_deltas(run_once_stream(
+                    request_key(session_id, submission_id),
+                    lambda: agent.stream_continue(user_input),
+                ))
+            
+            updates: Dict[str, Any] = {}
+            report_preview = None
+            if not already_recorded:
+                conversation_history.append({"role": "user", "content": user_input})
+                conversation_history.append({"role": "assistant", "content": response})
+                
+                # Check if a report was generated during this conversation turn
+                current_report_id = agent.current_report_id
+                if current_report_id and current_report_id != previous_report_id:
+                    report_text = agent.last_report_text or ''
+                    if report_text:
+                        report_preview = build_report_preview(report_text)
+                        conversation_history.append({"role": "assistant", "content": report_preview})
+                        updates.update(current_report_id=current_report_id)
+            
+            yield sse_event(
+                'done',
+                assistant_message=response,
+                report_generated=report_preview is not None,
+                report_preview=report_preview,
+                session_update=sign_session_update(
+                    session_id,
+                    last_submission_id,
+                    conversation_history=conversation_history,
+                    last_submission_id=submission_id,
+                    status_message='✅ Response received',
+                    **updates,
+                ),
+            )
+        except Exception as e:
+            yield sse_event('error', error=f'❌ Error: {str(e)}')
+    
+    # The agent stays checked out until the stream is closed, even if it never started
+    return stream_response(generate(), on_close=lambda: agent_sessions.checkin(agent))
+
+
+@app.route('/commit_turn', methods=['POST'])
+def commit_turn():
+    """Store a streamed turn in the session, from the token in the stream's final event."""
+    try:
+        payload = _turn_signer.loads(
+            request.form.get('session_update', ''), max_age=STREAM_TURN_MAX_AGE_SECONDS
+        )
+    except BadSignature:
+        return jsonify({'success': False, 'error': 'Invalid or expired session update.'}), 400
+    if payload.get('session_id') != session.get('session_id'):
+        return jsonify({'success': False, 'error': 'Session update is for another session.'}), 400
+    if payload.get('expected_submission_id') != session.get('last_submission_id'):
+        # The history changed since this turn started (another tab, /clear, or a replay)
+        return jsonify({'success': False, 'error': 'The conversation changed before this reply was saved.'}), 409
+    session.update(payload['updates'])
+    return make_response('', 204)
 
 
 @app.route('/generate_report', methods=['POST'])
@@ -268,30 +728,26 @@ def generate_report():
     """Handle form submission to generate report after followup questions."""
     try:
         session_id = get_or_create_session_id()
-        agent = initialize_session(session_id)
         
         # Extract context from conversation history
         conversation_history = session.get('conversation_history', [])
-        context = ""
-        for msg in conversation_history:
-            if msg.get('role') == 'user':
-                context += f"User: {msg.get('content', '')}\n"
+        context = build_report_context(conversation_history)
         
         # Generate report
-        session['status_message'] = '🔄 Generating report... This may take a few minutes.'
-        session['conversation_history'] = conversation_history  # Preserve history
-        session.modified = True
-        
-        report_text = agent.generate_report(context=context)
-        report_id = agent.current_report_id
+        with session_agent(session_id) as agent:
+            report_text = run_once(
+                request_key(session_id, context),
+                lambda: agent.generate_report(context=context),
+            )
+            report_id = agent.current_report_id
         
-        # Store report in session
+        # Store report id in session (the text is served by /report/<id>)
         session['current_report_id'] = report_id
-        session['report_text'] = report_text
+        session.pop('report_text', None)
         session['status_message'] = f'✅ Report generated successfully! Report ID: {report_id[:8]}...'
         
         # Add report to conversation
-        report_preview = f"Report Generated:\n\n{report_text[:500] if report_text else 'No report content'}...\n\n[Full report stored. You can now chat with it using the chat interface.]"
+        report_preview = build_report_preview(report_text)
         conversation_history.append({
             "role": "assistant",
             "content": report_preview
@@ -300,8 +756,14 @@ def generate_report():
         
     except Exception as e:
         session['status_message'] = f'❌ Error generating report: {str(e)}'
+        return respond('chat', 500, error=session['status_message'])
     
-    return redirect(url_for('chat'))
+    return respond(
+        'chat',
+        report_id=report_id,
+        report_preview=report_preview,
+        conversation_history=conversation_history,
+    )
 
 
 @app.route('/chat_report', methods=['POST'])
@@ -312,19 +774,20 @@ def chat_report():
     # Validate input
     if not question:
         session['status_message'] = '⚠️ Please enter a question.'
-        return redirect(url_for('index'))
+        return respond('index', 400, error=session['status_message'])
     
     if 'current_report_id' not in session:
         session['status_message'] = '❌ No report available. Please generate a report first.'
-        return redirect(url_for('index'))
+        return respond('index', 400, error=session['status_message'])
     
     try:
         session_id = get_or_create_session_id()
-        agent = initialize_session(session_id)
-        agent.current_report_id = session.get('current_report_id')
-        
-        # Get answer from chat agent
-        answer = agent.chat_with_report(question)
+        with session_agent(session_id) as agent:
+            agent.current_report_id = session.get('current_report_id')
+            
+            # Get answer from chat agent
+            with latest_turn(session_id):
+                answer = agent.chat_with_report(question)
         
         # Update chat history in session
         chat_history = session.get('chat_history', [])
@@ -333,10 +796,13 @@ def chat_report():
         session['chat_history'] = chat_history
         session['status_message'] = '✅ Answer received'
         
+    except StaleRequestError as e:
+        return respond('index', 409, error=f'⏭️ {str(e)}')
     except Exception as e:
         session['status_message'] = f'❌ Error: {str(e)}'
+        return respond('index', 500, error=session['status_message'])
     
-    return redirect(url_for('index'))
+    return respond('index', answer=answer)
 
 
 @app.route('/clear', methods=['POST'])
@@ -347,15 +813,43 @@ def clear_conversation():
     session['current_trade_type'] = 'Investment'
     session['status_message'] = 'Conversation cleared. Ready for new research.'
     
-    # Optionally reset agent
+    # Turn tokens from before the clear no longer apply (see /commit_turn)
+    session['last_submission_id'] = uuid4().hex
+    
+    # Hand the session's agent back to the pool (reset there, once no request is using it);
+    # the next request builds a fresh one from the cleared session
     session_id = get_or_create_session_id()
-    if session_id in agent_sessions:
-        try:
-            agent_sessions[session_id].reset_conversation()
-        except:
-            pass
+    agent_sessions.evict(session_id)
     
-    return redirect(url_for('chat'))
+    return respond('chat', conversation_history=[])
+
+
+def shutdown_agents():
+    """Return session agents to the pool and shut all of them down."""
+    try:
+        agent_sessions.drain()
+    finally:
+        agent_pool.drain()
+
+
+@app.route('/warmup', methods=['POST'])
+def warmup():
+    """Make sure an agent is ready before the user submits (called as they type)."""
+    if get_or_create_session_id() not in agent_sessions:
+        agent_pool.prewarm(1)
+    response = make_response('', 204)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@app.route('/health')
+def health():
+    """Report agent pool and session cache counters."""
+    return jsonify({
+        'status': 'ok',
+        'sessions': len(agent_sessions),
+        'agent_pool': agent_pool.stats(),
+    })
 
 
 def main():
@@ -365,10 +859,27 @@ def main():
         print("Warning: OPENAI_API_KEY not found in environment variables.")
         print("Please set it in your .env file or environment.")
     
+    # Fail now if MySQL isn't configured
+    check_database_config()
+    
+    debug = True
+    # With the reloader, main() also runs in the watcher process, which never
+    # serves a request; only the serving process warms the database and agents
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        # Open the pool and set up the schema in the background
+        warm_database_manager()
+        
+        # Build agents in the background so the first session doesn't wait
+        agent_pool.prewarm()
+    
+    # Tear down agents on exit; SIGTERM is turned into a normal exit so atexit runs
+    atexit.register(shutdown_agents)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
     app.run(
         host='127.0.0.1',
         port=5000,
-        debug=True
+        debug=debug
     )
 
 
@@ -4,15 +4,305 @@ MySQL database connection and schema management for reports and chunks.
 
 import os
 import json
+import threading
+import time
 import uuid
-from typing import Optional, Dict, Any, List
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterator, Tuple
 from datetime import datetime
+import numpy as np
 import mysql.connector
-from mysql.connector import Error, pooling
+from mysql.connector import Error, PoolError, pooling
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json works the same
+    orjson = None
+
 load_dotenv()
 
+# Connection pool sizing (mysql.connector caps pools at 32 connections)
+MYSQL_POOL_SIZE = int(os.getenv('MYSQL_POOL_SIZE', str(min(32, (os.cpu_count() or 4) * 2 + 1))))
+# Retries when every pooled connection is checked out
+MYSQL_POOL_MAX_RETRIES = int(os.getenv('MYSQL_POOL_MAX_RETRIES', '5'))
+MYSQL_POOL_RETRY_DELAY_SECONDS = float(os.getenv('MYSQL_POOL_RETRY_DELAY_SECONDS', '0.05'))
+
+# Embeddings are stored as packed float32 bytes (6 KB for 1536 dims vs ~20 KB of JSON)
+EMBEDDING_DTYPE = np.float32
+
+# Storage format for new embeddings: 'float32' (exact) or opt-in 'int8' (lossy:
+# symmetric per-vector scale, ~1.5 KB for 1536 dims, slightly shifts similarity
+# scores). Rows record their own format, so both can be read.
+EMBEDDING_STORAGE_DTYPE = os.getenv('EMBEDDING_STORAGE_DTYPE', 'float32').lower()
+
+# MySQL named lock serializing schema setup across processes, and how long to wait for it
+SCHEMA_LOCK_NAME = 'stock_ai_schema'
+SCHEMA_LOCK_TIMEOUT_SECONDS = int(os.getenv('SCHEMA_LOCK_TIMEOUT_SECONDS', '600'))
+
+# Rows per executemany() call; keeps each multi-row INSERT under max_allowed_packet
+CHUNK_INSERT_BATCH_SIZE = int(os.getenv('CHUNK_INSERT_BATCH_SIZE', '1000'))
+
+def _reports_table_ddl(table: str) -> str:
+    """CREATE TABLE statement for the reports table."""
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            report_id BINARY(16) PRIMARY KEY,
+            ticker VARCHAR(10) NOT NULL,
+            trade_type VARCHAR(50) NOT NULL,
+            report_text TEXT NOT NULL,
+            metadata JSON,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_ticker_created (ticker, created_at DESC)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+
+
+def _chunks_table_ddl(table: str, reports_table: str) -> str:
+    """CREATE TABLE statement for the report_chunks table."""
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            chunk_id BINARY(16) PRIMARY KEY,
+            report_id BINARY(16) NOT NULL,
+            chunk_text TEXT NOT NULL,
+            section VARCHAR(100),
+            chunk_index INT NOT NULL,
+            embedding BLOB,
+            embedding_dtype VARCHAR(8) NOT NULL DEFAULT 'float32',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (report_id) REFERENCES {reports_table}(report_id) ON DELETE CASCADE,
+            INDEX idx_report_chunk_order (report_id, chunk_index),
+            INDEX idx_section (section)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+
+
+def _report_embeddings_table_ddl(table: str, reports_table: str) -> str:
+    """CREATE TABLE statement for the per-report embedding matrix table."""
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            report_id BINARY(16) PRIMARY KEY,
+            chunk_count INT NOT NULL,
+            dim INT NOT NULL,
+            embedding_dtype VARCHAR(8) NOT NULL,
+            chunk_ids LONGBLOB NOT NULL,
+            embeddings LONGBLOB NOT NULL,
+            FOREIGN KEY (report_id) REFERENCES {reports_table}(report_id) ON DELETE CASCADE
+        ) ENGINE=InnoDB
+    """
+
+
+# Statement templates, built once at import instead of per call
+_INSERT_REPORT_SQL = (
+    "INSERT INTO reports (report_id, ticker, trade_type, report_text, metadata) "
+    "VALUES (%s, %s, %s, %s, %s)"
+)
+_SELECT_REPORT_SQL = (
+    "SELECT report_id, ticker, trade_type, report_text, metadata, created_at "
+    "FROM reports WHERE report_id = %s"
+)
+_SELECT_REPORTS_BY_TICKER_SQL = (
+    "SELECT report_id, ticker, trade_type, report_text, metadata, created_at "
+    "FROM reports WHERE ticker = %s ORDER BY created_at DESC LIMIT %s"
+)
+_LIST_REPORTS_BY_TICKER_SQL = (
+    "SELECT report_id, ticker, trade_type, metadata, created_at "
+    "FROM reports WHERE ticker = %s ORDER BY created_at DESC LIMIT %s"
+)
+_INSERT_CHUNK_SQL = (
+    "INSERT INTO report_chunks "
+    "(chunk_id, report_id, chunk_text, section, chunk_index, embedding, embedding_dtype) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s)"
+)
+_SELECT_CHUNKS_SQL = (
+    "SELECT chunk_id, report_id, chunk_text, section, chunk_index, embedding, embedding_dtype, "
+    "created_at "
+    "FROM report_chunks WHERE report_id = %s ORDER BY chunk_index ASC"
+)
+_SELECT_CHUNKS_NO_EMBEDDINGS_SQL = (
+    "SELECT chunk_id, report_id, chunk_text, section, chunk_index, created_at "
+    "FROM report_chunks WHERE report_id = %s ORDER BY chunk_index ASC"
+)
+_INSERT_REPORT_EMBEDDINGS_SQL = (
+    "INSERT INTO report_embeddings "
+    "(report_id, chunk_count, dim, embedding_dtype, chunk_ids, embeddings) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+_SELECT_REPORT_EMBEDDINGS_SQL = (
+    "SELECT chunk_count, dim, embedding_dtype, chunk_ids, embeddings "
+    "FROM report_embeddings WHERE report_id = %s"
+)
+_DELETE_REPORT_SQL = "DELETE FROM reports WHERE report_id = %s"
+
+
+def encode_metadata(metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Serialize report metadata for the JSON column."""
+    if not metadata:
+        return None
+    if orjson is not None:
+        return orjson.dumps(metadata).decode()
+    return json.dumps(metadata)
+
+
+def _json_loads(value):
+    """Parse JSON text or bytes, with orjson when it is installed."""
+    return orjson.loads(value) if orjson is not None else json.loads(value)
+
+
+def decode_metadata(value: Any) -> Any:
+    """Parse a JSON column value unless the driver already returned an object."""
+    if not isinstance(value, (str, bytes, bytearray)):
+        return value
+    return _json_loads(value)
+
+
+def id_to_bytes(value: str) -> bytes:
+    """Convert a UUID string to its 16-byte column form."""
+    return uuid.UUID(value).bytes
+
+
+def id_from_bytes(value) -> str:
+    """Convert a BINARY(16) id column back to the UUID string used by callers."""
+    return str(uuid.UUID(bytes=bytes(value)))
+
+
+def _quantize_matrix(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return float32 per-row scales and int8 rows, where value = q * scale / 127."""
+    matrix = np.asarray(matrix, dtype=EMBEDDING_DTYPE)
+    scales = np.abs(matrix).max(axis=1)
+    safe = np.where(scales == 0, 1.0, scales).astype(EMBEDDING_DTYPE)
+    quantized = np.clip(np.rint(matrix / safe[:, None] * 127), -127, 127).astype(np.int8)
+    return scales, quantized
+
+
+def quantize_embeddings(matrix: np.ndarray) -> List[bytes]:
+    """
+    Pack a (N, D) float matrix as int8 with a symmetric per-vector scale.
+    
+    Each row becomes a 4-byte float32 scale followed by D int8 values, where
+    value = q * scale / 127. Cosine similarity is preserved to within the
+    rounding error of 8 bits per component.
+    """
+    scales, quantized = _quantize_matrix(matrix)
+    return [scale.tobytes() + row.tobytes() for scale, row in zip(scales, quantized)]
+
+
+def encode_embedding_matrix(
+    embeddings: List[Any],
+    dtype: str = EMBEDDING_STORAGE_DTYPE
+) -> Optional[Tuple[int, int, bytes]]:
+    """
+    Pack all of a report's embeddings as one contiguous (N, D) block.
+    
+    float32 blocks are the raw row-major matrix; int8 blocks are N float32
+    scales followed by the row-major int8 matrix.
+    
+    Returns:
+        (rows, dim, bytes), or None if any embedding is missing or ragged
+    """
+    if not embeddings or any(e is None or len(e) == 0 for e in embeddings):
+        return None
+    try:
+        matrix = np.asarray(embeddings, dtype=EMBEDDING_DTYPE)
+    except ValueError:
+        return None
+    if matrix.ndim != 2:
+        return None
+    if dtype == 'int8':
+        scales, quantized = _quantize_matrix(matrix)
+        data = scales.tobytes() + quantized.tobytes()
+    else:
+        data = np.ascontiguousarray(matrix).tobytes()
+    return matrix.shape[0], matrix.shape[1], data
+
+
+def decode_embedding_matrix(data, rows: int, dim: int, dtype: str) -> np.ndarray:
+    """Unpack a report embedding block into a (rows, dim) float32 matrix (zero-copy for float32)."""
+    if dtype == 'int8':
+        scales = np.frombuffer(data, dtype=EMBEDDING_DTYPE, count=rows)
+        quantized = np.frombuffer(data, dtype=np.int8, offset=rows * 4).reshape(rows, dim)
+        return quantized.astype(EMBEDDING_DTYPE) * (scales / 127)[:, None]
+    return np.frombuffer(data, dtype=EMBEDDING_DTYPE).reshape(rows, dim)
+
+
+def encode_embedding(embedding, dtype: str = EMBEDDING_STORAGE_DTYPE) -> Optional[bytes]:
+    """Pack an embedding vector into bytes for the BLOB column."""
+    if embedding is None or len(embedding) == 0:
+        return None
+    if dtype == 'int8':
+        return quantize_embeddings(np.asarray(embedding, dtype=EMBEDDING_DTYPE)[None, :])[0]
+    return np.asarray(embedding, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def encode_embeddings(
+    embeddings: List[Any],
+    dtype: str = EMBEDDING_STORAGE_DTYPE
+) -> List[Optional[bytes]]:
+    """
+    Pack many embeddings at once.
+    
+    Converts the whole batch to one float32 matrix in a single numpy call
+    when every vector is present; falls back to per-vector packing otherwise.
+    """
+    if embeddings and all(e is not None and len(e) > 0 for e in embeddings):
+        try:
+            matrix = np.asarray(embeddings, dtype=EMBEDDING_DTYPE)
+        except ValueError:
+            matrix = None  # Ragged input; pack individually
+        if matrix is not None and matrix.ndim == 2:
+            if dtype == 'int8':
+                return quantize_embeddings(matrix)
+            return [row.tobytes() for row in matrix]
+    return [encode_embedding(e, dtype) for e in embeddings]
+
+
+def decode_embedding(data, dtype: Optional[str] = 'float32') -> Optional[np.ndarray]:
+    """Unpack a BLOB embedding column into a float32 array (zero-copy for float32)."""
+    if not data:
+        return None
+    if dtype == 'int8':
+        scale = np.frombuffer(data, dtype=EMBEDDING_DTYPE, count=1)[0]
+        quantized = np.frombuffer(data, dtype=np.int8, offset=4)
+        return quantized.astype(EMBEDDING_DTYPE) * (scale / 127)
+    return np.frombuffer(data, dtype=EMBEDDING_DTYPE)
+
+
+def _build_chunk_rows(report_key: bytes, chunks: List[Dict[str, Any]]) -> List[tuple]:
+    """Build report_chunks INSERT rows, generating chunk ids and packing embeddings."""
+    embeddings = encode_embeddings([chunk.get('embedding') for chunk in chunks])
+    return [
+        (
+            uuid.uuid4().bytes,
+            report_key,
+            chunk['chunk_text'],
+            chunk.get('section'),
+            chunk['chunk_index'],
+            embedding,
+            EMBEDDING_STORAGE_DTYPE if embedding is not None else 'float32',
+        )
+        for chunk, embedding in zip(chunks, embeddings)
+    ]
+
+
+def _insert_chunk_rows(cursor, rows: List[tuple]):
+    """Insert chunk rows in batches; executemany() rewrites them into multi-row VALUES."""
+    for start in range(0, len(rows), CHUNK_INSERT_BATCH_SIZE):
+        cursor.executemany(_INSERT_CHUNK_SQL, rows[start:start + CHUNK_INSERT_BATCH_SIZE])
+
+
+def check_database_config():
+    """
+    Check that the MySQL connection settings are present.
+    
+    Raises:
+        ValueError: If MYSQL_USER, MYSQL_PASSWORD, or MYSQL_DATABASE is unset
+    """
+    missing = [name for name in ('MYSQL_USER', 'MYSQL_PASSWORD', 'MYSQL_DATABASE') if not os.getenv(name)]
+    if missing:
+        raise ValueError(
+            f"MySQL configuration incomplete. Set {', '.join(missing)} environment variable(s)."
+        )
+
 
 class DatabaseManager:
     """Manages MySQL database connections and operations for reports and chunks."""
@@ -26,14 +316,12 @@ class DatabaseManager:
             'password': os.getenv('MYSQL_PASSWORD'),
             'database': os.getenv('MYSQL_DATABASE'),
             'pool_name': 'stock_research_pool',
-            'pool_size': 5,
-            'pool_reset_session': True
+            'pool_size': MYSQL_POOL_SIZE,
+            'pool_reset_session': True,
+            'use_pure': False,  # Prefer the C extension; falls back to pure Python if missing
         }
         
-        if not all([self.config['user'], self.config['password'], self.config['database']]):
-            raise ValueError(
-                "MySQL configuration incomplete. Set MYSQL_USER, MYSQL_PASSWORD, and MYSQL_DATABASE environment variables."
-            )
+        check_database_config()
         
         self.connection_pool = None
         self._initialize_pool()
@@ -47,60 +335,270 @@ class DatabaseManager:
             raise RuntimeError(f"Failed to create MySQL connection pool: {e}")
     
     def get_connection(self):
-        """Get a connection from the pool."""
+        """
+        Get a connection from the pool.
+        
+        If the pool is exhausted, retries with exponential backoff before
+        giving up, since mysql.connector pools never grow past pool_size.
+        """
+        for attempt in range(MYSQL_POOL_MAX_RETRIES + 1):
+            try:
+                return self.connection_pool.get_connection()
+            except PoolError as e:
+                if attempt == MYSQL_POOL_MAX_RETRIES:
+                    raise RuntimeError(f"Failed to get connection from pool: {e}")
+                delay = MYSQL_POOL_RETRY_DELAY_SECONDS * (2 ** attempt)
+                print(
+                    f"[DB] Connection pool saturated ({self.config['pool_size']} in use), "
+                    f"retrying in {delay:.2f}s (attempt {attempt + 1}/{MYSQL_POOL_MAX_RETRIES})"
+                )
+                time.sleep(delay)
+            except Error as e:
+                raise RuntimeError(f"Failed to get connection from pool: {e}")
+    
+    @contextmanager
+    def _conn(self, dictionary: bool = False) -> Iterator[Any]:
+        """
+        Yield a cursor on a pooled connection for one unit of work.
+        
+        Commits when the block succeeds, rolls back if it raises, and always
+        returns the connection to the pool.
+        
+        Args:
+            dictionary: Return rows as dictionaries instead of tuples
+        """
+        connection = self.get_connection()
+        cursor = connection.cursor(dictionary=dictionary)
         try:
-            return self.connection_pool.get_connection()
-        except Error as e:
-            raise RuntimeError(f"Failed to get connection from pool: {e}")
+            yield cursor
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+            connection.close()
     
     def init_schema(self):
-        """Initialize database schema (create tables if they don't exist)."""
-        connection = None
+        """
+        Initialize database schema (create tables if they don't exist) and run migrations.
+        
+        Holds a MySQL named lock for the duration, so processes starting at
+        the same time (e.g. the dev reloader, or several workers) run the
+        migrations one after another instead of against each other.
+        """
+        connection = self.get_connection()
+        cursor = connection.cursor()
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor()
-            
-            # Create reports table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS reports (
-                    report_id VARCHAR(36) PRIMARY KEY,
-                    ticker VARCHAR(10) NOT NULL,
-                    trade_type VARCHAR(50) NOT NULL,
-                    report_text TEXT NOT NULL,
-                    metadata JSON,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_ticker (ticker),
-                    INDEX idx_created_at (created_at)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """)
-            
-            # Create report_chunks table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS report_chunks (
-                    chunk_id VARCHAR(36) PRIMARY KEY,
-                    report_id VARCHAR(36) NOT NULL,
-                    chunk_text TEXT NOT NULL,
-                    section VARCHAR(100),
-                    chunk_index INT NOT NULL,
-                    embedding JSON,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (report_id) REFERENCES reports(report_id) ON DELETE CASCADE,
-                    INDEX idx_report_id (report_id),
-                    INDEX idx_section (section)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """)
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (SCHEMA_LOCK_NAME, SCHEMA_LOCK_TIMEOUT_SECONDS))
+            (acquired,) = cursor.fetchone()
+            if acquired != 1:
+                raise RuntimeError("Timed out waiting for another process to finish schema setup")
+            try:
+                self._init_schema()
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (SCHEMA_LOCK_NAME,))
+                cursor.fetchone()
+        except Error as e:
+            raise RuntimeError(f"Failed to lock schema setup: {e}")
+        finally:
+            cursor.close()
+            connection.close()
+    
+    def _init_schema(self):
+        """Create tables and run migrations (caller holds the schema lock)."""
+        try:
+            with self._conn() as cursor:
+                cursor.execute(_reports_table_ddl("reports"))
+                cursor.execute(_chunks_table_ddl("report_chunks", "reports"))
             
-            connection.commit()
             print("✓ Database schema initialized")
             
         except Error as e:
-            if connection:
-                connection.rollback()
             raise RuntimeError(f"Failed to initialize schema: {e}")
-        finally:
-            if connection and connection.is_connected():
-                cursor.close()
-                connection.close()
+        
+        self.migrate_embeddings_to_blob()
+        self.migrate_ids_to_binary()
+        self.ensure_embedding_dtype_column()
+        self.ensure_indexes()
+        self.ensure_report_embeddings_table()
+    
+    def migrate_ids_to_binary(self):
+        """
+        Convert VARCHAR(36) report/chunk ids from older schemas to BINARY(16).
+        
+        Copies both tables into new ones with the current schema (converting
+        ids with UUID_TO_BIN), then swaps them in with a single RENAME TABLE,
+        which is atomic. The old tables are dropped only after the swap, so a
+        run that stops partway leaves the original data in place. Safe to run
+        repeatedly; once the ids are binary it only drops leftover old tables.
+        """
+        try:
+            with self._conn() as cursor:
+                cursor.execute("""
+                    SELECT DATA_TYPE FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE()
+                      AND TABLE_NAME = 'reports'
+                      AND COLUMN_NAME = 'report_id'
+                """)
+                row = cursor.fetchone()
+                if not row or row[0].lower() != 'varchar':
+                    # An earlier run may have stopped after the swap, before the drop
+                    cursor.execute("DROP TABLE IF EXISTS report_chunks_old, reports_old")
+                    return
+                
+                print("Migrating report and chunk ids to BINARY(16)...")
+                cursor.execute("DROP TABLE IF EXISTS report_chunks_new, reports_new")
+                cursor.execute(_reports_table_ddl("reports_new"))
+                cursor.execute(_chunks_table_ddl("report_chunks_new", "reports_new"))
+                cursor.execute("""
+                    INSERT INTO reports_new
+                        (report_id, ticker, trade_type, report_text, metadata, created_at)
+                    SELECT UUID_TO_BIN(report_id), ticker, trade_type, report_text, metadata, created_at
+                    FROM reports
+                """)
+                cursor.execute("""
+                    INSERT INTO report_chunks_new
+                        (chunk_id, report_id, chunk_text, section, chunk_index, embedding, created_at)
+                    SELECT UUID_TO_BIN(chunk_id), UUID_TO_BIN(report_id), chunk_text, section,
+                           chunk_index, embedding, created_at
+                    FROM report_chunks
+                """)
+                cursor.execute("""
+                    RENAME TABLE reports TO reports_old, reports_new TO reports,
+                                 report_chunks TO report_chunks_old, report_chunks_new TO report_chunks
+                """)
+                cursor.execute("DROP TABLE report_chunks_old, reports_old")
+            
+            print("✓ Migrated ids to BINARY(16)")
+            
+        except Error as e:
+            raise RuntimeError(f"Failed to migrate ids: {e}")
+    
+    def ensure_embedding_dtype_column(self):
+        """
+        Add the embedding_dtype column to tables created by older schemas.
+        
+        Existing rows default to 'float32', which is how they were written.
+        """
+        try:
+            with self._conn() as cursor:
+                cursor.execute("""
+                    SELECT 1 FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE()
+                      AND TABLE_NAME = 'report_chunks'
+                      AND COLUMN_NAME = 'embedding_dtype'
+                """)
+                if cursor.fetchone():
+                    return
+                cursor.execute(
+                    "ALTER TABLE report_chunks "
+                    "ADD COLUMN embedding_dtype VARCHAR(8) NOT NULL DEFAULT 'float32' AFTER embedding"
+                )
+            
+            print("✓ Added embedding_dtype column to report_chunks")
+            
+        except Error as e:
+            raise RuntimeError(f"Failed to add embedding_dtype column: {e}")
+    
+    def ensure_report_embeddings_table(self):
+        """
+        Create the per-report embedding matrix table.
+        
+        Runs after migrate_ids_to_binary because its foreign key needs
+        BINARY(16) report ids.
+        """
+        try:
+            with self._conn() as cursor:
+                cursor.execute(_report_embeddings_table_ddl("report_embeddings", "reports"))
+            
+        except Error as e:
+            raise RuntimeError(f"Failed to create report_embeddings table: {e}")
+    
+    def ensure_indexes(self):
+        """
+        Add the composite query indexes to tables created by older schemas.
+        
+        idx_ticker_created serves get_reports_by_ticker's filter + ORDER BY
+        as one range scan; idx_report_chunk_order lets get_chunks_by_report
+        read chunks in order without a filesort.
+        """
+        indexes = [
+            ("reports", "idx_ticker_created", "(ticker, created_at DESC)"),
+            ("report_chunks", "idx_report_chunk_order", "(report_id, chunk_index)"),
+        ]
+        try:
+            with self._conn() as cursor:
+                for table, index_name, columns in indexes:
+                    cursor.execute("""
+                        SELECT 1 FROM information_schema.STATISTICS
+                        WHERE TABLE_SCHEMA = DATABASE()
+                          AND TABLE_NAME = %s
+                          AND INDEX_NAME = %s
+                        LIMIT 1
+                    """, (table, index_name))
+                    if cursor.fetchone():
+                        continue
+                    cursor.execute(f"ALTER TABLE {table} ADD INDEX {index_name} {columns}")
+                    print(f"✓ Added index {index_name} on {table}")
+                
+        except Error as e:
+            raise RuntimeError(f"Failed to create indexes: {e}")
+    
+    def migrate_embeddings_to_blob(self):
+        """
+        Convert a legacy JSON embedding column to packed float32 BLOBs.
+        
+        Safe to run repeatedly, and restartable: a run that stopped partway
+        reuses the embedding_blob column it added and converts only the rows
+        not yet filled in. Does nothing once the column is a BLOB.
+        """
+        try:
+            with self._conn() as cursor:
+                cursor.execute("""
+                    SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE()
+                      AND TABLE_NAME = 'report_chunks'
+                      AND COLUMN_NAME IN ('embedding', 'embedding_blob')
+                """)
+                columns = {name.lower(): data_type.lower() for name, data_type in cursor.fetchall()}
+                if columns.get('embedding') != 'json':
+                    return
+                
+                print("Migrating chunk embeddings from JSON to float32 BLOB...")
+                if 'embedding_blob' not in columns:
+                    cursor.execute("ALTER TABLE report_chunks ADD COLUMN embedding_blob BLOB")
+            
+            # Rows are streamed from one connection and written in committed
+            # batches on another, so memory stays flat and progress survives a restart
+            migrated = 0
+            with self._conn() as read_cursor:
+                read_cursor.execute("""
+                    SELECT chunk_id, embedding FROM report_chunks
+                    WHERE embedding IS NOT NULL AND embedding_blob IS NULL
+                """)
+                while True:
+                    batch = read_cursor.fetchmany(CHUNK_INSERT_BATCH_SIZE)
+                    if not batch:
+                        break
+                    rows = [
+                        (encode_embedding(_json_loads(embedding), 'float32'), chunk_id)
+                        for chunk_id, embedding in batch
+                    ]
+                    with self._conn() as cursor:
+                        cursor.executemany(
+                            "UPDATE report_chunks SET embedding_blob = %s WHERE chunk_id = %s", rows
+                        )
+                    migrated += len(rows)
+            
+            with self._conn() as cursor:
+                cursor.execute("ALTER TABLE report_chunks DROP COLUMN embedding")
+                cursor.execute("ALTER TABLE report_chunks RENAME COLUMN embedding_blob TO embedding")
+            
+            print(f"✓ Migrated {migrated} chunk embeddings")
+            
+        except Error as e:
+            raise RuntimeError(f"Failed to migrate embeddings: {e}")
     
     def save_report(
         self,
@@ -121,31 +619,77 @@ class DatabaseManager:
         Returns:
             report_id: Generated report ID
         """
-        report_id = str(uuid.uuid4())
-        connection = None
+        report_id = uuid.uuid4()
+        metadata_json = encode_metadata(metadata)
         
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor()
+            with self._conn() as cursor:
+                cursor.execute(
+                    _INSERT_REPORT_SQL,
+                    (report_id.bytes, ticker.upper(), trade_type, report_text, metadata_json)
+                )
             
-            metadata_json = json.dumps(metadata) if metadata else None
+            return str(report_id)
             
-            cursor.execute("""
-                INSERT INTO reports (report_id, ticker, trade_type, report_text, metadata)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (report_id, ticker.upper(), trade_type, report_text, metadata_json))
+        except Error as e:
+            raise RuntimeError(f"Failed to save report: {e}")
+    
+    def save_report_with_chunks(
+        self,
+        ticker: str,
+        trade_type: str,
+        report_text: str,
+        chunks: List[Dict[str, Any]],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Save a report and its chunks in one transaction on one connection.
+        
+        Equivalent to save_report() followed by save_chunks(), but with a
+        single pool checkout and commit; either everything is stored or
+        nothing is. When every chunk has an embedding, the embeddings are
+        also stored as one contiguous matrix (see get_report_embeddings).
+        
+        Args:
+            ticker: Stock ticker symbol
+            trade_type: Type of trade
+            report_text: Full report text
+            chunks: Chunk dictionaries (see save_chunks)
+            metadata: Optional metadata dictionary
+        
+        Returns:
+            report_id: Generated report ID
+        """
+        report_id = uuid.uuid4()
+        metadata_json = encode_metadata(metadata)
+        rows = _build_chunk_rows(report_id.bytes, chunks)
+        matrix = encode_embedding_matrix([chunk.get('embedding') for chunk in chunks])
+        
+        try:
+            with self._conn() as cursor:
+                cursor.execute(
+                    _INSERT_REPORT_SQL,
+                    (report_id.bytes, ticker.upper(), trade_type, report_text, metadata_json)
+                )
+                _insert_chunk_rows(cursor, rows)
+                if matrix is not None:
+                    chunk_count, dim, data = matrix
+                    cursor.execute(
+                        _INSERT_REPORT_EMBEDDINGS_SQL,
+                        (
+                            report_id.bytes,
+                            chunk_count,
+                            dim,
+                            EMBEDDING_STORAGE_DTYPE,
+                            b"".join(row[0] for row in rows),
+                            data,
+                        )
+                    )
             
-            connection.commit()
-            return report_id
+            return str(report_id)
             
         except Error as e:
-            if connection:
-                connection.rollback()
-            raise RuntimeError(f"Failed to save report: {e}")
-        finally:
-            if connection and connection.is_connected():
-                cursor.close()
-                connection.close()
+            raise RuntimeError(f"Failed to save report with chunks: {e}")
     
     def get_report(self, report_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -157,29 +701,20 @@ class DatabaseManager:
         Returns:
             Report dictionary or None if not found
         """
-        connection = None
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor(dictionary=True)
+            with self._conn(dictionary=True) as cursor:
+                cursor.execute(_SELECT_REPORT_SQL, (id_to_bytes(report_id),))
+                result = cursor.fetchone()
             
-            cursor.execute("""
-                SELECT report_id, ticker, trade_type, report_text, metadata, created_at
-                FROM reports
-                WHERE report_id = %s
-            """, (report_id,))
-            
-            result = cursor.fetchone()
-            if result and result.get('metadata'):
-                result['metadata'] = json.loads(result['metadata'])
+            if result:
+                result['report_id'] = id_from_bytes(result['report_id'])
+                if result.get('metadata'):
+                    result['metadata'] = decode_metadata(result['metadata'])
             
             return result
             
         except Error as e:
             raise RuntimeError(f"Failed to get report: {e}")
-        finally:
-            if connection and connection.is_connected():
-                cursor.close()
-                connection.close()
     
     def get_reports_by_ticker(self, ticker: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -192,32 +727,49 @@ class DatabaseManager:
         Returns:
             List of report dictionaries
         """
-        connection = None
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            cursor.execute("""
-                SELECT report_id, ticker, trade_type, report_text, metadata, created_at
-                FROM reports
-                WHERE ticker = %s
-                ORDER BY created_at DESC
-                LIMIT %s
-            """, (ticker.upper(), limit))
+            with self._conn(dictionary=True) as cursor:
+                cursor.execute(_SELECT_REPORTS_BY_TICKER_SQL, (ticker.upper(), limit))
+                results = cursor.fetchall()
             
-            results = cursor.fetchall()
             for result in results:
+                result['report_id'] = id_from_bytes(result['report_id'])
                 if result.get('metadata'):
-                    result['metadata'] = json.loads(result['metadata'])
+                    result['metadata'] = decode_metadata(result['metadata'])
             
             return results
             
         except Error as e:
             raise RuntimeError(f"Failed to get reports by ticker: {e}")
-        finally:
-            if connection and connection.is_connected():
-                cursor.close()
-                connection.close()
+    
+    def list_reports_by_ticker(self, ticker: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        List recent reports for a ticker without their full text.
+        
+        Same as get_reports_by_ticker but skips the report_text column, so
+        the large TEXT values are never read or sent.
+        
+        Args:
+            ticker: Stock ticker symbol
+            limit: Maximum number of reports to return
+        
+        Returns:
+            List of report summary dictionaries (no report_text)
+        """
+        try:
+            with self._conn(dictionary=True) as cursor:
+                cursor.execute(_LIST_REPORTS_BY_TICKER_SQL, (ticker.upper(), limit))
+                results = cursor.fetchall()
+            
+            for result in results:
+                result['report_id'] = id_from_bytes(result['report_id'])
+                if result.get('metadata'):
+                    result['metadata'] = decode_metadata(result['metadata'])
+            
+            return results
+            
+        except Error as e:
+            raise RuntimeError(f"Failed to list reports by ticker: {e}")
     
     def save_chunks(
         self,
@@ -233,40 +785,22 @@ class DatabaseManager:
                 - chunk_text: Text content
                 - section: Section name (optional)
                 - chunk_index: Index in report
-                - embedding: Embedding vector (list of floats)
+                - embedding: Embedding vector (list of floats or array)
+        
+        All batches are written in one transaction with a single commit.
         """
-        connection = None
+        if not chunks:
+            return
+        
+        # Build every row before taking a pooled connection
+        rows = _build_chunk_rows(id_to_bytes(report_id), chunks)
+        
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor()
-            
-            for chunk in chunks:
-                chunk_id = str(uuid.uuid4())
-                embedding_json = json.dumps(chunk.get('embedding')) if chunk.get('embedding') else None
-                
-                cursor.execute("""
-                    INSERT INTO report_chunks 
-                    (chunk_id, report_id, chunk_text, section, chunk_index, embedding)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
-                    chunk_id,
-                    report_id,
-                    chunk['chunk_text'],
-                    chunk.get('section'),
-                    chunk['chunk_index'],
-                    embedding_json
-                ))
-            
-            connection.commit()
+            with self._conn() as cursor:
+                _insert_chunk_rows(cursor, rows)
             
         except Error as e:
-            if connection:
-                connection.rollback()
             raise RuntimeError(f"Failed to save chunks: {e}")
-        finally:
-            if connection and connection.is_connected():
-                cursor.close()
-                connection.close()
     
     def get_chunks_by_report(
         self,
@@ -281,41 +815,95 @@ class DatabaseManager:
             include_embeddings: Whether to include embeddings in results
         
         Returns:
-            List of chunk dictionaries
+            List of chunk dictionaries (embeddings as float32 numpy arrays,
+            dequantized from int8 where stored that way)
         """
-        connection = None
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            if include_embeddings:
-                cursor.execute("""
-                    SELECT chunk_id, report_id, chunk_text, section, chunk_index, embedding, created_at
-                    FROM report_chunks
-                    WHERE report_id = %s
-                    ORDER BY chunk_index ASC
-                """, (report_id,))
-            else:
-                cursor.execute("""
-                    SELECT chunk_id, report_id, chunk_text, section, chunk_index, created_at
-                    FROM report_chunks
-                    WHERE report_id = %s
-                    ORDER BY chunk_index ASC
-                """, (report_id,))
+            with self._conn(dictionary=True) as cursor:
+                sql = _SELECT_CHUNKS_SQL if include_embeddings else _SELECT_CHUNKS_NO_EMBEDDINGS_SQL
+                cursor.execute(sql, (id_to_bytes(report_id),))
+                results = cursor.fetchall()
             
-            results = cursor.fetchall()
             for result in results:
-                if result.get('embedding'):
-                    result['embedding'] = json.loads(result['embedding'])
+                result['chunk_id'] = id_from_bytes(result['chunk_id'])
+                result['report_id'] = report_id
+                if include_embeddings:
+                    result['embedding'] = decode_embedding(
+                        result['embedding'], result.pop('embedding_dtype', 'float32')
+                    )
             
             return results
             
         except Error as e:
             raise RuntimeError(f"Failed to get chunks: {e}")
+    
+    def get_report_embeddings(self, report_id: str) -> Optional[Tuple[List[str], np.ndarray]]:
+        """
+        Retrieve a report's embeddings as one matrix.
+        
+        Args:
+            report_id: Report ID
+        
+        Returns:
+            (chunk ids in row order, (N, D) float32 matrix), or None for
+            reports saved without a matrix (use get_chunks_by_report)
+        """
+        try:
+            with self._conn() as cursor:
+                cursor.execute(_SELECT_REPORT_EMBEDDINGS_SQL, (id_to_bytes(report_id),))
+                row = cursor.fetchone()
+            
+        except Error as e:
+            raise RuntimeError(f"Failed to get report embeddings: {e}")
+        
+        if not row:
+            return None
+        chunk_count, dim, dtype, chunk_ids, data = row
+        chunk_ids = bytes(chunk_ids)
+        ids = [id_from_bytes(chunk_ids[i:i + 16]) for i in range(0, len(chunk_ids), 16)]
+        return ids, decode_embedding_matrix(data, chunk_count, dim, dtype)
+    
+    def iter_chunks_by_report(
+        self,
+        report_id: str,
+        include_embeddings: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream chunks for a report one row at a time.
+        
+        Uses an unbuffered cursor so rows (and their embeddings) are decoded
+        as they arrive instead of being held in the client buffer and a list
+        all at once. The connection stays checked out until the iterator is
+        exhausted or closed.
+        
+        Args:
+            report_id: Report ID
+            include_embeddings: Whether to include embeddings in results
+        
+        Yields:
+            Chunk dictionaries in chunk_index order
+        """
+        sql = _SELECT_CHUNKS_SQL if include_embeddings else _SELECT_CHUNKS_NO_EMBEDDINGS_SQL
+        connection = self.get_connection()
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        try:
+            cursor.execute(sql, (id_to_bytes(report_id),))
+            for row in cursor:
+                row['chunk_id'] = id_from_bytes(row['chunk_id'])
+                row['report_id'] = report_id
+                if include_embeddings:
+                    row['embedding'] = decode_embedding(
+                        row['embedding'], row.pop('embedding_dtype', 'float32')
+                    )
+                yield row
+        except Error as e:
+            raise RuntimeError(f"Failed to stream chunks: {e}")
         finally:
-            if connection and connection.is_connected():
-                cursor.close()
-                connection.close()
+            # Drain rows left unread by an early stop so the connection can be reused
+            if connection.unread_result:
+                connection.consume_results()
+            cursor.close()
+            connection.close()
     
     def delete_report(self, report_id: str):
         """
@@ -324,33 +912,55 @@ class DatabaseManager:
         Args:
             report_id: Report ID
         """
-        connection = None
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("DELETE FROM reports WHERE report_id = %s", (report_id,))
-            connection.commit()
+            with self._conn() as cursor:
+                cursor.execute(_DELETE_REPORT_SQL, (id_to_bytes(report_id),))
             
         except Error as e:
-            if connection:
-                connection.rollback()
             raise RuntimeError(f"Failed to delete report: {e}")
-        finally:
-            if connection and connection.is_connected():
-                cursor.close()
-                connection.close()
 
 
 # Global instance
 _db_manager: Optional[DatabaseManager] = None
+_db_manager_lock = threading.Lock()
 
 
 def get_database_manager() -> DatabaseManager:
     """Get or create global database manager instance."""
     global _db_manager
-    if _db_manager is None:
-        _db_manager = DatabaseManager()
-        _db_manager.init_schema()
+    with _db_manager_lock:
+        if _db_manager is None:
+            manager = DatabaseManager()
+            manager.init_schema()
+            _db_manager = manager
     return _db_manager
 
+
+def warm_database_manager() -> threading.Thread:
+    """
+    Create the pool and run schema setup in the background at process start.
+    
+    The pool opens all of its connections when created, so after this the
+    first report request doesn't pay connection setup and DDL latency.
+    Missing configuration is checked synchronously so a misconfigured deploy
+    fails at startup; connection failures while warming are logged and
+    retried lazily on first use.
+    
+    Returns:
+        The started daemon thread
+    
+    Raises:
+        ValueError: If the MySQL environment variables are missing
+    """
+    check_database_config()
+    
+    def _warm():
+        try:
+            get_database_manager()
+        except Exception as e:
+            print(f"Warning: Database warm-up failed: {e}")
+    
+    thread = threading.Thread(target=_warm, name="db-warmup", daemon=True)
+    thread.start()
+    return thread
+
@@ -0,0 +1,167 @@
+"""
+Content-addressed cache of chunk embeddings, kept in memory and in SQLite.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Opt-in: set EMBEDDING_CACHE_ENABLED=true to reuse embeddings of repeated chunks.
+# The SQLite file has no size limit; delete it to reclaim space.
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "false").lower() == "true"
+EMBEDDING_CACHE_PATH = Path(os.getenv(
+    "EMBEDDING_CACHE_PATH", str(Path.home() / ".cache" / "stock_ai" / "embeddings.sqlite3")
+)).expanduser()
+
+# Embeddings kept in memory in front of SQLite (~6 KB each at 1536 dims)
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000"))
+
+_CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS embeddings (
+        text_hash BLOB NOT NULL,
+        model TEXT NOT NULL,
+        embedding BLOB NOT NULL,
+        PRIMARY KEY (text_hash, model)
+    )
+"""
+
+
+def text_hash(text: str) -> bytes:
+    """Return the cache key digest for a chunk of text."""
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """Embeddings keyed by (text hash, model), so a model change never reuses stale vectors."""
+
+    def __init__(
+        self,
+        model: str,
+        path: Path = EMBEDDING_CACHE_PATH,
+        enabled: bool = EMBEDDING_CACHE_ENABLED
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            model: Embedding model name the cached vectors came from
+            path: SQLite file holding cached embeddings
+            enabled: When False, every lookup misses and nothing is stored
+        """
+        self.model = model
+        self.path = Path(path)
+        self.enabled = enabled
+        self._memory: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Open the SQLite file on first use; None if it can't be opened."""
+        if self._conn is None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self.path), check_same_thread=False)
+                conn.execute(_CREATE_TABLE_SQL)
+                conn.commit()
+                self._conn = conn
+            except (OSError, sqlite3.Error) as e:
+                print(f"Warning: Embedding cache disabled, could not open {self.path}: {e}")
+                self.enabled = False
+        return self._conn
+
+    def _remember(self, key: bytes, embedding: List[float]):
+        """Add an entry to the in-memory layer, evicting the oldest."""
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > EMBEDDING_CACHE_MAX_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def find_uncached_texts(self, texts: List[str]) -> Tuple[Dict[bytes, List[float]], List[str]]:
+        """
+        Split texts into cached embeddings and distinct texts still to embed.
+
+        Args:
+            texts: Texts to embed (may contain duplicates)
+
+        Returns:
+            (embeddings found, keyed by text hash; uncached texts, each listed once)
+        """
+        keys = [text_hash(text) for text in texts]
+        found: Dict[bytes, List[float]] = {}
+        missing: Dict[bytes, str] = {}
+
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in found or key in missing:
+                    continue
+                if self.enabled and key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                else:
+                    missing[key] = text
+
+            conn = self._connection() if self.enabled and missing else None
+            if conn is not None:
+                try:
+                    rows = []
+                    pending = list(missing)
+                    for start in range(0, len(pending), 500):
+                        batch = pending[start:start + 500]
+                        rows.extend(conn.execute(
+                            f"SELECT text_hash, embedding FROM embeddings "
+                            f"WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                            [self.model, *batch]
+                        ).fetchall())
+                except sqlite3.Error as e:
+                    print(f"Warning: Embedding cache lookup failed: {e}")
+                    rows = []
+                for key, data in rows:
+                    key = bytes(key)
+                    embedding = np.frombuffer(data, dtype=np.float32).tolist()
+                    found[key] = embedding
+                    self._remember(key, embedding)
+                    missing.pop(key, None)
+
+        return found, list(missing.values())
+
+    def store(self, texts: List[str], embeddings: List[List[float]]):
+        """
+        Cache freshly created embeddings.
+
+        Zero vectors (placeholders for failed requests) are not cached.
+
+        Args:
+            texts: Embedded texts
+            embeddings: Embedding for each text, in the same order
+        """
+        if not self.enabled:
+            return
+        rows = []
+        with self._lock:
+            for text, embedding in zip(texts, embeddings):
+                if embedding is None or not any(embedding):
+                    continue
+                key = text_hash(text)
+                self._remember(key, embedding)
+                rows.append((key, self.model, np.asarray(embedding, dtype=np.float32).tobytes()))
+
+            conn = self._connection() if rows else None
+            if conn is None:
+                return
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (text_hash, model, embedding) VALUES (?, ?, ?)",
+                    rows
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Warning: Failed to cache embeddings: {e}")
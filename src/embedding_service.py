@@ -2,13 +2,50 @@
 Embedding service for creating vector embeddings using OpenAI API.
 """
 
+import asyncio
 import os
+import threading
+import weakref
 from typing import List, Optional
 from dotenv import load_dotenv
+import httpx
 import openai
 
+from http_clients import get_async_client, run_async
+
 load_dotenv()
 
+# Maximum embedding batch requests in flight at once (keeps within OpenAI rate limits)
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "8"))
+
+# Texts per embeddings request (OpenAI accepts up to 2048, but large requests are slow)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "96"))
+
+# Timeout (seconds) for embedding HTTP requests
+EMBEDDING_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_TIMEOUT_SECONDS", "60.0"))
+
+# HTTP client shared by every EmbeddingService so keep-alive connections are reused
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Get or create the shared HTTP/2 keep-alive client for embedding requests.
+    
+    Falls back to HTTP/1.1 if the h2 package (httpx[http2]) isn't installed.
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            limits = httpx.Limits(max_connections=16, max_keepalive_connections=16)
+            timeout = httpx.Timeout(EMBEDDING_TIMEOUT_SECONDS)
+            try:
+                _http_client = httpx.Client(http2=True, limits=limits, timeout=timeout)
+            except ImportError:
+                _http_client = httpx.Client(limits=limits, timeout=timeout)
+        return _http_client
+
 
 class EmbeddingService:
     """Service for creating text embeddings using OpenAI."""
@@ -26,7 +63,13 @@ class EmbeddingService:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable.")
         
         self.model = model
-        self.client = openai.OpenAI(api_key=self.api_key)
+        self.client = openai.OpenAI(api_key=self.api_key, http_client=get_http_client())
+        # AsyncOpenAI clients per event loop, built on the shared async HTTP/2 pool
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, openai.AsyncOpenAI]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Dimension observed from a real response; overrides the lookup table
+        self._actual_dim: Optional[int] = None
     
     def create_embedding(self, text: str) -> List[float]:
         """
@@ -47,47 +90,112 @@ class EmbeddingService:
         except Exception as e:
             raise RuntimeError(f"Failed to create embedding: {e}")
     
-    def create_embeddings_batch(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
+    @property
+    def async_client(self) -> openai.AsyncOpenAI:
+        """AsyncOpenAI client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                timeout=httpx.Timeout(EMBEDDING_TIMEOUT_SECONDS),
+                http_client=get_async_client(),
+            )
+            self._async_clients[loop] = client
+        return client
+    
+    def create_embeddings_batch(
+        self,
+        texts: List[str],
+        batch_size: int = EMBEDDING_BATCH_SIZE
+    ) -> List[List[float]]:
         """
         Create embeddings for multiple texts in batches.
         
+        Blocking wrapper around async_create_embeddings_batch.
+        
         Args:
             texts: List of texts to embed
-            batch_size: Number of texts to process per batch (OpenAI limit is typically 2048)
+            batch_size: Number of texts to process per batch (OpenAI limit is 2048)
         
         Returns:
             List of embedding vectors
         """
-        embeddings = []
+        if not texts:
+            return []
+        return run_async(self.async_create_embeddings_batch(texts, batch_size))
+    
+    async def async_create_embeddings_batch(
+        self,
+        texts: List[str],
+        batch_size: int = EMBEDDING_BATCH_SIZE
+    ) -> List[List[float]]:
+        """
+        Create embeddings for multiple texts in batches.
         
-        # Process in batches
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            
-            try:
-                response = self.client.embeddings.create(
-                    model=self.model,
-                    input=batch
-                )
-                
-                # Extract embeddings from response
-                batch_embeddings = [item.embedding for item in response.data]
-                embeddings.extend(batch_embeddings)
-                
-            except Exception as e:
-                # If batch fails, try individual embeddings
-                print(f"Warning: Batch embedding failed, processing individually: {e}")
-                for text in batch:
-                    try:
-                        embedding = self.create_embedding(text)
-                        embeddings.append(embedding)
-                    except Exception as e2:
-                        print(f"Error embedding text: {e2}")
-                        # Add zero vector as placeholder
-                        embeddings.append([0.0] * 1536)  # text-embedding-3-small dimension
+        Batches are requested concurrently (at most EMBEDDING_MAX_CONCURRENCY
+        in flight); results keep the order of texts.
+        
+        Args:
+            texts: List of texts to embed
+            batch_size: Number of texts to process per batch (OpenAI limit is 2048)
+        
+        Returns:
+            List of embedding vectors
+        """
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        semaphore = asyncio.Semaphore(EMBEDDING_MAX_CONCURRENCY)
+        
+        async def embed(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._embed_batch(batch)
+        
+        # gather() returns results in submission order, so embeddings stay aligned with texts
+        embeddings: List[List[float]] = []
+        for batch_embeddings in await asyncio.gather(*(embed(batch) for batch in batches)):
+            embeddings.extend(batch_embeddings)
         
         return embeddings
     
+    async def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """
+        Embed one batch, falling back to per-text requests if the batch fails.
+        
+        Args:
+            batch: Texts to embed in a single request
+        
+        Returns:
+            Embedding vectors for the batch
+        """
+        try:
+            response = await self.async_client.embeddings.create(
+                model=self.model,
+                input=batch
+            )
+            
+            # Extract embeddings from response
+            batch_embeddings = [item.embedding for item in response.data]
+            if batch_embeddings and self._actual_dim is None:
+                self._actual_dim = len(batch_embeddings[0])
+            return batch_embeddings
+            
+        except Exception as e:
+            # If batch fails, try individual embeddings
+            print(f"Warning: Batch embedding failed, processing individually: {e}")
+            embeddings = []
+            for text in batch:
+                try:
+                    response = await self.async_client.embeddings.create(
+                        model=self.model,
+                        input=text
+                    )
+                    embeddings.append(response.data[0].embedding)
+                except Exception as e2:
+                    print(f"Error embedding text: {e2}")
+                    # Add zero vector as placeholder, sized to the model's output
+                    embeddings.append([0.0] * self.get_embedding_dimension())
+            return embeddings
+    
     def get_embedding_dimension(self) -> int:
         """
         Get the dimension of embeddings for the current model.
@@ -95,6 +203,9 @@ class EmbeddingService:
         Returns:
             Embedding dimension
         """
+        if self._actual_dim is not None:
+            return self._actual_dim
+        
         # Common dimensions for OpenAI models
         dimensions = {
             "text-embedding-ada-002": 1536,
@@ -0,0 +1,130 @@
+"""
+Shared async HTTP client for outbound API calls (Perplexity, Alpha Vantage MCP).
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Iterator, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Connection limits for the shared async client
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "64"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "32"))
+
+# Default timeout (seconds); callers may pass a tighter per-request timeout
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30.0"))
+
+# Connection attempts retried by the transport before a request fails
+HTTP_CONNECT_RETRIES = int(os.getenv("HTTP_CONNECT_RETRIES", "2"))
+
+# One client per event loop: pooled connections are bound to the loop that
+# opened them, and each Runner.run_sync / asyncio.run call has its own loop.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_async_clients_lock = threading.Lock()
+
+# Long-lived loop for blocking callers (see run_async)
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def _build_async_client() -> httpx.AsyncClient:
+    """Create an HTTP/2 keep-alive client, falling back to HTTP/1.1 without h2."""
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    )
+    timeout = httpx.Timeout(HTTP_TIMEOUT_SECONDS)
+    try:
+        transport = httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=HTTP_CONNECT_RETRIES)
+    except ImportError:
+        transport = httpx.AsyncHTTPTransport(limits=limits, retries=HTTP_CONNECT_RETRIES)
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Get the shared async HTTP client for the running event loop.
+
+    Every coroutine on the same loop shares one connection pool, so parallel
+    tool calls to the same host are multiplexed over one HTTP/2 connection.
+
+    Returns:
+        httpx.AsyncClient bound to the current event loop
+
+    Raises:
+        RuntimeError: If called outside a running event loop
+    """
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = _build_async_client()
+            _async_clients[loop] = client
+        return client
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Start the shared background event loop thread on first use."""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None or _background_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="async-http-loop", daemon=True
+            ).start()
+            _background_loop = loop
+        return _background_loop
+
+
+def run_async(coro: Awaitable[Any]) -> Any:
+    """
+    Run a coroutine on the shared background event loop and wait for it.
+    
+    Unlike asyncio.run, the loop outlives the call, so the loop's HTTP/2
+    client and its open connections are reused by every later call instead
+    of being rebuilt (and TLS-handshaken) per call. Concurrent callers share
+    the loop and its connection pool.
+    
+    Must not be called from the background loop itself.
+    
+    Args:
+        coro: Coroutine to run
+    
+    Returns:
+        The coroutine's result (its exception is re-raised)
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_background_loop()).result()
+
+
+def iterate_async(agen: AsyncIterator[Any]) -> Iterator[Any]:
+    """
+    Iterate an async generator from blocking code, on the shared background loop.
+    
+    Each item is handed over as soon as the generator yields it. If the caller
+    stops early, the generator is closed on the loop.
+    
+    Must not be called from the background loop itself.
+    
+    Args:
+        agen: Async generator to drain
+    
+    Yields:
+        The generator's items (its exception is re-raised)
+    """
+    loop = _get_background_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
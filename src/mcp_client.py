@@ -3,12 +3,195 @@ MCP client implementation for Alpha Vantage MCP server.
 Handles HTTP communication with the MCP server for tool discovery and execution.
 """
 
+import functools
+import itertools
 import json
-import time
-from typing import Dict, Any, List, Optional
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 
+import httpx
+
+from http_clients import get_async_client
+from response_cache import ToolResponseCache
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json works the same
+    orjson = None
+
+# Keep-alive pool and retry policy for the MCP server connection
+MCP_POOL_CONNECTIONS = int(os.getenv("MCP_POOL_CONNECTIONS", "8"))
+MCP_POOL_MAXSIZE = int(os.getenv("MCP_POOL_MAXSIZE", "32"))
+MCP_MAX_RETRIES = int(os.getenv("MCP_MAX_RETRIES", "3"))
+MCP_RETRY_BACKOFF_FACTOR = float(os.getenv("MCP_RETRY_BACKOFF_FACTOR", "0.5"))
+
+# Whether to ask the server for its tool list. "auto" skips the probe for
+# Alpha Vantage, whose tools are known (_STATIC_TOOLS).
+MCP_TOOLS_PROBE = os.getenv("MCP_TOOLS_PROBE", "auto").lower()
+# The probe is a single attempt with a short timeout (no retries/backoff)
+MCP_TOOLS_PROBE_TIMEOUT_SECONDS = float(os.getenv("MCP_TOOLS_PROBE_TIMEOUT_SECONDS", "5"))
+
+# Open (and TLS-handshake) a pooled connection when a client is created
+MCP_PRECONNECT = os.getenv("MCP_PRECONNECT", "true").lower() == "true"
+
+
+# Known Alpha Vantage MCP tools, used when the server doesn't answer tools/list.
+# Shared by every client; treat as read-only (copy before modifying a schema).
+_STATIC_TOOLS = (
+    {
+        "name": "OVERVIEW",
+        "description": "Get company overview and fundamental data",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "symbol": {
+                    "type": "string",
+                    "description": "Stock ticker symbol (e.g., AAPL, IBM)"
+                }
+            },
+            "required": ["symbol"]
+        }
+    },
+    {
+        "name": "INCOME_STATEMENT",
+        "description": "Get company income statement data",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "symbol": {
+                    "type": "string",
+                    "description": "Stock ticker symbol"
+                }
+            },
+            "required": ["symbol"]
+        }
+    },
+    {
+        "name": "BALANCE_SHEET",
+        "description": "Get company balance sheet data",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "symbol": {
+                    "type": "string",
+                    "description": "Stock ticker symbol"
+                }
+            },
+            "required": ["symbol"]
+        }
+    },
+    {
+        "name": "CASH_FLOW",
+        "description": "Get company cash flow statement data",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "symbol": {
+                    "type": "string",
+                    "description": "Stock ticker symbol"
+                }
+            },
+            "required": ["symbol"]
+        }
+    },
+    {
+        "name": "EARNINGS",
+        "description": "Get company earnings data",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "symbol": {
+                    "type": "string",
+                    "description": "Stock ticker symbol"
+                }
+            },
+            "required": ["symbol"]
+        }
+    },
+    {
+        "name": "NEWS_SENTIMENT",
+        "description": "Get news and sentiment analysis for a ticker",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "ticker": {
+                    "type": "string",
+                    "description": "Stock ticker symbol"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Number of news articles to return (default: 50)",
+                    "default": 50
+                }
+            },
+            "required": ["ticker"]
+        }
+    }
+)
+
+
+def _json_loads(data):
+    """Parse JSON from str or bytes (orjson.JSONDecodeError subclasses json's)."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _json_dumps(value: Any) -> bytes:
+    """Serialize a request body to JSON bytes."""
+    return orjson.dumps(value) if orjson is not None else json.dumps(value).encode()
+
+
+@dataclass(frozen=True)
+class MCPTool:
+    """An MCP tool with its OpenAI function definition built once."""
+    name: str
+    description: str
+    input_schema: Dict[str, Any]
+    openai_definition: Dict[str, Any]
+    
+    @classmethod
+    def from_dict(cls, tool: Dict[str, Any]) -> "MCPTool":
+        """Build from an MCP tools/list entry."""
+        name = tool.get("name", "")
+        description = tool.get("description", "")
+        input_schema = tool.get("inputSchema", {})
+        return cls(
+            name=name,
+            description=description,
+            input_schema=input_schema,
+            openai_definition={
+                "type": "function",
+                "function": {
+                    "name": name.lower(),  # Lowercase form used by TOOL_NAME_MAPPING
+                    "description": description,
+                    "parameters": input_schema,
+                },
+            },
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the MCP tools/list form."""
+        return {"name": self.name, "description": self.description, "inputSchema": self.input_schema}
+
+
+_STATIC_MCP_TOOLS = tuple(MCPTool.from_dict(tool) for tool in _STATIC_TOOLS)
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_symbol(symbol: str) -> str:
+    """Upper-case and intern a ticker symbol (tickers repeat across tool calls)."""
+    return sys.intern(symbol.upper())
+
+
+# JSON-RPC request ids (only need to be unique per client process)
+_rpc_ids = itertools.count(1)
+
 
 class MCPClient:
     """Client for communicating with Alpha Vantage MCP server via HTTP."""
@@ -23,12 +206,38 @@ class MCPClient:
         self.mcp_url = mcp_url
         self.base_url = self._extract_base_url(mcp_url)
         self.api_key = self._extract_api_key(mcp_url)
-        self.tools_cache: Optional[List[Dict[str, Any]]] = None
+        self.tools_cache: Optional[Sequence[Dict[str, Any]]] = None
+        # Structured view of tools_cache: (source list, MCPTool records)
+        self._structured_tools: Optional[Tuple[Sequence[Dict[str, Any]], Tuple[MCPTool, ...]]] = None
+        # Request URLs (with API key) by endpoint; the URL never changes per client
+        self._url_cache: Dict[str, str] = {}
+        self.response_cache = ToolResponseCache()
+        if MCP_TOOLS_PROBE == "auto":
+            self._probe_tools = "alphavantage" not in urlparse(mcp_url).netloc
+        else:
+            self._probe_tools = MCP_TOOLS_PROBE == "true"
         self.session = requests.Session()
         self.session.headers.update({
             "Content-Type": "application/json",
             "Accept": "application/json"
         })
+        # Reuse connections across tool calls; urllib3 handles retries and backoff
+        # (including Retry-After on 429s)
+        retry = Retry(
+            total=MCP_MAX_RETRIES,
+            backoff_factor=MCP_RETRY_BACKOFF_FACTOR,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST"]),
+            # Hand back the last response so raise_for_status() reports its status
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=MCP_POOL_CONNECTIONS,
+            pool_maxsize=MCP_POOL_MAXSIZE,
+            max_retries=retry,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
     
     def _extract_base_url(self, url: str) -> str:
         """Extract base URL without query parameters."""
@@ -44,19 +253,34 @@ class MCPClient:
             raise ValueError("API key not found in MCP URL")
         return api_key
     
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, retries: int = 3) -> Dict[str, Any]:
+    def list_tools_structured(self, force_refresh: bool = False) -> Tuple[MCPTool, ...]:
         """
-        Make HTTP request to MCP server.
+        Discover available tools as MCPTool records.
+        
+        Records (and their OpenAI definitions) are built once per tool list;
+        the static Alpha Vantage list is prebuilt at import.
         
         Args:
-            method: HTTP method (GET, POST)
-            endpoint: API endpoint
-            data: Request payload
-            retries: Number of retry attempts
+            force_refresh: Force refresh of cached tools
         
         Returns:
-            Response JSON data
+            Tuple of MCPTool
         """
+        tools = self.list_tools(force_refresh=force_refresh)
+        if tools is _STATIC_TOOLS:
+            return _STATIC_MCP_TOOLS
+        cached = self._structured_tools
+        if cached is None or cached[0] is not tools:
+            cached = (tools, tuple(MCPTool.from_dict(tool) for tool in tools))
+            self._structured_tools = cached
+        return cached[1]
+    
+    def _request_url(self, endpoint: str) -> str:
+        """Return the request URL for an endpoint with the API key attached."""
+        url = self._url_cache.get(endpoint)
+        if url is not None:
+            return url
+        
         url = f"{self.base_url}/{endpoint.lstrip('/')}" if endpoint else self.base_url
         
         # Add API key to query params
@@ -65,27 +289,42 @@ class MCPClient:
         query_params["apikey"] = [self.api_key]
         new_query = urlencode(query_params, doseq=True)
         url = urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, new_query, parsed.fragment))
+        self._url_cache[endpoint] = url
+        return url
+    
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Make HTTP request to MCP server.
+        
+        Transient failures are retried by the session's HTTPAdapter.
         
-        for attempt in range(retries):
-            try:
-                if method.upper() == "GET":
-                    response = self.session.get(url, timeout=30)
-                elif method.upper() == "POST":
-                    response = self.session.post(url, json=data, timeout=30)
-                else:
-                    raise ValueError(f"Unsupported HTTP method: {method}")
-                
-                response.raise_for_status()
-                return response.json()
-                
-            except requests.exceptions.RequestException as e:
-                if attempt < retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff
-                    time.sleep(wait_time)
-                    continue
-                raise RuntimeError(f"MCP request failed after {retries} attempts: {str(e)}")
+        Args:
+            method: HTTP method (GET, POST)
+            endpoint: API endpoint
+            data: Request payload
+        
+        Returns:
+            Response JSON data
+        """
+        url = self._request_url(endpoint)
+        
+        try:
+            if method.upper() == "GET":
+                response = self.session.get(url, timeout=30)
+            elif method.upper() == "POST":
+                body = _json_dumps(data) if data is not None else None
+                response = self.session.post(url, data=body, timeout=30)
+            else:
+                raise ValueError(f"Unsupported HTTP method: {method}")
+            
+            response.raise_for_status()
+            # Parse the raw bytes directly instead of decoding to str first
+            return _json_loads(response.content)
+            
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"MCP request failed after {MCP_MAX_RETRIES + 1} attempts: {str(e)}")
     
-    def list_tools(self, force_refresh: bool = False) -> List[Dict[str, Any]]:
+    def list_tools(self, force_refresh: bool = False) -> Sequence[Dict[str, Any]]:
         """
         Discover available tools from MCP server.
         
@@ -99,171 +338,151 @@ class MCPClient:
             return self.tools_cache
         
         try:
-            # MCP protocol: tools/list endpoint
-            # For Alpha Vantage, we'll try different approaches
-            # First, try the standard MCP tools/list endpoint
-            try:
-                response = self._make_request("POST", "", data={
-                    "jsonrpc": "2.0",
-                    "method": "tools/list",
-                    "id": 1
-                })
-                
-                if "result" in response and "tools" in response["result"]:
-                    self.tools_cache = response["result"]["tools"]
-                    return self.tools_cache
-            except Exception:
-                pass
+            # MCP protocol: tools/list endpoint (one attempt, bypassing the
+            # retrying session so an unsupported endpoint fails fast)
+            if self._probe_tools:
+                try:
+                    response = requests.post(
+                        self._request_url(""),
+                        data=_json_dumps({
+                            "jsonrpc": "2.0",
+                            "method": "tools/list",
+                            "id": next(_rpc_ids)
+                        }),
+                        headers=self.session.headers,
+                        timeout=MCP_TOOLS_PROBE_TIMEOUT_SECONDS,
+                    )
+                    response.raise_for_status()
+                    response = _json_loads(response.content)
+                    
+                    if "result" in response and "tools" in response["result"]:
+                        self.tools_cache = response["result"]["tools"]
+                        return self.tools_cache
+                except Exception:
+                    pass
             
             # Fallback: Use known Alpha Vantage MCP tools
             # Based on Alpha Vantage API documentation
-            self.tools_cache = [
-                {
-                    "name": "OVERVIEW",
-                    "description": "Get company overview and fundamental data",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "symbol": {
-                                "type": "string",
-                                "description": "Stock ticker symbol (e.g., AAPL, IBM)"
-                            }
-                        },
-                        "required": ["symbol"]
-                    }
-                },
-                {
-                    "name": "INCOME_STATEMENT",
-                    "description": "Get company income statement data",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "symbol": {
-                                "type": "string",
-                                "description": "Stock ticker symbol"
-                            }
-                        },
-                        "required": ["symbol"]
-                    }
-                },
-                {
-                    "name": "BALANCE_SHEET",
-                    "description": "Get company balance sheet data",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "symbol": {
-                                "type": "string",
-                                "description": "Stock ticker symbol"
-                            }
-                        },
-                        "required": ["symbol"]
-                    }
-                },
-                {
-                    "name": "CASH_FLOW",
-                    "description": "Get company cash flow statement data",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "symbol": {
-                                "type": "string",
-                                "description": "Stock ticker symbol"
-                            }
-                        },
-                        "required": ["symbol"]
-                    }
-                },
-                {
-                    "name": "EARNINGS",
-                    "description": "Get company earnings data",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "symbol": {
-                                "type": "string",
-                                "description": "Stock ticker symbol"
-                            }
-                        },
-                        "required": ["symbol"]
-                    }
-                },
-                {
-                    "name": "NEWS_SENTIMENT",
-                    "description": "Get news and sentiment analysis for a ticker",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "ticker": {
-                                "type": "string",
-                                "description": "Stock ticker symbol"
-                            },
-                            "limit": {
-                                "type": "integer",
-                                "description": "Number of news articles to return (default: 50)",
-                                "default": 50
-                            }
-                        },
-                        "required": ["ticker"]
-                    }
-                }
-            ]
+            self.tools_cache = _STATIC_TOOLS
             
             return self.tools_cache
             
         except Exception as e:
             raise RuntimeError(f"Failed to list MCP tools: {str(e)}")
     
-    def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    def call_tool(self, tool_name: str, arguments: Dict[str, Any], force_refresh: bool = False) -> Dict[str, Any]:
         """
-        Execute an MCP tool.
+        Execute an MCP tool, serving recent responses from the disk cache.
         
         Args:
             tool_name: Name of the tool to call
             arguments: Tool arguments
+            force_refresh: Skip the cache and call the server
         
         Returns:
             Tool execution result
         """
+        if not force_refresh:
+            cached = self.response_cache.get(tool_name, arguments)
+            if cached is not None:
+                return cached
         try:
-            # MCP protocol: tools/call endpoint
-            request_data = {
-                "jsonrpc": "2.0",
-                "method": "tools/call",
-                "params": {
-                    "name": tool_name,
-                    "arguments": arguments
-                },
-                "id": int(time.time() * 1000)  # Unique ID
-            }
-            
-            response = self._make_request("POST", "", data=request_data)
-            
-            # Handle MCP response format
-            if "result" in response:
-                result = response["result"]
-                if isinstance(result, dict) and "content" in result:
-                    # MCP content format
-                    content = result["content"]
-                    if isinstance(content, list) and len(content) > 0:
-                        # Extract text content
-                        text_content = content[0].get("text", "") if isinstance(content[0], dict) else str(content[0])
-                        # Try to parse as JSON if possible
-                        try:
-                            return json.loads(text_content)
-                        except json.JSONDecodeError:
-                            return {"raw": text_content}
-                    return result
-                return result
-            elif "error" in response:
-                error = response["error"]
-                raise RuntimeError(f"MCP tool error: {error.get('message', 'Unknown error')}")
-            else:
-                # Direct response (Alpha Vantage API format)
-                return response
-                
+            response = self._make_request("POST", "", data=self._tool_call_payload(tool_name, arguments))
+            result = self._parse_tool_response(response)
         except requests.exceptions.RequestException as e:
             raise RuntimeError(f"Failed to call MCP tool {tool_name}: {str(e)}")
+        self.response_cache.set(tool_name, arguments, result)
+        return result
+    
+    async def async_call_tool(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        force_refresh: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Execute an MCP tool on the shared async HTTP/2 client.
+        
+        Concurrent calls from the same event loop share one connection.
+        Recent responses are served from the disk cache.
+        
+        Args:
+            tool_name: Name of the tool to call
+            arguments: Tool arguments
+            force_refresh: Skip the cache and call the server
+        
+        Returns:
+            Tool execution result
+        """
+        if not force_refresh:
+            cached = self.response_cache.get(tool_name, arguments)
+            if cached is not None:
+                return cached
+        try:
+            response = await get_async_client().post(
+                self._request_url(""),
+                content=_json_dumps(self._tool_call_payload(tool_name, arguments)),
+                headers=self.session.headers,
+                timeout=30,
+            )
+            response.raise_for_status()
+            result = self._parse_tool_response(_json_loads(response.content))
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"Failed to call MCP tool {tool_name}: {str(e)}")
+        self.response_cache.set(tool_name, arguments, result)
+        return result
+    
+    def _tool_call_payload(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the JSON-RPC tools/call request body."""
+        return {
+            "jsonrpc": "2.0",
+            "method": "tools/call",
+            "params": {
+                "name": tool_name,
+                "arguments": arguments
+            },
+            "id": next(_rpc_ids)
+        }
+    
+    def _parse_tool_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Unwrap an MCP tools/call response into the tool's result."""
+        # Handle MCP response format
+        if "result" in response:
+            result = response["result"]
+            if isinstance(result, dict) and "content" in result:
+                # MCP content format
+                content = result["content"]
+                if isinstance(content, list) and len(content) > 0:
+                    # Extract text content
+                    text_content = content[0].get("text", "") if isinstance(content[0], dict) else str(content[0])
+                    # Try to parse as JSON if possible
+                    try:
+                        return _json_loads(text_content)
+                    except json.JSONDecodeError:
+                        return {"raw": text_content}
+                return result
+            return result
+        elif "error" in response:
+            error = response["error"]
+            raise RuntimeError(f"MCP tool error: {error.get('message', 'Unknown error')}")
+        else:
+            # Direct response (Alpha Vantage API format)
+            return response
+    
+    def warm(self, timeout: float = 2.0):
+        """
+        Open a keep-alive connection to the server ahead of the first tool call.
+        
+        Sends a HEAD request so the TCP/TLS handshake happens now and the
+        connection is left in the session's pool. Failures are ignored.
+        
+        Args:
+            timeout: Seconds to wait for the server
+        """
+        try:
+            self.session.head(self.base_url, timeout=timeout)
+        except requests.exceptions.RequestException:
+            pass
     
     def test_connection(self) -> bool:
         """
@@ -280,17 +499,21 @@ class MCPClient:
             return False
 
 
-def create_mcp_client(mcp_url: str) -> MCPClient:
+def create_mcp_client(mcp_url: str, warm: bool = MCP_PRECONNECT) -> MCPClient:
     """
     Create a new MCP client instance.
     
     Args:
         mcp_url: MCP server URL with API key
+        warm: Pre-open a connection on a background thread
     
     Returns:
         MCPClient instance
     """
-    return MCPClient(mcp_url)
+    client = MCPClient(mcp_url)
+    if warm:
+        threading.Thread(target=client.warm, name="mcp-preconnect", daemon=True).start()
+    return client
 
 
 
@@ -2,57 +2,51 @@
 MCP server connection and management for Alpha Vantage.
 """
 
+import asyncio
+import functools
 import json
 import os
+from dataclasses import dataclass
 from typing import Optional, Dict, Any, List
 from pathlib import Path
 
-from src.mcp_client import MCPClient, create_mcp_client
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json works the same
+    orjson = None
+
+from http_clients import run_async
+from src.mcp_client import MCPClient, create_mcp_client, normalize_symbol
 # or, if you prefer absolute inside the package:
 # from src.mcp_client import MCPClient, create_mcp_client
 
 
-class MCPManager:
-    """Manages connection to Alpha Vantage MCP server."""
+# Alpha Vantage endpoints that make up a company's fundamentals
+FUNDAMENTALS_TOOLS = ("OVERVIEW", "INCOME_STATEMENT", "BALANCE_SHEET", "CASH_FLOW", "EARNINGS")
+
+
+@dataclass(frozen=True)
+class AlphaVantageServerConfig:
+    """The Alpha Vantage entry of mcp.json, validated once at load."""
+    type: str
+    url: str
     
-    def __init__(self, mcp_config_path: Optional[str] = None):
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "AlphaVantageServerConfig":
         """
-        Initialize MCP manager.
+        Parse and validate the Alpha Vantage server entry.
+        
+        The API key is taken from ALPHA_VANTAGE_API_KEY when the configured
+        URL doesn't carry one.
         
         Args:
-            mcp_config_path: Path to mcp.json file. If None, looks for mcp.json in project root.
-        """
-        if mcp_config_path is None:
-            project_root = Path(__file__).parent.parent
-            mcp_config_path = project_root / "mcp.json"
+            config: Parsed mcp.json contents
         
-        self.mcp_config_path = Path(mcp_config_path)
-        self.config = self._load_config()
-        self.mcp_url = self._get_mcp_url()
-        self.mcp_client: Optional[MCPClient] = None
-    
-    def _load_config(self) -> Dict[str, Any]:
-        """Load MCP configuration from JSON file."""
-        try:
-            if not self.mcp_config_path.exists():
-                raise FileNotFoundError(
-                    f"MCP config file not found: {self.mcp_config_path}. "
-                    f"Please copy mcp.json.example to mcp.json and configure it."
-                )
-            
-            with open(self.mcp_config_path, 'r') as f:
-                config = json.load(f)
-            
-            return config
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in MCP config: {e}")
-        except Exception as e:
-            raise RuntimeError(f"Failed to load MCP config: {e}")
-    
-    def _get_mcp_url(self) -> str:
-        """Extract MCP server URL from configuration."""
+        Returns:
+            AlphaVantageServerConfig with a URL that includes the API key
+        """
         try:
-            servers = self.config.get("servers", {})
+            servers = config.get("servers", {})
             alphavantage_config = servers.get("alphavantage", {})
             
             if not alphavantage_config:
@@ -81,9 +75,48 @@ class MCPManager:
                         "Either include it in mcp.json URL or set ALPHA_VANTAGE_API_KEY environment variable."
                     )
             
-            return url
+            return cls(type=server_type, url=url)
         except Exception as e:
             raise RuntimeError(f"Failed to get MCP URL: {e}")
+
+
+class MCPManager:
+    """Manages connection to Alpha Vantage MCP server."""
+    
+    def __init__(self, mcp_config_path: Optional[str] = None):
+        """
+        Initialize MCP manager.
+        
+        Args:
+            mcp_config_path: Path to mcp.json file. If None, looks for mcp.json in project root.
+        """
+        if mcp_config_path is None:
+            project_root = Path(__file__).parent.parent
+            mcp_config_path = project_root / "mcp.json"
+        
+        self.mcp_config_path = Path(mcp_config_path)
+        self.config = self._load_config()
+        self.server_config = AlphaVantageServerConfig.from_config(self.config)
+        self.mcp_url = self.server_config.url
+        self.mcp_client: Optional[MCPClient] = None
+    
+    def _load_config(self) -> Dict[str, Any]:
+        """Load MCP configuration from JSON file."""
+        try:
+            if not self.mcp_config_path.exists():
+                raise FileNotFoundError(
+                    f"MCP config file not found: {self.mcp_config_path}. "
+                    f"Please copy mcp.json.example to mcp.json and configure it."
+                )
+            
+            raw = self.mcp_config_path.read_bytes()
+            config = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            
+            return config
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in MCP config: {e}")
+        except Exception as e:
+            raise RuntimeError(f"Failed to load MCP config: {e}")
     
     def get_mcp_client(self) -> MCPClient:
         """
@@ -131,8 +164,8 @@ class MCPManager:
             Dictionary with MCP server configuration
         """
         return {
-            "type": "http",
-            "url": self.mcp_url,
+            "type": self.server_config.type,
+            "url": self.server_config.url,
             "label": "Alpha Vantage MCP Server",
             "description": "Financial market data and technical indicators from Alpha Vantage"
         }
@@ -154,28 +187,72 @@ class MCPManager:
     # Convenience methods for common operations
     def get_company_overview(self, symbol: str) -> Dict[str, Any]:
         """Get company overview data."""
-        return self.call_tool("OVERVIEW", {"symbol": symbol.upper()})
+        return self.call_tool("OVERVIEW", {"symbol": normalize_symbol(symbol)})
     
     def get_income_statement(self, symbol: str) -> Dict[str, Any]:
         """Get income statement data."""
-        return self.call_tool("INCOME_STATEMENT", {"symbol": symbol.upper()})
+        return self.call_tool("INCOME_STATEMENT", {"symbol": normalize_symbol(symbol)})
     
     def get_balance_sheet(self, symbol: str) -> Dict[str, Any]:
         """Get balance sheet data."""
-        return self.call_tool("BALANCE_SHEET", {"symbol": symbol.upper()})
+        return self.call_tool("BALANCE_SHEET", {"symbol": normalize_symbol(symbol)})
     
     def get_earnings(self, symbol: str) -> Dict[str, Any]:
         """Get earnings data."""
-        return self.call_tool("EARNINGS", {"symbol": symbol.upper()})
+        return self.call_tool("EARNINGS", {"symbol": normalize_symbol(symbol)})
     
     def get_news_sentiment(self, ticker: str, limit: int = 50) -> Dict[str, Any]:
         """Get news and sentiment data."""
-        return self.call_tool("NEWS_SENTIMENT", {"ticker": ticker.upper(), "limit": limit})
+        return self.call_tool("NEWS_SENTIMENT", {"ticker": normalize_symbol(ticker), "limit": limit})
+    
+    async def async_fetch_fundamentals(self, symbol: str) -> Dict[str, Any]:
+        """
+        Fetch every fundamentals endpoint for a symbol concurrently.
+        
+        A failing endpoint is reported as {"error": ...} instead of failing
+        the whole batch.
+        
+        Args:
+            symbol: Stock ticker symbol
+        
+        Returns:
+            Dictionary mapping tool name (OVERVIEW, INCOME_STATEMENT, ...) to its result
+        """
+        client = self.get_mcp_client()
+        arguments = {"symbol": normalize_symbol(symbol)}
+        results = await asyncio.gather(
+            *(client.async_call_tool(name, arguments) for name in FUNDAMENTALS_TOOLS),
+            return_exceptions=True,
+        )
+        return {
+            name: {"error": str(result)} if isinstance(result, Exception) else result
+            for name, result in zip(FUNDAMENTALS_TOOLS, results)
+        }
+    
+    def fetch_fundamentals(self, symbol: str) -> Dict[str, Any]:
+        """
+        Synchronous wrapper around async_fetch_fundamentals().
+        
+        Runs on the shared background loop, so its HTTP/2 client and
+        connections are reused rather than rebuilt (and leaked) per call.
+        Must not be called from the background loop itself.
+        
+        Args:
+            symbol: Stock ticker symbol
+        
+        Returns:
+            Dictionary mapping tool name to its result
+        """
+        return run_async(self.async_fetch_fundamentals(symbol))
 
 
+@functools.lru_cache(maxsize=1)
 def get_mcp_manager() -> MCPManager:
     """
-    Get a configured MCP manager instance.
+    Get the shared MCP manager instance.
+    
+    mcp.json and the API key are read once per process; call
+    get_mcp_manager.cache_clear() after changing them.
     
     Returns:
         Configured MCPManager instance
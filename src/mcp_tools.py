@@ -3,8 +3,9 @@ MCP tool wrappers for Alpha Vantage tools.
 Provides Python functions that wrap MCP tool calls and OpenAI function definitions.
 """
 
+import functools
 from typing import Dict, Any, List, Optional
-from mcp_client import MCPClient
+from mcp_client import MCPClient, normalize_symbol
 
 
 def get_openai_function_definitions(mcp_client: MCPClient) -> List[Dict[str, Any]]:
@@ -17,27 +18,7 @@ def get_openai_function_definitions(mcp_client: MCPClient) -> List[Dict[str, Any
     Returns:
         List of OpenAI function definitions
     """
-    tools = mcp_client.list_tools()
-    function_definitions = []
-    
-    for tool in tools:
-        tool_name = tool.get("name", "")
-        description = tool.get("description", "")
-        input_schema = tool.get("inputSchema", {})
-        
-        # Convert MCP input schema to OpenAI function format
-        function_def = {
-            "type": "function",
-            "function": {
-                "name": tool_name.lower().replace("_", "_"),  # Keep original name
-                "description": description,
-                "parameters": input_schema
-            }
-        }
-        
-        function_definitions.append(function_def)
-    
-    return function_definitions
+    return [tool.openai_definition for tool in mcp_client.list_tools_structured()]
 
 
 def call_mcp_tool(mcp_client: MCPClient, tool_name: str, **kwargs) -> Dict[str, Any]:
@@ -57,79 +38,27 @@ def call_mcp_tool(mcp_client: MCPClient, tool_name: str, **kwargs) -> Dict[str,
 
 # Specific tool wrapper functions for common operations
 
-def get_company_overview(mcp_client: MCPClient, symbol: str) -> Dict[str, Any]:
-    """
-    Get company overview and fundamental data.
-    
-    Args:
-        mcp_client: MCP client instance
-        symbol: Stock ticker symbol
-    
-    Returns:
-        Company overview data
-    """
-    result = mcp_client.call_tool("OVERVIEW", {"symbol": symbol.upper()})
-    return result
-
-
-def get_income_statement(mcp_client: MCPClient, symbol: str) -> Dict[str, Any]:
-    """
-    Get company income statement data.
-    
-    Args:
-        mcp_client: MCP client instance
-        symbol: Stock ticker symbol
-    
-    Returns:
-        Income statement data
-    """
-    result = mcp_client.call_tool("INCOME_STATEMENT", {"symbol": symbol.upper()})
-    return result
-
-
-def get_balance_sheet(mcp_client: MCPClient, symbol: str) -> Dict[str, Any]:
-    """
-    Get company balance sheet data.
-    
-    Args:
-        mcp_client: MCP client instance
-        symbol: Stock ticker symbol
-    
-    Returns:
-        Balance sheet data
-    """
-    result = mcp_client.call_tool("BALANCE_SHEET", {"symbol": symbol.upper()})
-    return result
-
-
-def get_cash_flow(mcp_client: MCPClient, symbol: str) -> Dict[str, Any]:
+def _call_symbol_tool(tool_name: str, mcp_client: MCPClient, symbol: str) -> Dict[str, Any]:
     """
-    Get company cash flow statement data.
+    Call an Alpha Vantage tool that takes a single "symbol" argument.
     
     Args:
+        tool_name: MCP tool name
         mcp_client: MCP client instance
         symbol: Stock ticker symbol
     
     Returns:
-        Cash flow statement data
+        Tool result data
     """
-    result = mcp_client.call_tool("CASH_FLOW", {"symbol": symbol.upper()})
-    return result
+    return mcp_client.call_tool(tool_name, {"symbol": normalize_symbol(symbol)})
 
 
-def get_earnings(mcp_client: MCPClient, symbol: str) -> Dict[str, Any]:
-    """
-    Get company earnings data.
-    
-    Args:
-        mcp_client: MCP client instance
-        symbol: Stock ticker symbol
-    
-    Returns:
-        Earnings data
-    """
-    result = mcp_client.call_tool("EARNINGS", {"symbol": symbol.upper()})
-    return result
+# get_*(mcp_client, symbol): company overview, financial statements, and earnings
+get_company_overview = functools.partial(_call_symbol_tool, "OVERVIEW")
+get_income_statement = functools.partial(_call_symbol_tool, "INCOME_STATEMENT")
+get_balance_sheet = functools.partial(_call_symbol_tool, "BALANCE_SHEET")
+get_cash_flow = functools.partial(_call_symbol_tool, "CASH_FLOW")
+get_earnings = functools.partial(_call_symbol_tool, "EARNINGS")
 
 
 def get_news_sentiment(mcp_client: MCPClient, ticker: str, limit: int = 50) -> Dict[str, Any]:
@@ -144,7 +73,7 @@ def get_news_sentiment(mcp_client: MCPClient, ticker: str, limit: int = 50) -> D
     Returns:
         News and sentiment data
     """
-    result = mcp_client.call_tool("NEWS_SENTIMENT", {"ticker": ticker.upper(), "limit": limit})
+    result = mcp_client.call_tool("NEWS_SENTIMENT", {"ticker": normalize_symbol(ticker), "limit": limit})
     return result
 
 
@@ -159,6 +88,28 @@ TOOL_NAME_MAPPING = {
 }
 
 
+# Returned by a dispatch entry when its required argument is missing
+_NO_MATCH = object()
+
+
+def _symbol_tool(wrapper):
+    """Dispatch entry for a wrapper that takes a "symbol" argument."""
+    return lambda client, args: wrapper(client, args["symbol"]) if "symbol" in args else _NO_MATCH
+
+
+# OpenAI function name -> typed wrapper, looked up once per call
+_DISPATCH = {
+    "overview": _symbol_tool(get_company_overview),
+    "income_statement": _symbol_tool(get_income_statement),
+    "balance_sheet": _symbol_tool(get_balance_sheet),
+    "cash_flow": _symbol_tool(get_cash_flow),
+    "earnings": _symbol_tool(get_earnings),
+    "news_sentiment": lambda client, args: (
+        get_news_sentiment(client, args["ticker"], args.get("limit", 50)) if "ticker" in args else _NO_MATCH
+    ),
+}
+
+
 def execute_tool_by_name(mcp_client: MCPClient, function_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
     """
     Execute an MCP tool by OpenAI function name.
@@ -171,29 +122,12 @@ def execute_tool_by_name(mcp_client: MCPClient, function_name: str, arguments: D
     Returns:
         Tool execution result
     """
-    # Map OpenAI function name to MCP tool name
-    mcp_tool_name = TOOL_NAME_MAPPING.get(function_name.lower(), function_name.upper())
+    handler = _DISPATCH.get(function_name.lower())
+    if handler is not None:
+        result = handler(mcp_client, arguments)
+        if result is not _NO_MATCH:
+            return result
     
-    # Handle special cases
-    if mcp_tool_name == "OVERVIEW" and "symbol" in arguments:
-        return get_company_overview(mcp_client, arguments["symbol"])
-    elif mcp_tool_name == "INCOME_STATEMENT" and "symbol" in arguments:
-        return get_income_statement(mcp_client, arguments["symbol"])
-    elif mcp_tool_name == "BALANCE_SHEET" and "symbol" in arguments:
-        return get_balance_sheet(mcp_client, arguments["symbol"])
-    elif mcp_tool_name == "CASH_FLOW" and "symbol" in arguments:
-        return get_cash_flow(mcp_client, arguments["symbol"])
-    elif mcp_tool_name == "EARNINGS" and "symbol" in arguments:
-        return get_earnings(mcp_client, arguments["symbol"])
-    elif mcp_tool_name == "NEWS_SENTIMENT" and "ticker" in arguments:
-        limit = arguments.get("limit", 50)
-        return get_news_sentiment(mcp_client, arguments["ticker"], limit)
-    else:
-        # Generic tool call
-        return mcp_client.call_tool(mcp_tool_name, arguments)
-
-
-
-
-
-
+    # Generic tool call
+    mcp_tool_name = TOOL_NAME_MAPPING.get(function_name.lower(), function_name.upper())
+    return mcp_client.call_tool(mcp_tool_name, arguments)
@@ -4,12 +4,22 @@ Perplexity Sonar API client for real-time web research.
 
 import os
 import asyncio
+import functools
+import json
+import weakref
 from typing import Optional
 
 import httpx
 from openai import AsyncOpenAI, APIConnectionError, APITimeoutError
 from dotenv import load_dotenv
 
+from http_clients import get_async_client
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json works the same
+    orjson = None
+
 # Load environment variables
 load_dotenv()
 
@@ -45,13 +55,26 @@ class PerplexityClient:
                 "Set PERPLEXITY_API_KEY environment variable or pass api_key parameter."
             )
         
-        # Initialize AsyncOpenAI client with Perplexity base URL and timeout
-        self.client = AsyncOpenAI(
-            api_key=self.api_key,
-            base_url="https://api.perplexity.ai",
-            timeout=httpx.Timeout(PERPLEXITY_TIMEOUT_SECONDS),
+        # AsyncOpenAI clients per event loop, built on the shared HTTP/2 pool
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = (
+            weakref.WeakKeyDictionary()
         )
     
+    @property
+    def client(self) -> AsyncOpenAI:
+        """AsyncOpenAI client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url="https://api.perplexity.ai",
+                timeout=httpx.Timeout(PERPLEXITY_TIMEOUT_SECONDS),
+                http_client=get_async_client(),
+            )
+            self._clients[loop] = client
+        return client
+    
     async def research(
         self,
         query: str,
@@ -84,13 +107,17 @@ class PerplexityClient:
         messages.append({"role": "user", "content": query})
         
         try:
-            response = await self.client.chat.completions.create(
+            # Parse the raw body ourselves rather than building the typed
+            # response model (citation-heavy answers make that costly)
+            raw = await self.client.chat.completions.with_raw_response.create(
                 model=self.model,
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens
             )
-            return response.choices[0].message.content or ""
+            body = raw.http_response.content
+            data = orjson.loads(body) if orjson is not None else json.loads(body)
+            return data["choices"][0]["message"].get("content") or ""
         except (APITimeoutError, APIConnectionError, asyncio.TimeoutError) as e:
             return (
                 f"[Perplexity timeout] Research request exceeded "
@@ -112,5 +139,20 @@ def create_perplexity_client(api_key: Optional[str] = None, model: Optional[str]
         PerplexityClient instance
     """
     return PerplexityClient(api_key=api_key, model=model or "sonar")
+
+
+@functools.lru_cache(maxsize=1)
+def get_perplexity_client() -> PerplexityClient:
+    """
+    Get the shared Perplexity client instance.
+    
+    PERPLEXITY_API_KEY and PERPLEXITY_MODEL are read once per process; call
+    get_perplexity_client.cache_clear() after changing them.
     
-    
\ No newline at end of file
+    Returns:
+        Configured PerplexityClient instance
+    
+    Raises:
+        ValueError: If PERPLEXITY_API_KEY is not set (not cached, so a later call retries)
+    """
+    return PerplexityClient()
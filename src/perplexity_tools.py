@@ -5,7 +5,8 @@ Provides function definitions and execution handlers for Perplexity Sonar API.
 
 import os
 import asyncio
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
 
 from src.perplexity_client import PerplexityClient
 
@@ -14,6 +15,64 @@ PERPLEXITY_TOOL_TIMEOUT_SECONDS = float(
     os.getenv("PERPLEXITY_TOOL_TIMEOUT_SECONDS", "10.0")
 )
 
+# Query prefix and system message per research focus, built once at import
+_FOCUS_PREFIXES: Mapping[str, str] = MappingProxyType({
+    "news": "Recent news and events: ",
+    "analysis": "Expert analysis and opinions: ",
+    "financial": "Financial market context: ",
+    "general": ""
+})
+_SYSTEM_MESSAGES: Mapping[str, str] = MappingProxyType({
+    "news": "You are a financial news research assistant. Provide recent news, events, and developments with sources.",
+    "analysis": "You are a financial analysis assistant. Provide expert opinions, market analysis, and insights with sources.",
+    "financial": "You are a financial market research assistant. Provide financial context, market trends, and economic factors with sources.",
+    "general": "You are a helpful research assistant that provides accurate, cited information."
+})
+
+# Function definition is pure data; built once and shared (treat as read-only)
+_PERPLEXITY_RESEARCH_FUNCTION: Dict[str, Any] = {
+    "type": "function",
+    "function": {
+        "name": "perplexity_research",
+        "description": (
+            "Perform real-time web research on a topic using Perplexity's Sonar API. "
+            "Use this for finding recent news, market analysis, company developments, "
+            "industry trends, and other information not available in structured financial data. "
+            "Returns comprehensive, cited research results with sources. "
+            "Use this tool when you need current information, news, expert opinions, "
+            "or qualitative analysis that complements the structured financial data from Alpha Vantage tools."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": (
+                        "Research query or question to investigate. "
+                        "Be specific and include context (e.g., company name, ticker symbol, time period). "
+                        "Examples: 'Recent Apple Inc news and market sentiment', "
+                        "'TSLA stock analysis and analyst opinions', "
+                        "'Technology sector trends affecting semiconductor stocks'"
+                    )
+                },
+                "focus": {
+                    "type": "string",
+                    "enum": ["news", "analysis", "general", "financial"],
+                    "description": (
+                        "Focus area for the research. "
+                        "'news' for recent news and events, "
+                        "'analysis' for expert analysis and opinions, "
+                        "'financial' for financial market context, "
+                        "'general' for broad research (default)."
+                    ),
+                    "default": "general"
+                }
+            },
+            "required": ["query"]
+        }
+    }
+}
+
 
 def get_perplexity_research_function() -> Dict[str, Any]:
     """
@@ -22,48 +81,7 @@ def get_perplexity_research_function() -> Dict[str, Any]:
     Returns:
         OpenAI function definition dictionary
     """
-    return {
-        "type": "function",
-        "function": {
-            "name": "perplexity_research",
-            "description": (
-                "Perform real-time web research on a topic using Perplexity's Sonar API. "
-                "Use this for finding recent news, market analysis, company developments, "
-                "industry trends, and other information not available in structured financial data. "
-                "Returns comprehensive, cited research results with sources. "
-                "Use this tool when you need current information, news, expert opinions, "
-                "or qualitative analysis that complements the structured financial data from Alpha Vantage tools."
-            ),
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": (
-                            "Research query or question to investigate. "
-                            "Be specific and include context (e.g., company name, ticker symbol, time period). "
-                            "Examples: 'Recent Apple Inc news and market sentiment', "
-                            "'TSLA stock analysis and analyst opinions', "
-                            "'Technology sector trends affecting semiconductor stocks'"
-                        )
-                    },
-                    "focus": {
-                        "type": "string",
-                        "enum": ["news", "analysis", "general", "financial"],
-                        "description": (
-                            "Focus area for the research. "
-                            "'news' for recent news and events, "
-                            "'analysis' for expert analysis and opinions, "
-                            "'financial' for financial market context, "
-                            "'general' for broad research (default)."
-                        ),
-                        "default": "general"
-                    }
-                },
-                "required": ["query"]
-            }
-        }
-    }
+    return _PERPLEXITY_RESEARCH_FUNCTION
 
 
 def _format_query(query: str, focus: str = "general") -> str:
@@ -77,14 +95,7 @@ def _format_query(query: str, focus: str = "general") -> str:
     Returns:
         Formatted query string
     """
-    focus_prefixes = {
-        "news": "Recent news and events: ",
-        "analysis": "Expert analysis and opinions: ",
-        "financial": "Financial market context: ",
-        "general": ""
-    }
-    
-    prefix = focus_prefixes.get(focus, "")
+    prefix = _FOCUS_PREFIXES.get(focus, "")
     return f"{prefix}{query}" if prefix else query
 
 
@@ -110,15 +121,8 @@ async def execute_perplexity_research(
     # Format query based on focus
     formatted_query = _format_query(query, focus)
     
-    # Create system message based on focus
-    system_messages = {
-        "news": "You are a financial news research assistant. Provide recent news, events, and developments with sources.",
-        "analysis": "You are a financial analysis assistant. Provide expert opinions, market analysis, and insights with sources.",
-        "financial": "You are a financial market research assistant. Provide financial context, market trends, and economic factors with sources.",
-        "general": "You are a helpful research assistant that provides accurate, cited information."
-    }
-    
-    system_message = system_messages.get(focus, system_messages["general"])
+    # System message based on focus
+    system_message = _SYSTEM_MESSAGES.get(focus, _SYSTEM_MESSAGES["general"])
     
     try:
         # Call Perplexity API with a hard wall-clock timeout to avoid long-running agents
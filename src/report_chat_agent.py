@@ -3,31 +3,118 @@ RAG-lite chat agent for answering questions about stored reports.
 """
 
 import os
+import threading
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 
-from agents import Agent, Runner, trace, ModelSettings
+import openai
+from agents import trace
 
-from embedding_service import EmbeddingService
+from embedding_service import EmbeddingService, get_http_client
 from vector_search import VectorSearch
 
+try:
+    from sentence_transformers import CrossEncoder
+except ImportError:  # Optional; without it the dense top-k is used as is
+    CrossEncoder = None
+
+try:
+    import tiktoken
+except ImportError:  # Optional; token counts fall back to ~4 characters per token
+    tiktoken = None
+
 load_dotenv()
 
+# Extractive QA over provided excerpts works well on the small model; the
+# larger one is used for questions flagged complex or with weak excerpts
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-4o-mini")
+CHAT_COMPLEX_MODEL = os.getenv("CHAT_COMPLEX_MODEL", "gpt-4o")
+
+# Escalate to CHAT_COMPLEX_MODEL when the best rerank score is below this
+CHAT_ESCALATE_BELOW_SCORE = float(os.getenv("CHAT_ESCALATE_BELOW_SCORE", "0.2"))
+
+# Token budgets for the RAG prompt: recent conversation, and report excerpts
+CHAT_HISTORY_MAX_TOKENS = int(os.getenv("CHAT_HISTORY_MAX_TOKENS", "800"))
+CHAT_EXCERPT_MAX_TOKENS = int(os.getenv("CHAT_EXCERPT_MAX_TOKENS", "6000"))
+
+# Cross-encoder reranking of retrieved chunks (used when sentence-transformers is installed)
+CHAT_RERANK_ENABLED = os.getenv("CHAT_RERANK_ENABLED", "true").lower() == "true"
+CHAT_RERANK_MODEL = os.getenv("CHAT_RERANK_MODEL", "BAAI/bge-reranker-base")
+
+# Chunks retrieved by vector search before reranking down to top_k
+CHAT_RERANK_CANDIDATES = int(os.getenv("CHAT_RERANK_CANDIDATES", "30"))
+
+# The cross-encoder is loaded once per process and shared by every chat agent
+_reranker = None
+_reranker_failed = False
+_reranker_lock = threading.Lock()
+
+
+def get_reranker():
+    """
+    Get or load the shared cross-encoder.
+    
+    Returns:
+        CrossEncoder instance, or None if reranking is disabled, unavailable,
+        or the model failed to load
+    """
+    global _reranker, _reranker_failed
+    if not CHAT_RERANK_ENABLED or CrossEncoder is None or _reranker_failed:
+        return None
+    with _reranker_lock:
+        if _reranker is None and not _reranker_failed:
+            try:
+                _reranker = CrossEncoder(CHAT_RERANK_MODEL)
+            except Exception as e:
+                print(f"Warning: Could not load reranker {CHAT_RERANK_MODEL}, reranking disabled: {e}")
+                _reranker_failed = True
+        return _reranker
+
+# o200k_base is the gpt-4o / gpt-4o-mini tokenizer
+_encoding = tiktoken.get_encoding("o200k_base") if tiktoken is not None else None
+
+
+def count_tokens(text: str) -> int:
+    """Count (or, without tiktoken, estimate) the tokens in text."""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4
+
+
+def clip_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens tokens."""
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else _encoding.decode(tokens[:max_tokens])
+    return text[:max_tokens * 4]
+
 
 class ReportChatAgent:
     """Agent for chatting with reports using RAG-lite retrieval."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = CHAT_MODEL,
+        complex_model: str = CHAT_COMPLEX_MODEL
+    ):
         """
         Initialize the report chat agent.
         
         Args:
             api_key: OpenAI API key (optional)
+            model: Model for routine questions
+            complex_model: Model for complex questions and weak retrievals
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable.")
         
+        self.model = model
+        self.complex_model = complex_model
+        # Answers are single completions over provided excerpts (no tools, no
+        # agent loop), so the Chat Completions API is called directly
+        self.client = openai.OpenAI(api_key=self.api_key, http_client=get_http_client())
         self.embedding_service = EmbeddingService(api_key=self.api_key)
         self.vector_search = VectorSearch()
         self.conversation_history: List[Dict[str, str]] = []
@@ -37,7 +124,9 @@ class ReportChatAgent:
         report_id: str,
         user_question: str,
         conversation_history: Optional[List[Dict[str, str]]] = None,
-        top_k: int = 5
+        top_k: int = 5,
+        rerank: bool = True,
+        complex: bool = False
     ) -> str:
         """
         Answer a question about a report using RAG-lite retrieval.
@@ -47,19 +136,63 @@ class ReportChatAgent:
             user_question: User's question
             conversation_history: Previous conversation turns (optional)
             top_k: Number of chunks to retrieve
+            rerank: Rerank a wider candidate set with the cross-encoder
+            complex: Answer with the complex model
         
         Returns:
             Agent's answer based on report excerpts
         """
+        prepared = self._prepare_answer(
+            report_id, user_question, conversation_history, top_k, rerank, complex
+        )
+        if isinstance(prepared, str):
+            return prepared
+        model, messages, trace_metadata = prepared
+        
+        # Execute
+        try:
+            with trace("Report Chat", metadata=trace_metadata):
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.7
+                )
+            
+            return response.choices[0].message.content or ""
+            
+        except Exception as e:
+            error_msg = f"Error generating answer: {str(e)}"
+            print(error_msg)
+            return error_msg
+    
+    def _prepare_answer(
+        self,
+        report_id: str,
+        user_question: str,
+        conversation_history: Optional[List[Dict[str, str]]],
+        top_k: int,
+        rerank: bool = True,
+        complex: bool = False
+    ):
+        """
+        Retrieve relevant chunks and build the chat completion request.
+        
+        Returns:
+            Tuple of (model, messages, trace metadata), or a final answer
+            string when no relevant excerpts were found
+        """
         # Embed the user question
         query_embedding = self.embedding_service.create_embedding(user_question)
         
-        # Search for relevant chunks
+        # Search for relevant chunks; over-fetch when a reranker will narrow them
+        reranker = get_reranker() if rerank else None
         relevant_chunks = self.vector_search.search_chunks(
             report_id=report_id,
             query_embedding=query_embedding,
-            top_k=top_k
+            top_k=max(top_k, CHAT_RERANK_CANDIDATES) if reranker else top_k
         )
+        if reranker and len(relevant_chunks) > 1:
+            relevant_chunks = self._rerank(reranker, user_question, relevant_chunks, top_k)
         
         if not relevant_chunks:
             return "I couldn't find relevant information in the report to answer your question. The report may not contain information about this topic."
@@ -70,43 +203,64 @@ class ReportChatAgent:
         # Get system instructions
         system_instructions = self._get_system_instructions()
         
-        # Create agent
-        agent = Agent(
-            name="Report Chat Agent",
-            instructions=system_instructions,
-            model="gpt-4o",
-            tools=[],  # Chat agent doesn't need tools, works with provided context
-            model_settings=ModelSettings(temperature=0.7)
-        )
+        model = self._select_model(relevant_chunks, complex)
+        messages = [
+            {"role": "system", "content": system_instructions},
+            {"role": "user", "content": prompt}
+        ]
         
-        # Execute
+        trace_metadata = {
+            "report_id": report_id,
+            "chunks_retrieved": len(relevant_chunks),
+            "model": model
+        }
+        return model, messages, trace_metadata
+    
+    def _select_model(self, chunks: List[Dict[str, Any]], complex: bool) -> str:
+        """
+        Pick the model for a question.
+        
+        Args:
+            chunks: Retrieved chunks (with rerank_score when reranked)
+            complex: Caller asked for the complex model
+        
+        Returns:
+            Model name
+        """
+        if complex:
+            return self.complex_model
+        top_score = chunks[0].get('rerank_score') if chunks else None
+        if top_score is not None and top_score < CHAT_ESCALATE_BELOW_SCORE:
+            return self.complex_model
+        return self.model
+    
+    def _rerank(
+        self,
+        reranker,
+        question: str,
+        chunks: List[Dict[str, Any]],
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Reorder chunks by cross-encoder relevance to the question.
+        
+        Args:
+            reranker: CrossEncoder instance
+            question: User's question
+            chunks: Candidate chunks from vector search
+            top_k: Number of chunks to keep
+        
+        Returns:
+            Top-k chunks, each with a rerank_score, most relevant first
+        """
         try:
-            with trace("Report Chat", metadata={
-                "report_id": report_id,
-                "chunks_retrieved": len(relevant_chunks)
-            }):
-                result = Runner.run_sync(
-                    agent,
-                    prompt,
-                    max_turns=5
-                )
-            
-            # Extract output
-            if hasattr(result, 'final_output'):
-                answer = result.final_output
-            elif hasattr(result, 'output'):
-                answer = result.output
-            elif isinstance(result, str):
-                answer = result
-            else:
-                answer = str(result)
-            
-            return answer
-            
+            scores = reranker.predict([(question, chunk['chunk_text']) for chunk in chunks])
         except Exception as e:
-            error_msg = f"Error generating answer: {str(e)}"
-            print(error_msg)
-            return error_msg
+            print(f"Warning: Reranking failed, using vector search order: {e}")
+            return chunks[:top_k]
+        
+        ranked = sorted(zip(scores, chunks), key=lambda pair: pair[0], reverse=True)
+        return [{**chunk, 'rerank_score': float(score)} for score, chunk in ranked[:top_k]]
     
     def _get_system_instructions(self) -> str:
         """Get system instructions for the chat agent."""
@@ -151,8 +305,14 @@ class ReportChatAgent:
             ""
         ]
         
-        # Add chunks with section context
+        # Add chunks with section context, best first, until the excerpt budget is spent
+        excerpt_tokens = 0
         for i, chunk in enumerate(chunks, 1):
+            chunk_tokens = count_tokens(chunk['chunk_text'])
+            if i > 1 and excerpt_tokens + chunk_tokens > CHAT_EXCERPT_MAX_TOKENS:
+                break
+            excerpt_tokens += chunk_tokens
+            
             section_info = f" (Section: {chunk.get('section', 'Unknown')})" if chunk.get('section') else ""
             prompt_parts.append(f"[Excerpt {i}{section_info}]")
             prompt_parts.append(chunk['chunk_text'])
@@ -161,12 +321,11 @@ class ReportChatAgent:
         prompt_parts.append("---")
         prompt_parts.append("")
         
-        # Add conversation history if available
-        if conversation_history:
+        # Add as much recent conversation as fits the history budget
+        history = self._truncate_history(conversation_history or [])
+        if history:
             prompt_parts.append("Previous conversation:")
-            for turn in conversation_history[-3:]:  # Last 3 turns for context
-                role = turn.get('role', 'user')
-                content = turn.get('content', '')
+            for role, content in history:
                 prompt_parts.append(f"{role.capitalize()}: {content}")
             prompt_parts.append("")
         
@@ -176,6 +335,40 @@ class ReportChatAgent:
         
         return "\n".join(prompt_parts)
     
+    def _truncate_history(
+        self,
+        history: List[Dict[str, str]],
+        max_tokens: int = CHAT_HISTORY_MAX_TOKENS
+    ) -> List[tuple]:
+        """
+        Keep the most recent turns that fit in a token budget.
+        
+        Turns are taken newest first until the next one would exceed the
+        budget. If even the newest turn is too long, it is clipped rather
+        than dropped.
+        
+        Args:
+            history: Conversation turns (role/content dicts), oldest first
+            max_tokens: Token budget for the kept turns
+        
+        Returns:
+            (role, content) tuples, oldest first
+        """
+        kept = []
+        used = 0
+        for turn in reversed(history):
+            role = turn.get('role', 'user')
+            content = turn.get('content', '')
+            tokens = count_tokens(content)
+            if used + tokens > max_tokens:
+                if not kept:
+                    kept.append((role, clip_to_tokens(content, max_tokens)))
+                break
+            kept.append((role, content))
+            used += tokens
+        kept.reverse()
+        return kept
+    
     def chat_with_report(
         self,
         report_id: str,
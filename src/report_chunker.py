@@ -2,9 +2,21 @@
 Report chunking service for splitting reports into semantic chunks.
 """
 
+import os
 import re
 from typing import List, Dict, Any, Optional
 
+# Markdown-style headers (# ## ###), numbered sections, or "Title:" lines;
+# matched against a whole stripped line
+_HEADER_RE = re.compile(r'#{1,3}\s+.+|\d+\.\s+[A-Z][^\n]+|[A-Z][^\n:]+:')
+
+# Sentence endings (., !, ?) followed by space and a capital letter
+_SENTENCE_BOUNDARY_RE = re.compile(r'[.!?]\s+[A-Z]')
+
+# Set CHUNKER_REGEX_BOUNDARIES=true to find sentence boundaries with the regex
+# scan instead of the right-to-left rfind scan (same results; for regression checks)
+CHUNKER_REGEX_BOUNDARIES = os.getenv("CHUNKER_REGEX_BOUNDARIES", "false").lower() == "true"
+
 
 class ReportChunker:
     """Service for chunking reports into semantic segments."""
@@ -85,9 +97,7 @@ class ReportChunker:
             List of (section_name, section_text) tuples
         """
         sections = []
-        
-        # Pattern to match markdown-style headers (# ## ###) or numbered sections
-        header_pattern = r'^(#{1,3}\s+.+?|^\d+\.\s+[A-Z][^\n]+|^[A-Z][^\n:]+:)$'
+        is_header = _HEADER_RE.fullmatch
         
         lines = text.split('\n')
         current_section = "Introduction"
@@ -95,13 +105,14 @@ class ReportChunker:
         
         for line in lines:
             # Check if line is a header
-            if re.match(header_pattern, line.strip(), re.MULTILINE):
+            stripped = line.strip()
+            if is_header(stripped):
                 # Save previous section
                 if current_text:
                     sections.append((current_section, '\n'.join(current_text)))
                 
                 # Start new section
-                current_section = line.strip().lstrip('#').strip()
+                current_section = stripped.lstrip('#').strip()
                 current_text = [line]
             else:
                 current_text.append(line)
@@ -162,11 +173,16 @@ class ReportChunker:
                 if sentence_end > start:
                     end = sentence_end
             
-            chunk_text = text[start:end].strip()
+            # Trim whitespace by index so the chunk is copied out of text only once
+            text_start, text_end = start, min(end, text_length)
+            while text_start < text_end and text[text_start].isspace():
+                text_start += 1
+            while text_end > text_start and text[text_end - 1].isspace():
+                text_end -= 1
             
-            if chunk_text:
+            if text_start < text_end:
                 chunks.append({
-                    'chunk_text': chunk_text,
+                    'chunk_text': text[text_start:text_end],
                     'section': section,
                     'start_char': start,
                     'end_char': end
@@ -191,17 +207,45 @@ class ReportChunker:
         Returns:
             Character position of sentence boundary
         """
-        # Look for sentence endings (., !, ?) followed by space and capital letter
-        pattern = r'[.!?]\s+[A-Z]'
+        if CHUNKER_REGEX_BOUNDARIES:
+            return self._find_sentence_boundary_regex(text, start, end)
+        
+        # Walk punctuation right to left; the first one followed by whitespace
+        # and a capital letter is the last match of _SENTENCE_BOUNDARY_RE
+        last_seen = {mark: text.rfind(mark, start, end) for mark in '.!?'}
+        while True:
+            punct = max(last_seen.values())
+            if punct < 0:
+                # If no sentence boundary found, return original end
+                return end
+            
+            capital = punct + 1
+            while capital < end and text[capital].isspace():
+                capital += 1
+            if capital > punct + 1 and capital < end and 'A' <= text[capital] <= 'Z':
+                return capital  # Position of the capital letter
+            
+            last_seen[text[punct]] = text.rfind(text[punct], start, punct)
+    
+    def _find_sentence_boundary_regex(self, text: str, start: int, end: int) -> int:
+        """
+        Regex version of _find_sentence_boundary.
         
-        # Search backwards from end
-        search_text = text[start:end]
-        matches = list(re.finditer(pattern, search_text))
+        Args:
+            text: Full text
+            start: Start of search range
+            end: End of search range
+        
+        Returns:
+            Character position of sentence boundary
+        """
+        # Scan the range in place (no slice) and keep only the last match
+        last_match = None
+        for last_match in _SENTENCE_BOUNDARY_RE.finditer(text, start, end):
+            pass
         
-        if matches:
-            # Use the last match
-            match = matches[-1]
-            return start + match.end() - 1  # Position before the capital letter
+        if last_match is not None:
+            return last_match.end() - 1  # Position before the capital letter
         
         # If no sentence boundary found, return original end
         return end
@@ -5,9 +5,13 @@ Report storage service integrating database, chunking, and embeddings.
 from typing import Dict, Any, Optional, List
 import uuid
 
+import numpy as np
+
 from database import get_database_manager
 from report_chunker import ReportChunker
 from embedding_service import EmbeddingService
+from embedding_cache import EmbeddingCache, text_hash
+from vector_search import invalidate_report_index, normalize_rows
 
 
 class ReportStorage:
@@ -18,6 +22,7 @@ class ReportStorage:
         self._db = None  # Lazy initialization - only connect when needed
         self.chunker = ReportChunker()
         self.embedding_service = EmbeddingService()
+        self.embedding_cache = EmbeddingCache(model=self.embedding_service.model)
     
     @property
     def db(self):
@@ -45,36 +50,59 @@ class ReportStorage:
         Returns:
             report_id: Generated report ID
         """
-        # Save report to database
-        report_id = self.db.save_report(
-            ticker=ticker,
-            trade_type=trade_type,
-            report_text=report_text,
-            metadata=metadata
-        )
-        
         # Chunk the report
-        print(f"Chunking report {report_id}...")
+        print(f"Chunking report for {ticker}...")
         chunks = self.chunker.chunk_report(report_text, preserve_sections=True)
         print(f"Created {len(chunks)} chunks")
         
         # Create embeddings for chunks
         print(f"Creating embeddings for {len(chunks)} chunks...")
         chunk_texts = [chunk['chunk_text'] for chunk in chunks]
-        embeddings = self.embedding_service.create_embeddings_batch(chunk_texts)
+        embeddings = self._embed_texts(chunk_texts)
         
-        # Add embeddings to chunks
-        for i, chunk in enumerate(chunks):
-            chunk['embedding'] = embeddings[i] if i < len(embeddings) else None
+        # Add embeddings to chunks, stored at unit length so similarity is a dot product
+        for chunk, embedding in zip(chunks, embeddings):
+            chunk['embedding'] = (
+                normalize_rows(np.asarray(embedding, dtype=np.float32)) if embedding is not None else None
+            )
         
-        # Save chunks to database
-        print(f"Saving chunks to database...")
-        self.db.save_chunks(report_id, chunks)
+        # Save report and chunks in a single transaction
+        print(f"Saving report and chunks to database...")
+        report_id = self.db.save_report_with_chunks(
+            ticker=ticker,
+            trade_type=trade_type,
+            report_text=report_text,
+            chunks=chunks,
+            metadata=metadata
+        )
         
         print(f"✓ Report {report_id} stored with {len(chunks)} chunks")
         
         return report_id
     
+    def _embed_texts(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Embed texts, reusing cached embeddings for text seen before.
+        
+        Only distinct uncached texts are sent to the embedding API; results
+        are returned in the order of texts.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            Embedding for each text (None if the API returned too few)
+        """
+        found, uncached = self.embedding_cache.find_uncached_texts(texts)
+        if uncached:
+            new_embeddings = self.embedding_service.create_embeddings_batch(uncached)
+            self.embedding_cache.store(uncached, new_embeddings)
+            for text, embedding in zip(uncached, new_embeddings):
+                found[text_hash(text)] = embedding
+        
+        print(f"Embedding cache: {len(texts) - len(uncached)}/{len(texts)} chunks reused")
+        return [found.get(text_hash(text)) for text in texts]
+    
     def get_report(self, report_id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve a report by ID.
@@ -117,6 +145,19 @@ class ReportStorage:
         """
         return self.db.get_reports_by_ticker(ticker, limit=limit)
     
+    def list_reports_by_ticker(self, ticker: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        List recent reports for a ticker without their full text.
+        
+        Args:
+            ticker: Stock ticker symbol
+            limit: Maximum number of reports
+        
+        Returns:
+            List of report summary dictionaries (no report_text)
+        """
+        return self.db.list_reports_by_ticker(ticker, limit=limit)
+    
     def delete_report(self, report_id: str):
         """
         Delete a report and all its chunks.
@@ -125,4 +166,5 @@ class ReportStorage:
             report_id: Report ID
         """
         self.db.delete_report(report_id)
+        invalidate_report_index(report_id)
 
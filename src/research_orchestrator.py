@@ -2,11 +2,12 @@
 Research orchestrator for coordinating parallel specialized research agents.
 """
 
+import asyncio
 import os
 from typing import Dict, Any, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
+from http_clients import run_async
 from research_subjects import get_research_subjects, format_subject_prompt
 from specialized_agent import SpecializedResearchAgent
 
@@ -26,6 +27,20 @@ class ResearchOrchestrator:
             api_key: OpenAI API key (optional)
         """
         self.api_key = api_key
+        self._research_agent = None  # Lazy initialization - built on first research run
+    
+    @property
+    def research_agent(self) -> SpecializedResearchAgent:
+        """
+        Shared specialized agent for every subject.
+        
+        Its MCP client, Perplexity client and tool list don't depend on the
+        subject (each research_subject call builds its own Agent), so one
+        instance serves all subjects and runs.
+        """
+        if self._research_agent is None:
+            self._research_agent = SpecializedResearchAgent(api_key=self.api_key)
+        return self._research_agent
     
     def craft_research_prompts(
         self,
@@ -59,15 +74,41 @@ class ResearchOrchestrator:
         trade_type: str,
         context: str = "",
         max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Execute parallel research using specialized agents (blocking wrapper).
+        
+        Args:
+            ticker: Stock ticker symbol
+            trade_type: Type of trade
+            context: Additional context from followup questions
+            max_workers: Maximum number of subjects researched at once
+        
+        Returns:
+            Dictionary mapping subject_id -> research results
+        """
+        return run_async(
+            self.async_run_parallel_research(ticker, trade_type, context, max_workers)
+        )
+    
+    async def async_run_parallel_research(
+        self,
+        ticker: str,
+        trade_type: str,
+        context: str = "",
+        max_workers: int = DEFAULT_MAX_WORKERS,
     ) -> Dict[str, Dict[str, Any]]:
         """
         Execute parallel research using specialized agents.
         
+        All subjects run as tasks on one event loop, so their Perplexity and
+        OpenAI calls share the loop's HTTP/2 connection pool.
+        
         Args:
             ticker: Stock ticker symbol
             trade_type: Type of trade
             context: Additional context from followup questions
-            max_workers: Maximum number of parallel workers (default: 6)
+            max_workers: Maximum number of subjects researched at once
         
         Returns:
             Dictionary mapping subject_id -> research results
@@ -81,45 +122,39 @@ class ResearchOrchestrator:
             f"{max_workers} concurrent workers..."
         )
         
+        # Built off the loop: first use opens the MCP and Perplexity clients
+        agent = await asyncio.to_thread(lambda: self.research_agent)
         start_time = time.time()
+        semaphore = asyncio.Semaphore(max_workers)
+        completed = 0
+        
+        async def research(subject):
+            nonlocal completed
+            async with semaphore:
+                result = await agent.async_research_subject(ticker, subject, trade_type, context)
+            completed += 1
+            print(f"✓ Completed research for: {subject.name} ({completed}/{len(subjects)})")
+            return result
+        
+        outcomes = await asyncio.gather(
+            *(research(subject) for subject in subjects),
+            return_exceptions=True
+        )
         
-        # Use ThreadPoolExecutor for parallel execution
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all research tasks
-            future_to_subject = {}
-            
-            for subject in subjects:
-                agent = SpecializedResearchAgent(api_key=self.api_key)
-                future = executor.submit(
-                    agent.research_subject,
-                    ticker,
-                    subject,
-                    trade_type,
-                    context
-                )
-                future_to_subject[future] = subject
-            
-            # Collect results as they complete
-            completed = 0
-            for future in as_completed(future_to_subject):
-                subject = future_to_subject[future]
-                try:
-                    result = future.result()
-                    results[subject.id] = result
-                    completed += 1
-                    print(f"✓ Completed research for: {subject.name} ({completed}/{len(subjects)})")
-                except Exception as e:
-                    print(f"✗ Error researching {subject.name}: {e}")
-                    results[subject.id] = {
-                        "subject_id": subject.id,
-                        "subject_name": subject.name,
-                        "research_output": f"Error: {str(e)}",
-                        "sources": [],
-                        "ticker": ticker,
-                        "trade_type": trade_type,
-                        "error": str(e)
-                    }
-                    completed += 1
+        for subject, outcome in zip(subjects, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"✗ Error researching {subject.name}: {outcome}")
+                results[subject.id] = {
+                    "subject_id": subject.id,
+                    "subject_name": subject.name,
+                    "research_output": f"Error: {str(outcome)}",
+                    "sources": [],
+                    "ticker": ticker,
+                    "trade_type": trade_type,
+                    "error": str(outcome)
+                }
+            else:
+                results[subject.id] = outcome
         
         elapsed_time = time.time() - start_time
         print(f"✓ Parallel research completed in {elapsed_time:.2f} seconds")
@@ -2,6 +2,55 @@
 Research prompt templates and system instructions for the stock research agent.
 """
 
+import functools
+import re
+import textwrap
+from types import MappingProxyType
+from typing import Mapping, Tuple
+
+from research_subjects import get_research_subject_by_id
+
+# Prompts depend only on their (hashable) arguments, so each distinct
+# combination is built once and the same str returned afterwards
+PROMPT_CACHE_SIZE = 256
+
+
+def _compact(text: str) -> str:
+    """Dedent a prompt block and collapse blank-line runs (indentation only costs tokens)."""
+    return re.sub(r"\n{3,}", "\n\n", textwrap.dedent(text)).strip()
+
+
+# Follow-up topics per trade type, built once at import
+_TRADE_GUIDANCE: Mapping[str, str] = MappingProxyType({trade_type: _compact(guidance) for trade_type, guidance in {
+    "Day Trade": """
+        Consider asking about:
+        - Specific time horizon for the day trade (morning, afternoon, full day)
+        - Key catalysts or events to watch
+        - Risk tolerance for intraday moves
+        - Preferred entry/exit strategies
+        - Any specific sectors or market conditions to consider
+        """,
+    "Swing Trade": """
+        Consider asking about:
+        - Exact holding period (1-3 days, 1 week, 2 weeks)
+        - Key events or earnings dates to watch
+        - Sector momentum preferences
+        - Risk/reward expectations
+        - Any specific technical or fundamental triggers
+        """,
+    "Investment": """
+        Consider asking about:
+        - Investment time horizon (3 months, 6 months, 1 year, longer)
+        - Investment thesis focus (growth, value, dividend, etc.)
+        - Risk factors to emphasize
+        - Valuation methodology preferences
+        - Competitive analysis depth
+        - Management quality assessment needs
+        """
+}.items()})
+
+
+@functools.lru_cache(maxsize=PROMPT_CACHE_SIZE)
 def get_system_instructions(ticker: str, trade_type: str) -> str:
     """
     Generate system instructions for the agent based on ticker and trade type.
@@ -13,8 +62,9 @@ def get_system_instructions(ticker: str, trade_type: str) -> str:
     Returns:
         System instructions string for the agent
     """
-    
-    base_instructions = f"""You are a hedge fund equity research analyst specializing in {trade_type} analysis. Your mission is to perform a fundamental research report on the stock with ticker {ticker}.
+    # Ticker and trade type appear only in the closing lines, so every
+    # session shares the same prompt prefix for provider-side prompt caching
+    base_instructions = f"""You are a hedge fund equity research analyst performing fundamental analysis. Your mission is to perform a fundamental research report on the stock given by [TICKER], for the trade type given by [type_of_trade], at the end of these instructions.
 
 Adjust research depth, time horizon, and key metrics based on the trade type:
 
@@ -29,7 +79,7 @@ Use a clear structure:
 4. Valuation and peers
 5. Catalysts and risks
 6. Thesis summary
-7. Actionable view tailored to {trade_type}
+7. Actionable view tailored to the trade type
 
 ## Research Tools
 
@@ -58,7 +108,7 @@ Before generating the final report:
 - Ask a small number of clarifying questions if the user’s goals or constraints are unclear.
 
 Final output:
-- Deliver a concise, structured report tailored to {trade_type}, highlighting the most important drivers, risks, and actionable insights.
+- Deliver a concise, structured report tailored to the trade type, highlighting the most important drivers, risks, and actionable insights.
 
 [TICKER]: {ticker}
 [type_of_trade]: {trade_type}
@@ -67,6 +117,25 @@ Final output:
     return base_instructions
 
 
+@functools.lru_cache(maxsize=PROMPT_CACHE_SIZE)
+def _subject_task(subject_id: str, ticker: str) -> Tuple[str, str, str]:
+    """
+    Resolve a subject's name, description, and research objective for a ticker.
+    
+    Shared across trade types, so the subject's template is formatted once per ticker.
+    
+    Args:
+        subject_id: Research subject ID
+        ticker: Stock ticker symbol
+    
+    Returns:
+        Tuple of (subject name, subject description, formatted research objective)
+    """
+    subject = get_research_subject_by_id(subject_id)
+    return subject.name, subject.description, subject.render(ticker)
+
+
+@functools.lru_cache(maxsize=PROMPT_CACHE_SIZE)
 def get_specialized_agent_instructions(subject_id: str, ticker: str, trade_type: str) -> str:
     """
     Generate specialized system instructions for a research subject agent.
@@ -79,16 +148,14 @@ def get_specialized_agent_instructions(subject_id: str, ticker: str, trade_type:
     Returns:
         System instructions string for the specialized agent
     """
-    from src.research_subjects import get_research_subject_by_id, format_subject_prompt
+    name, description, task = _subject_task(subject_id, ticker)
     
-    subject = get_research_subject_by_id(subject_id)
-    
-    instructions = f"""You are a specialized research analyst focusing on {subject.name} for {ticker}.
+    instructions = f"""You are a specialized research analyst focusing on {name} for {ticker}.
 
-Your specific research task: {subject.description}
+Your specific research task: {description}
 
 **Research Objective:**
-{subject.prompt_template.format(ticker=ticker)}
+{task}
 
 **Trade Type Context:** {trade_type}
 - For Day Trade: Focus on immediate, actionable insights.
@@ -100,7 +167,7 @@ Your specific research task: {subject.description}
 - Perplexity Research: real-time news, analysis, qualitative insights.
 
 **Output Requirements:**
-1. Provide clear research findings on {subject.name}.
+1. Provide clear research findings on {name}.
 2. Include only the most relevant metrics and facts.
 3. Cite sources (tool outputs, research results) as needed.
 4. Structure your response with:
@@ -114,6 +181,7 @@ Begin your research now."""
     return instructions
 
 
+@functools.lru_cache(maxsize=PROMPT_CACHE_SIZE)
 def get_orchestration_instructions(ticker: str, trade_type: str) -> str:
     """
     Generate orchestration instructions for the main agent (conversation handler/orchestrator).
@@ -125,7 +193,8 @@ def get_orchestration_instructions(ticker: str, trade_type: str) -> str:
     Returns:
         System instructions string for the orchestration agent
     """
-    instructions = f"""You are a stock research orchestrator specializing in {trade_type} analysis. Your role is to guide the user conversation and coordinate research for the stock with ticker {ticker}.
+    # Ticker and trade type stay in the closing lines to keep the prefix cacheable
+    instructions = f"""You are a stock research orchestrator. Your role is to guide the user conversation and coordinate research for the stock given by [TICKER], for the trade type given by [TYPE_OF_TRADE], at the end of these instructions.
 
 **Your Responsibilities:**
 1. Handle conversation: ask a few focused questions and gather context.
@@ -145,7 +214,7 @@ def get_orchestration_instructions(ticker: str, trade_type: str) -> str:
 
 **Guidelines:**
 - You do NOT perform detailed research yourself; specialized agents handle that.
-- Ask 1–3 concise, relevant questions based on {trade_type}.
+- Ask 1–3 concise, relevant questions based on the trade type.
 - After each user response, decide if you have enough context.
 - When you have enough information, call the `generate_report` tool without waiting for the user to ask.
 - After calling `generate_report`, clearly tell the user that research has started.
@@ -161,6 +230,24 @@ def get_orchestration_instructions(ticker: str, trade_type: str) -> str:
     return instructions
 
 
+def _followup_prompt_head(trade_type: str) -> str:
+    """Build the follow-up prompt for a trade type, up to where the context is appended."""
+    guidance = _TRADE_GUIDANCE.get(trade_type, "")
+    return f"""Based on the trade type ({trade_type}) and current context, determine if you need to ask follow-up questions before proceeding with data collection and report generation.
+
+{guidance}
+
+If you need clarification on any of these areas, ask 1-3 concise, specific questions. Otherwise, proceed with gathering data using Alpha Vantage MCP tools and Perplexity research, then generate the research report.
+
+Context: """
+
+
+# Static part of the follow-up prompt per known trade type, built once at import
+_FOLLOWUP_BY_TRADE: Mapping[str, str] = MappingProxyType({
+    trade_type: _followup_prompt_head(trade_type) for trade_type in _TRADE_GUIDANCE
+})
+
+
 def get_followup_question_prompt(trade_type: str, context: str = "") -> str:
     """
     Generate a prompt to help the agent determine if follow-up questions are needed.
@@ -172,45 +259,7 @@ def get_followup_question_prompt(trade_type: str, context: str = "") -> str:
     Returns:
         Prompt for follow-up question generation
     """
-    
-    trade_specific_guidance = {
-        "Day Trade": """
-        Consider asking about:
-        - Specific time horizon for the day trade (morning, afternoon, full day)
-        - Key catalysts or events to watch
-        - Risk tolerance for intraday moves
-        - Preferred entry/exit strategies
-        - Any specific sectors or market conditions to consider
-        """,
-        "Swing Trade": """
-        Consider asking about:
-        - Exact holding period (1-3 days, 1 week, 2 weeks)
-        - Key events or earnings dates to watch
-        - Sector momentum preferences
-        - Risk/reward expectations
-        - Any specific technical or fundamental triggers
-        """,
-        "Investment": """
-        Consider asking about:
-        - Investment time horizon (3 months, 6 months, 1 year, longer)
-        - Investment thesis focus (growth, value, dividend, etc.)
-        - Risk factors to emphasize
-        - Valuation methodology preferences
-        - Competitive analysis depth
-        - Management quality assessment needs
-        """
-    }
-    
-    guidance = trade_specific_guidance.get(trade_type, "")
-    
-    prompt = f"""Based on the trade type ({trade_type}) and current context, determine if you need to ask follow-up questions before proceeding with data collection and report generation.
-
-{guidance}
-
-If you need clarification on any of these areas, ask 1-3 concise, specific questions. Otherwise, proceed with gathering data using Alpha Vantage MCP tools and Perplexity research, then generate the research report.
-
-Context: {context}
-"""
-    
-    return prompt
-
+    head = _FOLLOWUP_BY_TRADE.get(trade_type)
+    if head is None:
+        head = _followup_prompt_head(trade_type)
+    return head + context + "\n"
@@ -2,17 +2,38 @@
 Research subject definitions for specialized agent research.
 """
 
-from typing import Dict, List
+import functools
+from typing import Dict, Tuple
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(frozen=True)
 class ResearchSubject:
     """Represents a research subject for specialized agent research."""
+    # Declared by hand rather than with slots=True, which needs Python 3.10
+    __slots__ = ("id", "name", "description", "prompt_template", "_template_parts")
+
     id: str
     name: str
     description: str
     prompt_template: str
+    
+    def __post_init__(self):
+        # {ticker} is the template's only placeholder, so split once here and
+        # render by joining instead of parsing the template on every format call
+        object.__setattr__(self, "_template_parts", tuple(self.prompt_template.split("{ticker}")))
+    
+    def render(self, ticker: str) -> str:
+        """
+        Fill in the prompt template for a ticker.
+        
+        Args:
+            ticker: Stock ticker symbol
+        
+        Returns:
+            Research objective for the ticker
+        """
+        return ticker.join(self._template_parts)
 
 
 # Research subject definitions
@@ -122,21 +143,26 @@ Use Alpha Vantage MCP tools for income statements and financial data. Use Perple
 )
 
 
-def get_research_subjects() -> List[ResearchSubject]:
+# Built once at import; subjects are frozen, so callers can share them
+_RESEARCH_SUBJECTS: Tuple[ResearchSubject, ...] = (
+    PRODUCTS_SERVICES,
+    REVENUE_BREAKDOWN,
+    VALUE_PROPOSITIONS,
+    BUYING_PROCESS,
+    SEASONALITY,
+    MARGIN_STRUCTURE
+)
+_RESEARCH_SUBJECTS_BY_ID: Dict[str, ResearchSubject] = {s.id: s for s in _RESEARCH_SUBJECTS}
+
+
+def get_research_subjects() -> Tuple[ResearchSubject, ...]:
     """
     Get all research subjects.
     
     Returns:
-        List of ResearchSubject objects
+        Tuple of ResearchSubject objects
     """
-    return [
-        PRODUCTS_SERVICES,
-        REVENUE_BREAKDOWN,
-        VALUE_PROPOSITIONS,
-        BUYING_PROCESS,
-        SEASONALITY,
-        MARGIN_STRUCTURE
-    ]
+    return _RESEARCH_SUBJECTS
 
 
 def get_research_subject_by_id(subject_id: str) -> ResearchSubject:
@@ -152,12 +178,13 @@ def get_research_subject_by_id(subject_id: str) -> ResearchSubject:
     Raises:
         ValueError: If subject ID not found
     """
-    for subject in get_research_subjects():
-        if subject.id == subject_id:
-            return subject
+    subject = _RESEARCH_SUBJECTS_BY_ID.get(subject_id)
+    if subject is not None:
+        return subject
     raise ValueError(f"Research subject not found: {subject_id}")
 
 
+@functools.lru_cache(maxsize=128)
 def format_subject_prompt(subject: ResearchSubject, ticker: str, trade_type: str, context: str = "") -> str:
     """
     Format a research subject prompt with ticker and context.
@@ -171,10 +198,8 @@ def format_subject_prompt(subject: ResearchSubject, ticker: str, trade_type: str
     Returns:
         Formatted prompt string
     """
-    base_prompt = subject.prompt_template.format(ticker=ticker)
-    
-    if context:
-        base_prompt += f"\n\nAdditional context from user: {context}"
-    
-    return base_prompt
+    base_prompt = subject.render(ticker)
+    if not context:
+        return base_prompt
+    return f"{base_prompt}\n\nAdditional context from user: {context}"
 
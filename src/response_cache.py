@@ -0,0 +1,126 @@
+"""
+On-disk TTL cache for Alpha Vantage tool responses.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json works the same
+    orjson = None
+
+load_dotenv()
+
+# Opt-in: set MCP_CACHE_ENABLED=true to reuse Alpha Vantage responses within their TTL.
+# Expired files are only skipped, never deleted; clear the directory to reclaim space.
+MCP_CACHE_ENABLED = os.getenv("MCP_CACHE_ENABLED", "false").lower() == "true"
+MCP_CACHE_DIR = Path(os.getenv("MCP_CACHE_DIR", str(Path.home() / ".cache" / "stock_ai"))).expanduser()
+
+# Seconds a response stays fresh, per tool (fundamentals change quarterly, news hourly)
+TOOL_CACHE_TTL_SECONDS: Dict[str, int] = {
+    "OVERVIEW": 86400,
+    "INCOME_STATEMENT": 86400 * 7,
+    "BALANCE_SHEET": 86400 * 7,
+    "CASH_FLOW": 86400 * 7,
+    "EARNINGS": 86400,
+    "NEWS_SENTIMENT": 900,
+}
+DEFAULT_TOOL_CACHE_TTL_SECONDS = int(os.getenv("MCP_CACHE_DEFAULT_TTL_SECONDS", "3600"))
+
+# Alpha Vantage reports rate limits and bad symbols in the body of a 200 response
+_UNCACHEABLE_KEYS = ("Error Message", "Information", "Note", "error", "raw")
+
+
+def _dumps(value: Any, sort_keys: bool = False) -> bytes:
+    """Serialize to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(value, sort_keys=sort_keys).encode()
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class ToolResponseCache:
+    """Gzipped JSON files keyed by tool name and arguments, expired by file age."""
+
+    def __init__(self, cache_dir: Path = MCP_CACHE_DIR, enabled: bool = MCP_CACHE_ENABLED):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding cached responses
+            enabled: When False, get() always misses and set() does nothing
+        """
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+
+    def _path(self, tool_name: str, arguments: Dict[str, Any]) -> Path:
+        """Return the cache file for a tool call."""
+        key = hashlib.blake2b(
+            tool_name.encode() + _dumps(arguments, sort_keys=True), digest_size=16
+        ).hexdigest()
+        return self.cache_dir / f"{key}.json.gz"
+
+    def get(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[Any]:
+        """
+        Return a fresh cached response, or None.
+
+        Args:
+            tool_name: MCP tool name
+            arguments: Tool arguments
+
+        Returns:
+            Cached response, or None if missing, expired, or unreadable
+        """
+        if not self.enabled:
+            return None
+        path = self._path(tool_name, arguments)
+        ttl = TOOL_CACHE_TTL_SECONDS.get(tool_name, DEFAULT_TOOL_CACHE_TTL_SECONDS)
+        try:
+            if time.time() - path.stat().st_mtime > ttl:
+                return None
+            return _loads(gzip.decompress(path.read_bytes()))
+        except (OSError, ValueError):
+            return None
+
+    def set(self, tool_name: str, arguments: Dict[str, Any], response: Any):
+        """
+        Store a response unless it is an error payload.
+
+        Written to a temporary file and renamed into place so concurrent
+        readers never see a partial file.
+
+        Args:
+            tool_name: MCP tool name
+            arguments: Tool arguments
+            response: Parsed tool response
+        """
+        if not self.enabled:
+            return
+        if isinstance(response, dict) and any(key in response for key in _UNCACHEABLE_KEYS):
+            return
+        path = self._path(tool_name, arguments)
+        tmp_path = None
+        try:
+            data = gzip.compress(_dumps(response), compresslevel=6)
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Warning: Failed to cache {tool_name} response: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -2,16 +2,23 @@
 Specialized research agents for focused research on specific business model aspects.
 """
 
+import asyncio
+import functools
 import os
+import random
 import time
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
 from dotenv import load_dotenv
 
 from agents import Agent, Runner, trace, ModelSettings
+from agents.tool import FunctionTool
 
-from mcp_manager import MCPManager
+from http_clients import run_async
+from mcp_manager import get_mcp_manager
 from agent_tools import create_all_tools
-from research_subjects import ResearchSubject
+from perplexity_client import get_perplexity_client
+from research_subjects import ResearchSubject, format_subject_prompt
 
 load_dotenv()
 
@@ -25,10 +32,23 @@ SPECIALIZED_AGENT_MAX_OUTPUT_TOKENS = int(
     os.getenv("SPECIALIZED_AGENT_MAX_OUTPUT_TOKENS", "1500")
 )
 
+# Built Agent objects kept per (subject, ticker, trade type) for reuse across runs
+SPECIALIZED_AGENT_CACHE_SIZE = int(
+    os.getenv("SPECIALIZED_AGENT_CACHE_SIZE", "64")
+)
+
 SPECIALIZED_AGENT_DEBUG_TOKEN_LOG = os.getenv(
     "SPECIALIZED_AGENT_DEBUG_TOKEN_LOG", "false"
 ).lower() == "true"
 
+# Longest value kept per field of a tool call listed as a source; the tool's
+# full output already reached the agent, and sources end up in the synthesis prompt
+SOURCE_VALUE_MAX_CHARS = int(os.getenv("SOURCE_VALUE_MAX_CHARS", "300"))
+
+# Monotonic time before which no specialized run starts a request, set on a
+# rate-limit error (runs share the background event loop, so no lock)
+_rate_limit_resume_at = 0.0
+
 
 class SpecializedResearchAgent:
     """Specialized agent for researching a specific business model aspect."""
@@ -44,10 +64,11 @@ class SpecializedResearchAgent:
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable.")
         
-        self.mcp_manager = MCPManager()
+        self.mcp_manager = get_mcp_manager()
         self.mcp_client = None
         self.perplexity_client = None
         self.tools = []
+        self._agents: "OrderedDict[Tuple[ResearchSubject, str, str], Agent]" = OrderedDict()
         
         self._initialize_clients()
         self._initialize_tools()
@@ -63,8 +84,7 @@ class SpecializedResearchAgent:
         
         # Initialize Perplexity client
         try:
-            from perplexity_client import PerplexityClient
-            self.perplexity_client = PerplexityClient()
+            self.perplexity_client = get_perplexity_client()
         except ValueError as e:
             print(f"Info: Perplexity API not configured ({e}). Continuing with Alpha Vantage tools only.")
             self.perplexity_client = None
@@ -75,7 +95,8 @@ class SpecializedResearchAgent:
     def _initialize_tools(self):
         """Initialize tools for the agent."""
         try:
-            self.tools = create_all_tools(self.mcp_client, self.perplexity_client)
+            # Fresh list over wrappers shared with every other agent on the same clients
+            self.tools = list(_shared_tools(self.mcp_client, self.perplexity_client))
         except Exception as e:
             print(f"Warning: Could not create tools: {e}")
             self.tools = []
@@ -97,42 +118,42 @@ class SpecializedResearchAgent:
         Returns:
             System instructions string
         """
-        instructions = f"""You are a specialized research analyst focusing on {subject.name} for {ticker}.
-
-Your specific research task: {subject.description}
-
-**Research Objective:**
-{subject.prompt_template.format(ticker=ticker)}
-
-**Trade Type Context:** {trade_type}
-- Adjust your research depth and focus based on this trade type
-- For Day Trade: Focus on immediate, actionable insights
-- For Swing Trade: Focus on near-term factors (1-14 days)
-- For Investment: Focus on comprehensive, long-term analysis
-
-**Available Tools:**
-- Alpha Vantage MCP Tools: Use for structured financial data, company fundamentals, financial statements
-- Perplexity Research: Use for real-time information, news, expert analysis, qualitative insights
-
-**Output Requirements:**
-1. Provide comprehensive research findings on {subject.name}
-2. Include specific data points, metrics, and facts
-3. Cite all sources (tool outputs, research results)
-4. Structure your response clearly with:
-   - Key findings
-   - Supporting data
-   - Sources and citations
-   - Any relevant context or analysis
-
-**Important:**
-- Use both MCP tools and Perplexity research to gather comprehensive information
-- Be thorough and specific in your research
-- Ensure all claims are supported by data from your research tools
-- Format your response for easy integration into a final report
-
-Begin your research now."""
+        return _build_specialized_instructions(subject, ticker, trade_type)
+    
+    def _get_agent(self, subject: ResearchSubject, ticker: str, trade_type: str) -> Agent:
+        """
+        Get the agent for a subject, building it on first use.
+        
+        Agents hold only configuration (instructions, tools, model settings),
+        so one instance is safely reused by every run with the same inputs.
+        
+        Args:
+            subject: ResearchSubject object
+            ticker: Stock ticker symbol
+            trade_type: Type of trade
         
-        return instructions
+        Returns:
+            Agent with the subject's specialized instructions
+        """
+        key = (subject, ticker, trade_type)
+        agent = self._agents.get(key)
+        if agent is None:
+            agent = Agent(
+                name=f"Specialized Agent: {subject.name}",
+                instructions=self.get_specialized_instructions(subject, ticker, trade_type),
+                model="gpt-4o",
+                tools=self.tools,
+                model_settings=ModelSettings(
+                    temperature=0.7,
+                    max_output_tokens=SPECIALIZED_AGENT_MAX_OUTPUT_TOKENS,
+                ),
+            )
+            self._agents[key] = agent
+            while len(self._agents) > SPECIALIZED_AGENT_CACHE_SIZE:
+                self._agents.popitem(last=False)
+        else:
+            self._agents.move_to_end(key)
+        return agent
     
     def research_subject(
         self,
@@ -140,6 +161,27 @@ Begin your research now."""
         subject: ResearchSubject,
         trade_type: str,
         context: str = ""
+    ) -> Dict[str, Any]:
+        """
+        Research a specific subject for a ticker (blocking wrapper).
+        
+        Args:
+            ticker: Stock ticker symbol
+            subject: ResearchSubject to investigate
+            trade_type: Type of trade
+            context: Additional context from followup questions
+        
+        Returns:
+            Dictionary with research results (see async_research_subject)
+        """
+        return run_async(self.async_research_subject(ticker, subject, trade_type, context))
+    
+    async def async_research_subject(
+        self,
+        ticker: str,
+        subject: ResearchSubject,
+        trade_type: str,
+        context: str = ""
     ) -> Dict[str, Any]:
         """
         Research a specific subject for a ticker.
@@ -157,24 +199,24 @@ Begin your research now."""
             - research_output: Agent's research output
             - sources: List of sources used
         """
-        # Get specialized instructions
-        instructions = self.get_specialized_instructions(subject, ticker, trade_type)
+        # No MCP or Perplexity tools (clients failed to initialize): an LLM run could only guess
+        if not self.tools:
+            error_msg = f"Research tools unavailable for {subject.name}; skipped agent run"
+            print(error_msg)
+            return {
+                "subject_id": subject.id,
+                "subject_name": subject.name,
+                "research_output": error_msg,
+                "sources": [],
+                "ticker": ticker,
+                "trade_type": trade_type,
+                "error": "Research tools unavailable"
+            }
         
         # Format the research prompt
-        from research_subjects import format_subject_prompt
         research_prompt = format_subject_prompt(subject, ticker, trade_type, context)
         
-        # Create agent with specialized instructions
-        agent = Agent(
-            name=f"Specialized Agent: {subject.name}",
-            instructions=instructions,
-            model="gpt-4o",
-            tools=self.tools,
-            model_settings=ModelSettings(
-                temperature=0.7,
-                max_output_tokens=SPECIALIZED_AGENT_MAX_OUTPUT_TOKENS,
-            ),
-        )
+        agent = self._get_agent(subject, ticker, trade_type)
         
         # Execute research
         try:
@@ -190,7 +232,7 @@ Begin your research now."""
                 "subject": subject.id,
                 "trade_type": trade_type
             }):
-                result = _run_specialized_agent_with_retry(
+                result = await _run_specialized_agent_with_retry(
                     agent,
                     research_prompt,
                     max_turns=SPECIALIZED_AGENT_MAX_TURNS,
@@ -214,42 +256,8 @@ Begin your research now."""
                 )
             
             # Extract sources (tool invocations) - safely serialize to avoid ToolContext issues
-            sources = []
             try:
-                if hasattr(result, 'tool_invocations'):
-                    # Safely convert tool_invocations to serializable format
-                    tool_invocations = result.tool_invocations
-                    if tool_invocations:
-                        for inv in tool_invocations:
-                            try:
-                                # Try to convert to dict/string representation
-                                if isinstance(inv, dict):
-                                    sources.append(inv)
-                                elif hasattr(inv, '__dict__'):
-                                    # Convert object to dict, skipping non-serializable fields
-                                    inv_dict = {k: str(v) for k, v in inv.__dict__.items() if not k.startswith('_')}
-                                    sources.append(inv_dict)
-                                else:
-                                    sources.append(str(inv))
-                            except Exception:
-                                # Skip this invocation if it can't be serialized
-                                sources.append({"tool": "unknown", "error": "Could not serialize invocation"})
-                elif hasattr(result, 'steps'):
-                    # Extract tool calls from steps
-                    for step in result.steps:
-                        if hasattr(step, 'tool_calls'):
-                            for tool_call in step.tool_calls:
-                                try:
-                                    if isinstance(tool_call, dict):
-                                        sources.append(tool_call)
-                                    elif hasattr(tool_call, '__dict__'):
-                                        tool_call_dict = {k: str(v) for k, v in tool_call.__dict__.items() if not k.startswith('_')}
-                                        sources.append(tool_call_dict)
-                                    else:
-                                        sources.append(str(tool_call))
-                                except Exception:
-                                    # Skip this tool call if it can't be serialized
-                                    sources.append({"tool": "unknown", "error": "Could not serialize tool call"})
+                sources = _extract_sources(result)
             except Exception as sources_err:
                 # If extracting sources fails, just log and continue with empty list
                 print(f"Warning: Could not extract tool sources: {sources_err}")
@@ -278,6 +286,108 @@ Begin your research now."""
             }
 
 
+@functools.lru_cache(maxsize=4)
+def _shared_tools(mcp_client, perplexity_client) -> Tuple[FunctionTool, ...]:
+    """Build the tool wrappers once per MCP / Perplexity client pair (both are process-wide)."""
+    return tuple(create_all_tools(mcp_client, perplexity_client))
+
+
+@functools.lru_cache(maxsize=512)
+def _build_specialized_instructions(subject: ResearchSubject, ticker: str, trade_type: str) -> str:
+    """
+    Build a specialized agent's instructions, once per subject, ticker, and trade type.
+    
+    Args:
+        subject: ResearchSubject object
+        ticker: Stock ticker symbol
+        trade_type: Type of trade
+    
+    Returns:
+        System instructions string
+    """
+    # The research objective arrives as the user message (format_subject_prompt),
+    # so it isn't repeated here; the subject-specific lines come last to keep
+    # the shared prefix cacheable across subjects and tickers
+    instructions = f"""You are a specialized research analyst. Your research subject, ticker, and trade type are given at the end of these instructions; the user message holds your research objective.
+
+**Trade Type Context:**
+- Adjust your research depth and focus based on the trade type
+- For Day Trade: Focus on immediate, actionable insights
+- For Swing Trade: Focus on near-term factors (1-14 days)
+- For Investment: Focus on comprehensive, long-term analysis
+
+**Available Tools:**
+- Alpha Vantage MCP Tools: Use for structured financial data, company fundamentals, financial statements
+- Perplexity Research: Use for real-time information, news, expert analysis, qualitative insights
+
+**Output Requirements:**
+1. Provide comprehensive research findings on your research subject
+2. Include specific data points, metrics, and facts
+3. Cite all sources (tool outputs, research results)
+4. Structure your response clearly with:
+   - Key findings
+   - Supporting data
+   - Sources and citations
+   - Any relevant context or analysis
+
+**Important:**
+- Use both MCP tools and Perplexity research to gather comprehensive information
+- Be thorough and specific in your research
+- Ensure all claims are supported by data from your research tools
+- Format your response for easy integration into a final report
+
+Begin your research now.
+
+[SUBJECT]: {subject.name}
+[TASK]: {subject.description}
+[TICKER]: {ticker}
+[TYPE_OF_TRADE]: {trade_type}"""
+    
+    return instructions
+
+
+def _shorten_source_value(value: Any) -> str:
+    """Stringify a tool call field, keeping at most SOURCE_VALUE_MAX_CHARS characters."""
+    text = value if isinstance(value, str) else str(value)
+    if len(text) <= SOURCE_VALUE_MAX_CHARS:
+        return text
+    return text[:SOURCE_VALUE_MAX_CHARS] + "..."
+
+
+def _serialize_tool_call(call: Any) -> Any:
+    """Convert one tool invocation to a dict or string that survives JSON and prompt formatting."""
+    try:
+        if isinstance(call, dict):
+            return call
+        fields = getattr(call, "__dict__", None)
+        if fields is None:
+            return _shorten_source_value(call)
+        # Skip private fields (e.g. ToolContext), which don't serialize
+        return {k: _shorten_source_value(v) for k, v in fields.items() if not k.startswith('_')}
+    except Exception:
+        return {"tool": "unknown", "error": "Could not serialize tool call"}
+
+
+def _extract_sources(result: Any) -> List[Any]:
+    """
+    List the tool invocations an agent run made, as serializable sources.
+    
+    Args:
+        result: Runner result
+    
+    Returns:
+        One dict or string per tool invocation
+    """
+    calls = getattr(result, 'tool_invocations', None)
+    if calls is None and hasattr(result, 'steps'):
+        calls = (
+            call
+            for step in result.steps
+            for call in getattr(step, 'tool_calls', None) or ()
+        )
+    return [_serialize_tool_call(call) for call in calls or ()]
+
+
 def _is_rate_limit_error(exc: Exception) -> bool:
     """Heuristic check for OpenAI-style rate limit errors (429 / rate_limit)."""
     status = getattr(exc, "status_code", None)
@@ -287,33 +397,66 @@ def _is_rate_limit_error(exc: Exception) -> bool:
     return "rate limit" in message or "429" in message
 
 
-def _run_specialized_agent_with_retry(
+def _retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Read the server's Retry-After hint (seconds) from an HTTP error, if it sent one."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    for name in ("retry-after-ms", "retry-after"):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            seconds = float(value)
+        except ValueError:
+            continue  # HTTP-date form; fall back to exponential backoff
+        return seconds / 1000 if name == "retry-after-ms" else seconds
+    return None
+
+
+async def _wait_for_rate_limit():
+    """Sleep until the shared rate-limit pause set by any concurrent run has passed."""
+    remaining = _rate_limit_resume_at - time.monotonic()
+    if remaining > 0:
+        await asyncio.sleep(remaining)
+
+
+async def _run_specialized_agent_with_retry(
     agent: Agent,
     prompt: str,
     max_turns: int,
 ) -> Any:
     """
     Run a specialized agent with a small retry/backoff loop for rate limit errors.
+    
+    Waits for the server's Retry-After when given (exponential backoff
+    otherwise), plus jitter. The pause is shared, so concurrent subject runs
+    hold off together instead of each hitting the limit in turn.
     """
+    global _rate_limit_resume_at
     max_retries = int(os.getenv("AGENT_RATE_LIMIT_MAX_RETRIES", "3"))
     base_delay = float(os.getenv("AGENT_RATE_LIMIT_BACKOFF_SECONDS", "2.0"))
     last_exc: Optional[Exception] = None
 
     for attempt in range(max_retries):
+        await _wait_for_rate_limit()
         try:
-            return Runner.run_sync(agent, prompt, max_turns=max_turns)
+            return await Runner.run(agent, prompt, max_turns=max_turns)
         except Exception as exc:  # noqa: BLE001
             last_exc = exc
             is_rate_limit = _is_rate_limit_error(exc)
             is_last_attempt = attempt == max_retries - 1
             if not is_rate_limit or is_last_attempt:
                 raise
-            delay = base_delay * (2**attempt)
+            retry_after = _retry_after_seconds(exc)
+            delay = retry_after if retry_after is not None else base_delay * (2**attempt)
+            delay += random.uniform(0, base_delay / 2)
+            _rate_limit_resume_at = max(_rate_limit_resume_at, time.monotonic() + delay)
             print(
                 f"[SpecializedAgent] Rate limit encountered, retrying in {delay:.1f}s "
                 f"(attempt {attempt + 1}/{max_retries})"
             )
-            time.sleep(delay)
 
     if last_exc is not None:
         raise last_exc
@@ -2,21 +2,57 @@
 Synthesis agent that consolidates research outputs into a final business model report.
 """
 
+import asyncio
+import concurrent.futures
+import functools
+import io
+import json
 import os
-from typing import Dict, Any, List
-from concurrent.futures import ThreadPoolExecutor
+import re
+import threading
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Set
 from dotenv import load_dotenv
+import openai
 
-from agents import Agent, Runner, trace, ModelSettings
+from agents import Agent, Runner, RunConfig, trace, ModelSettings
+from openai.types.responses import ResponseTextDeltaEvent
+
+from embedding_service import get_http_client
+from http_clients import iterate_async, run_async
+from synthesis_cache import SynthesisCache, synthesis_cache_key
 
 load_dotenv()
 
+SYNTHESIS_MODEL = os.getenv("SYNTHESIS_MODEL", "gpt-4o")
+
 # Maximum output tokens for synthesis agent (configurable via env)
 # Higher limit needed since synthesis agent integrates multiple specialized research outputs
 SYNTHESIS_AGENT_MAX_OUTPUT_TOKENS = int(
     os.getenv("SYNTHESIS_AGENT_MAX_OUTPUT_TOKENS", "8000")
 )
 
+# Tidy research outputs before synthesis: trim whitespace, drop filler lines and
+# lines already given by an earlier subject (set false to send them verbatim)
+SYNTHESIS_COMPRESS_RESEARCH = os.getenv("SYNTHESIS_COMPRESS_RESEARCH", "true").lower() == "true"
+
+# Shorter lines (headings, rules, bullets like "- N/A") are never de-duplicated
+_DEDUP_MIN_LINE_CHARS = 40
+
+# Below this fraction of characters saved, the output is sent unchanged
+_MIN_COMPRESSION_SAVINGS = 0.05
+
+_TRAILING_SPACE_RE = re.compile(r"[ \t]+$", re.MULTILINE)
+_BLANK_RUN_RE = re.compile(r"\n{3,}")
+_NUMERIC_RE = re.compile(r"[\d$%]")
+_FILLER_LINE_RES = (
+    re.compile(r"^(?:sure|certainly|of course|absolutely)\b[!,.]", re.IGNORECASE),
+    re.compile(r"^(?:let me know if|feel free to|i hope this helps)\b", re.IGNORECASE),
+)
+
+# Syntheses running now, by cache key (module-level: each session has its own SynthesisAgent)
+_inflight_syntheses: Dict[str, "concurrent.futures.Future[str]"] = {}
+_inflight_lock = threading.Lock()
+
 
 class SynthesisAgent:
     """Agent that synthesizes multiple research outputs into a comprehensive report."""
@@ -31,13 +67,49 @@ class SynthesisAgent:
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable.")
+        
+        self.cache = SynthesisCache()
+        self._batch_client = None  # Lazy initialization - only for Batch API jobs
+    
+    @property
+    def batch_client(self) -> openai.OpenAI:
+        """OpenAI client for Batch API jobs."""
+        if self._batch_client is None:
+            self._batch_client = openai.OpenAI(api_key=self.api_key, http_client=get_http_client())
+        return self._batch_client
     
     def synthesize_report(
         self,
         ticker: str,
         trade_type: str,
         research_outputs: Dict[str, Dict[str, Any]],
-        context: str = ""
+        context: str = "",
+        use_cache: bool = True
+    ) -> str:
+        """
+        Synthesize all research outputs into a final business model report (blocking wrapper).
+        
+        Args:
+            ticker: Stock ticker symbol
+            trade_type: Type of trade
+            research_outputs: Dictionary mapping subject_id -> research results
+            context: Additional context from followup questions
+            use_cache: When False, always run the agent (the result is still cached)
+        
+        Returns:
+            Complete synthesized report text
+        """
+        return run_async(
+            self.async_synthesize_report(ticker, trade_type, research_outputs, context, use_cache)
+        )
+    
+    async def async_synthesize_report(
+        self,
+        ticker: str,
+        trade_type: str,
+        research_outputs: Dict[str, Dict[str, Any]],
+        context: str = "",
+        use_cache: bool = True
     ) -> str:
         """
         Synthesize all research outputs into a final business model report.
@@ -47,6 +119,7 @@ class SynthesisAgent:
             trade_type: Type of trade
             research_outputs: Dictionary mapping subject_id -> research results
             context: Additional context from followup questions
+            use_cache: When False, always run the agent (the result is still cached)
         
         Returns:
             Complete synthesized report text
@@ -59,44 +132,265 @@ class SynthesisAgent:
             context
         )
         
-        # Create synthesis agent
-        agent = Agent(
-            name="Synthesis Agent",
-            instructions=self._get_synthesis_instructions(ticker, trade_type),
-            model="gpt-4o",
-            tools=[],  # Synthesis agent doesn't need tools, it works with provided data
-            model_settings=ModelSettings(
-                temperature=0.7,
-                max_output_tokens=SYNTHESIS_AGENT_MAX_OUTPUT_TOKENS
+        agent = self._get_agent(ticker, trade_type)
+        
+        # Identical inputs (a retried or resubmitted report) reuse the earlier synthesis
+        cache_key = synthesis_cache_key(SYNTHESIS_MODEL, agent.instructions, synthesis_prompt)
+        if use_cache:
+            cached_report = self.cache.get(cache_key)
+            if cached_report is not None:
+                print(f"[Synthesis] Reusing cached report for {ticker} ({trade_type})")
+                return cached_report
+        
+        # Concurrent requests for the same inputs share one agent run
+        with _inflight_lock:
+            pending = _inflight_syntheses.get(cache_key)
+            is_owner = pending is None
+            if is_owner:
+                pending = concurrent.futures.Future()
+                _inflight_syntheses[cache_key] = pending
+        if not is_owner:
+            print(f"[Synthesis] Waiting for in-flight synthesis of {ticker} ({trade_type})")
+            # Shielded so a cancelled waiter can't cancel the shared future
+            return await asyncio.shield(asyncio.wrap_future(pending))
+        
+        try:
+            report = await self._run_synthesis(
+                agent, synthesis_prompt, cache_key, ticker, trade_type, len(research_outputs)
             )
+            pending.set_result(report)
+            return report
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with _inflight_lock:
+                _inflight_syntheses.pop(cache_key, None)
+    
+    def synthesize_report_stream(
+        self,
+        ticker: str,
+        trade_type: str,
+        research_outputs: Dict[str, Dict[str, Any]],
+        context: str = "",
+        use_cache: bool = True
+    ) -> Iterator[str]:
+        """
+        Synthesize the report, yielding text as the model produces it (blocking wrapper).
+        
+        Args:
+            ticker: Stock ticker symbol
+            trade_type: Type of trade
+            research_outputs: Dictionary mapping subject_id -> research results
+            context: Additional context from followup questions
+            use_cache: When False, always run the agent (the result is still cached)
+        
+        Yields:
+            Report text fragments; "".join() of them is the full report
+        """
+        return iterate_async(
+            self.async_synthesize_report_stream(ticker, trade_type, research_outputs, context, use_cache)
         )
+    
+    async def async_synthesize_report_stream(
+        self,
+        ticker: str,
+        trade_type: str,
+        research_outputs: Dict[str, Dict[str, Any]],
+        context: str = "",
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        Synthesize the report, yielding text as the model produces it.
+        
+        A cached report is yielded in one piece. Streamed runs are not
+        coalesced with concurrent identical requests; the finished report is
+        cached like a regular synthesis.
+        
+        Args:
+            ticker: Stock ticker symbol
+            trade_type: Type of trade
+            research_outputs: Dictionary mapping subject_id -> research results
+            context: Additional context from followup questions
+            use_cache: When False, always run the agent (the result is still cached)
+        
+        Yields:
+            Report text fragments; "".join() of them is the full report
+        """
+        synthesis_prompt = self._build_synthesis_prompt(ticker, trade_type, research_outputs, context)
+        agent = self._get_agent(ticker, trade_type)
+        
+        cache_key = synthesis_cache_key(SYNTHESIS_MODEL, agent.instructions, synthesis_prompt)
+        if use_cache:
+            cached_report = self.cache.get(cache_key)
+            if cached_report is not None:
+                print(f"[Synthesis] Reusing cached report for {ticker} ({trade_type})")
+                yield cached_report
+                return
+        
+        parts = []
+        try:
+            # Traced through RunConfig rather than a trace() block: each step of a
+            # generator drained by iterate_async runs in its own context, so a
+            # context manager held open across yields couldn't be exited cleanly
+            result = Runner.run_streamed(
+                agent,
+                synthesis_prompt,
+                max_turns=10,
+                run_config=RunConfig(
+                    workflow_name="Report Synthesis",
+                    trace_metadata={
+                        "ticker": ticker,
+                        "trade_type": trade_type,
+                        "subjects_count": str(len(research_outputs))
+                    }
+                )
+            )
+            async for event in result.stream_events():
+                if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                    parts.append(event.data.delta)
+                    yield event.data.delta
+        except Exception as e:
+            error_msg = f"Error synthesizing report: {str(e)}"
+            print(error_msg)
+            yield error_msg
+            return
+        
+        self.cache.set(cache_key, "".join(parts))
+    
+    def synthesize_reports_batch(self, jobs: List[Dict[str, Any]]) -> str:
+        """
+        Submit syntheses to the OpenAI Batch API (half price, results within 24h).
+        
+        For background refreshes that don't need the report right away. Each
+        request's custom_id is its synthesis cache key, so once
+        ingest_report_batch() has run (with SYNTHESIS_CACHE_ENABLED=true),
+        synthesize_report() for the same inputs returns the batched report
+        without calling the model.
         
+        Args:
+            jobs: One dict per report with ticker, trade_type, research_outputs,
+                and optional context (same arguments as synthesize_report)
+        
+        Returns:
+            Batch ID to pass to ingest_report_batch
+        """
+        requests_by_key = {}
+        for job in jobs:
+            ticker = job["ticker"]
+            trade_type = job["trade_type"]
+            synthesis_prompt = self._build_synthesis_prompt(
+                ticker, trade_type, job["research_outputs"], job.get("context", "")
+            )
+            instructions = self._get_synthesis_instructions(ticker, trade_type)
+            cache_key = synthesis_cache_key(SYNTHESIS_MODEL, instructions, synthesis_prompt)
+            # Identical jobs share one request (the Batch API rejects duplicate custom_ids)
+            requests_by_key[cache_key] = {
+                "custom_id": cache_key,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": SYNTHESIS_MODEL,
+                    "temperature": 0.7,
+                    "max_tokens": SYNTHESIS_AGENT_MAX_OUTPUT_TOKENS,
+                    "messages": [
+                        {"role": "system", "content": instructions},
+                        {"role": "user", "content": synthesis_prompt}
+                    ]
+                }
+            }
+        
+        data = "\n".join(json.dumps(request) for request in requests_by_key.values()).encode()
+        try:
+            input_file = self.batch_client.files.create(
+                file=("report_synthesis_batch.jsonl", data), purpose="batch"
+            )
+            batch = self.batch_client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h",
+                metadata={"job": "report_synthesis"}
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to submit synthesis batch: {e}")
+        
+        print(f"[Synthesis] Submitted batch {batch.id} with {len(requests_by_key)} reports")
+        return batch.id
+    
+    def ingest_report_batch(self, batch_id: str) -> Optional[Dict[str, str]]:
+        """
+        Collect a finished synthesis batch into the report cache.
+        
+        Args:
+            batch_id: ID returned by synthesize_reports_batch
+        
+        Returns:
+            Report text by cache key, or None if the batch hasn't finished yet
+        """
+        try:
+            batch = self.batch_client.batches.retrieve(batch_id)
+            if batch.status != "completed":
+                print(f"[Synthesis] Batch {batch_id} is {batch.status}")
+                return None
+            if not batch.output_file_id:
+                return {}
+            content = self.batch_client.files.content(batch.output_file_id).text
+        except Exception as e:
+            raise RuntimeError(f"Failed to fetch synthesis batch {batch_id}: {e}")
+        
+        reports = {}
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                print(f"Warning: Batch request {record.get('custom_id')} failed: {record.get('error')}")
+                continue
+            choices = response.get("body", {}).get("choices") or []
+            report = choices[0].get("message", {}).get("content") if choices else None
+            if report:
+                reports[record["custom_id"]] = report
+                self.cache.set(record["custom_id"], report)
+        return reports
+    
+    async def _run_synthesis(
+        self,
+        agent: Agent,
+        synthesis_prompt: str,
+        cache_key: str,
+        ticker: str,
+        trade_type: str,
+        subjects_count: int
+    ) -> str:
+        """
+        Run the synthesis agent and cache its report.
+        
+        Args:
+            agent: Synthesis agent for the ticker and trade type
+            synthesis_prompt: Prompt holding all research outputs
+            cache_key: Key from synthesis_cache_key
+            ticker: Stock ticker symbol
+            trade_type: Type of trade
+            subjects_count: Number of research subjects in the prompt
+        
+        Returns:
+            Report text, or an error message if the run failed
+        """
         # Execute synthesis
         try:
             with trace("Report Synthesis", metadata={
                 "ticker": ticker,
                 "trade_type": trade_type,
-                "subjects_count": str(len(research_outputs))  # Fixed: cast to string for tracing API
+                "subjects_count": str(subjects_count)  # Fixed: cast to string for tracing API
             }):
-                # Run in a thread to avoid event loop conflicts (similar to specialized agents)
-                # This ensures Runner.run_sync() works even when called from a context with an active event loop
-                def _run_synthesis_in_thread():
-                    return Runner.run_sync(agent, synthesis_prompt, max_turns=10)
-                
-                with ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(_run_synthesis_in_thread)
-                    result = future.result()
+                result = await Runner.run(agent, synthesis_prompt, max_turns=10)
             
-            # Extract output
-            if hasattr(result, 'final_output'):
-                report = result.final_output
-            elif hasattr(result, 'output'):
-                report = result.output
-            elif isinstance(result, str):
-                report = result
-            else:
-                report = str(result)
+            # Runner.run always returns a RunResult; without an output_type its
+            # final_output is the report text (str() is a no-op on a str)
+            report = str(result.final_output)
             
+            self.cache.set(cache_key, report)
             return report
             
         except Exception as e:
@@ -104,7 +398,35 @@ class SynthesisAgent:
             print(error_msg)
             return error_msg
     
-    def _get_synthesis_instructions(self, ticker: str, trade_type: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _get_agent(ticker: str, trade_type: str) -> Agent:
+        """
+        Get the synthesis agent for a ticker and trade type, built once per pair.
+        
+        The agent only holds configuration, so concurrent and later runs share it.
+        
+        Args:
+            ticker: Stock ticker symbol
+            trade_type: Type of trade
+        
+        Returns:
+            Configured synthesis Agent
+        """
+        return Agent(
+            name="Synthesis Agent",
+            instructions=SynthesisAgent._get_synthesis_instructions(ticker, trade_type),
+            model=SYNTHESIS_MODEL,
+            tools=[],  # Synthesis agent doesn't need tools, it works with provided data
+            model_settings=ModelSettings(
+                temperature=0.7,
+                max_output_tokens=SYNTHESIS_AGENT_MAX_OUTPUT_TOKENS
+            )
+        )
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _get_synthesis_instructions(ticker: str, trade_type: str) -> str:
         """
         Get system instructions for the synthesis agent.
         
@@ -184,67 +506,101 @@ Integrate and structure research findings from multiple specialized research age
         Returns:
             Formatted synthesis prompt
         """
-        prompt_parts = [
-            f"**TASK: Synthesize specialized research findings into a comprehensive business model report for {ticker} ({trade_type})**",
-            "",
-            "**CRITICAL INSTRUCTIONS - READ CAREFULLY:**",
-            "",
-            f"The specialized research agents below have conducted detailed, in-depth research on different aspects of {ticker}'s business model. Each agent has provided comprehensive findings with specific data points, metrics, numbers, facts, and detailed analysis.",
-            "",
-            "**YOUR RESPONSIBILITY:**",
-            "- **PRESERVE ALL DETAILS**: Include ALL specific metrics, numbers, percentages, dollar amounts, dates, and quantitative data from each research output",
-            "- **PRESERVE ALL FACTS**: Include ALL specific facts, findings, examples, and qualitative insights from each research output",
-            "- **INTEGRATE, DON'T SUMMARIZE**: Your job is to integrate this detailed information into a well-structured report, NOT to condense or summarize away the details",
-            "- **USE ALL INFORMATION**: Fully utilize all the detailed research findings - specialized agents have done comprehensive work that should be preserved in the final report",
-            "- **MAINTAIN DEPTH**: Maintain the depth and specificity of analysis provided by the specialized research agents",
-            "- **INCLUDE SPECIFIC DATA**: Each section of your report should include specific data points, metrics, and detailed information - avoid high-level summaries",
-            "- **CROSS-REFERENCE**: Where information from different research subjects connects, make those relationships explicit using the detailed data provided",
-            "",
-            "The specialized agents have invested significant effort in gathering detailed information. Your synthesis should reflect and preserve this comprehensive research, not reduce it to bullet points or high-level summaries.",
-            "",
-            "**Research Findings from Specialized Agents:**",
-            ""
-        ]
+        buf = io.StringIO()
+        w = buf.write
+        w(
+            f"**TASK: Synthesize specialized research findings into a comprehensive business model report for {ticker} ({trade_type})**\n"
+            "\n"
+            "**CRITICAL INSTRUCTIONS - READ CAREFULLY:**\n"
+            "\n"
+            f"The specialized research agents below have conducted detailed, in-depth research on different aspects of {ticker}'s business model. Each agent has provided comprehensive findings with specific data points, metrics, numbers, facts, and detailed analysis.\n"
+            "\n"
+            "**YOUR RESPONSIBILITY:**\n"
+            "- **PRESERVE ALL DETAILS**: Include ALL specific metrics, numbers, percentages, dollar amounts, dates, and quantitative data from each research output\n"
+            "- **PRESERVE ALL FACTS**: Include ALL specific facts, findings, examples, and qualitative insights from each research output\n"
+            "- **INTEGRATE, DON'T SUMMARIZE**: Your job is to integrate this detailed information into a well-structured report, NOT to condense or summarize away the details\n"
+            "- **USE ALL INFORMATION**: Fully utilize all the detailed research findings - specialized agents have done comprehensive work that should be preserved in the final report\n"
+            "- **MAINTAIN DEPTH**: Maintain the depth and specificity of analysis provided by the specialized research agents\n"
+            "- **INCLUDE SPECIFIC DATA**: Each section of your report should include specific data points, metrics, and detailed information - avoid high-level summaries\n"
+            "- **CROSS-REFERENCE**: Where information from different research subjects connects, make those relationships explicit using the detailed data provided\n"
+            "\n"
+            "The specialized agents have invested significant effort in gathering detailed information. Your synthesis should reflect and preserve this comprehensive research, not reduce it to bullet points or high-level summaries.\n"
+            "\n"
+            "**Research Findings from Specialized Agents:**\n"
+            "\n"
+        )
         
         # Add each research output
+        seen_lines: Set[str] = set()
         for subject_id, result in research_outputs.items():
             subject_name = result.get("subject_name", subject_id)
             research_output = result.get("research_output", "No research output available")
             sources = result.get("sources", [])
+            if SYNTHESIS_COMPRESS_RESEARCH:
+                research_output = _compress_research(research_output, seen_lines)
             
-            prompt_parts.append(f"### {subject_name} - Detailed Research Output")
-            prompt_parts.append("")
-            prompt_parts.append("**Comprehensive Research Findings (preserve all details from this output):**")
-            prompt_parts.append(research_output)
+            w(f"### {subject_name} - Detailed Research Output\n\n")
+            w("**Comprehensive Research Findings (preserve all details from this output):**\n")
+            w(research_output)
+            w("\n")
             
             if sources:
-                prompt_parts.append("")
-                prompt_parts.append("**Sources Used by This Research Agent:**")
-                for i, source in enumerate(sources, 1):
-                    prompt_parts.append(f"{i}. {source}")
+                w("\n**Sources Used by This Research Agent:**\n")
+                w("\n".join(f"{i}. {source}" for i, source in enumerate(sources, 1)))
+                w("\n")
             
-            prompt_parts.append("")
-            prompt_parts.append("---")
-            prompt_parts.append("")
+            w("\n---\n\n")
         
         if context:
-            prompt_parts.append("")
-            prompt_parts.append("**Additional Context from User:**")
-            prompt_parts.append(context)
-            prompt_parts.append("")
-        
-        prompt_parts.append("")
-        prompt_parts.append("**FINAL INSTRUCTIONS:**")
-        prompt_parts.append("")
-        prompt_parts.append("Now create a comprehensive, detailed business model report that:")
-        prompt_parts.append("1. Integrates all the detailed research findings above into a well-structured format")
-        prompt_parts.append("2. Preserves ALL specific metrics, numbers, facts, and detailed information from each research output")
-        prompt_parts.append("3. Includes specific data points (percentages, dollar amounts, dates, quantities) throughout the report")
-        prompt_parts.append("4. Maintains the depth and comprehensiveness of the specialized research")
-        prompt_parts.append("5. Clearly cites all sources from the research outputs")
-        prompt_parts.append("6. Draws connections between different research subjects where relevant")
-        prompt_parts.append("")
-        prompt_parts.append("Remember: The goal is comprehensive integration of detailed information, NOT summarization or condensation. Use all the detailed findings provided by the specialized research agents.")
-        
-        return "\n".join(prompt_parts)
+            w("\n**Additional Context from User:**\n")
+            w(context)
+            w("\n\n")
+        
+        w(
+            "\n"
+            "**FINAL INSTRUCTIONS:**\n"
+            "\n"
+            "Now create a comprehensive, detailed business model report that:\n"
+            "1. Integrates all the detailed research findings above into a well-structured format\n"
+            "2. Preserves ALL specific metrics, numbers, facts, and detailed information from each research output\n"
+            "3. Includes specific data points (percentages, dollar amounts, dates, quantities) throughout the report\n"
+            "4. Maintains the depth and comprehensiveness of the specialized research\n"
+            "5. Clearly cites all sources from the research outputs\n"
+            "6. Draws connections between different research subjects where relevant\n"
+            "\n"
+            "Remember: The goal is comprehensive integration of detailed information, NOT summarization or condensation. Use all the detailed findings provided by the specialized research agents."
+        )
+        
+        return buf.getvalue()
+
 
+def _compress_research(text: str, seen_lines: Set[str]) -> str:
+    """
+    Shrink a research output without dropping any data.
+    
+    Strips trailing whitespace, removes conversational filler lines (never
+    ones holding a number, $ or %), drops long lines already seen in an
+    earlier output, and collapses blank-line runs.
+    
+    Args:
+        text: Research output
+        seen_lines: Long lines from earlier outputs in the same prompt (updated in place)
+    
+    Returns:
+        Compressed text, or the original when compression saves under 5%
+    """
+    kept = []
+    for line in _TRAILING_SPACE_RE.sub("", text).split("\n"):
+        key = line.strip()
+        if not _NUMERIC_RE.search(key) and any(filler.match(key) for filler in _FILLER_LINE_RES):
+            continue
+        if len(key) >= _DEDUP_MIN_LINE_CHARS:
+            if key in seen_lines:
+                continue
+            seen_lines.add(key)
+        kept.append(line)
+    compact = _BLANK_RUN_RE.sub("\n\n", "\n".join(kept)).strip()
+    
+    if len(text) - len(compact) < len(text) * _MIN_COMPRESSION_SAVINGS:
+        return text
+    return compact
@@ -0,0 +1,121 @@
+"""
+On-disk TTL cache for synthesized reports.
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Opt-in: set SYNTHESIS_CACHE_ENABLED=true to reuse reports for identical research inputs.
+# Expired files are only skipped, never deleted; clear the directory to reclaim space.
+SYNTHESIS_CACHE_ENABLED = os.getenv("SYNTHESIS_CACHE_ENABLED", "false").lower() == "true"
+SYNTHESIS_CACHE_DIR = Path(os.getenv(
+    "SYNTHESIS_CACHE_DIR", str(Path.home() / ".cache" / "stock_ai" / "synthesis")
+)).expanduser()
+
+# Seconds a synthesized report is reused for identical research inputs
+SYNTHESIS_CACHE_TTL_SECONDS = int(os.getenv("SYNTHESIS_CACHE_TTL_SECONDS", "86400"))
+
+
+def synthesis_cache_key(model: str, instructions: str, prompt: str) -> str:
+    """
+    Return the cache key for a synthesis run.
+
+    The prompt already embeds the ticker, trade type, every research output,
+    and the user context, and the instructions change whenever the report
+    format does, so the key needs no separate version number.
+
+    Args:
+        model: Synthesis model name
+        instructions: Synthesis agent instructions
+        prompt: Synthesis prompt
+
+    Returns:
+        Hex digest identifying the run's inputs
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (model, instructions, prompt):
+        data = part.encode()
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class SynthesisCache:
+    """Gzipped report text keyed by synthesis inputs, expired by file age."""
+
+    def __init__(
+        self,
+        cache_dir: Path = SYNTHESIS_CACHE_DIR,
+        ttl_seconds: int = SYNTHESIS_CACHE_TTL_SECONDS,
+        enabled: bool = SYNTHESIS_CACHE_ENABLED
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding cached reports
+            ttl_seconds: Seconds a cached report stays fresh
+            enabled: When False, get() always misses and set() does nothing
+        """
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+
+    def _path(self, key: str) -> Path:
+        """Return the cache file for a key."""
+        return self.cache_dir / f"{key}.txt.gz"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return a fresh cached report, or None.
+
+        Args:
+            key: Key from synthesis_cache_key
+
+        Returns:
+            Cached report text, or None if missing, expired, or unreadable
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+            return gzip.decompress(path.read_bytes()).decode()
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, report: str):
+        """
+        Store a report.
+
+        Written to a temporary file and renamed into place so concurrent
+        readers never see a partial file.
+
+        Args:
+            key: Key from synthesis_cache_key
+            report: Synthesized report text
+        """
+        if not self.enabled or not report:
+            return
+        tmp_path = None
+        try:
+            data = gzip.compress(report.encode(), compresslevel=6)
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Warning: Failed to cache synthesized report: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
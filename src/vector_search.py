@@ -3,11 +3,169 @@ Vector search service for finding relevant chunks using cosine similarity.
 """
 
 import json
+import os
+import threading
+from collections import OrderedDict
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+from dotenv import load_dotenv
 
 from database import get_database_manager
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json works the same
+    orjson = None
+
+try:
+    from usearch.index import Index as HNSWIndex
+except ImportError:  # Optional; small reports are searched exactly
+    HNSWIndex = None
+
+load_dotenv()
+
+# Reports with at least this many chunks get an HNSW index (when usearch is installed)
+VECTOR_ANN_MIN_CHUNKS = int(os.getenv("VECTOR_ANN_MIN_CHUNKS", "1000"))
+
+# Number of per-report indexes kept in memory
+VECTOR_INDEX_CACHE_SIZE = int(os.getenv("VECTOR_INDEX_CACHE_SIZE", "32"))
+
+
+def _json_loads(data):
+    """Parse a JSON-encoded embedding (legacy rows store embeddings as JSON text)."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class ReportIndex:
+    """Chunks of one report, searchable by embedding."""
+
+    def __init__(self, chunks: List[Dict[str, Any]], matrix: Optional[np.ndarray] = None):
+        """
+        Build the index.
+
+        Args:
+            chunks: Chunk rows from get_chunks_by_report(include_embeddings=True),
+                or rows without embeddings when matrix is given
+            matrix: (N, D) embeddings for chunks, in the same order
+        """
+        if matrix is None:
+            embedded = [chunk for chunk in chunks if chunk.get('embedding') is not None]
+            self.chunks = [{k: v for k, v in chunk.items() if k != 'embedding'} for chunk in embedded]
+            matrix = None
+            # Rows are copied straight into one preallocated buffer (no per-row arrays)
+            for row, chunk in enumerate(embedded):
+                embedding = chunk['embedding']
+                if isinstance(embedding, str):
+                    embedding = _json_loads(embedding)
+                if matrix is None:
+                    matrix = np.empty((len(embedded), len(embedding)), dtype=np.float32)
+                matrix[row] = embedding
+        else:
+            self.chunks = list(chunks)
+
+        # Chunk positions per section, so a section search scores only its own rows
+        section_positions: Dict[Any, List[int]] = {}
+        for position, chunk in enumerate(self.chunks):
+            section_positions.setdefault(chunk.get('section'), []).append(position)
+        self.sections = {
+            section: np.asarray(positions, dtype=np.intp)
+            for section, positions in section_positions.items()
+        }
+
+        # One contiguous (N, D) matrix of unit rows: cosine similarity is a single matmul
+        if matrix is not None and len(matrix):
+            self.matrix = np.ascontiguousarray(normalize_rows(matrix))
+        else:
+            self.matrix = np.empty((0, 0), dtype=np.float32)
+
+        self.ann = None
+        if HNSWIndex is not None and len(self.chunks) >= VECTOR_ANN_MIN_CHUNKS:
+            self.ann = HNSWIndex(
+                ndim=self.matrix.shape[1],
+                metric='cos',
+                connectivity=16,
+                expansion_add=64,
+                expansion_search=100,
+            )
+            self.ann.add(np.arange(len(self.chunks)), self.matrix)
+
+    def search(
+        self,
+        query_vec: np.ndarray,
+        top_k: int,
+        positions: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the chunks closest to a query.
+
+        Args:
+            query_vec: Query embedding vector
+            top_k: Number of results
+            positions: Restrict the search to these chunk positions (exact search)
+
+        Returns:
+            (position in self.chunks, cosine similarity) pairs, most similar first
+        """
+        if not self.chunks or top_k <= 0:
+            return []
+
+        query = normalize_rows(np.asarray(query_vec, dtype=np.float32))
+
+        if self.ann is not None and positions is None:
+            matches = self.ann.search(query, top_k)
+            return [(int(key), 1.0 - float(distance)) for key, distance in zip(matches.keys, matches.distances)]
+
+        if positions is None:
+            scores = self.matrix @ query
+        else:
+            positions = np.asarray(positions, dtype=np.intp)
+            if positions.size == 0:
+                return []
+            scores = self.matrix[positions] @ query
+
+        # Partial selection is O(N); only the top_k winners get sorted
+        if top_k < scores.shape[0]:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            top = np.arange(scores.shape[0])
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        if positions is not None:
+            return [(int(positions[i]), float(scores[i])) for i in top]
+        return [(int(i), float(scores[i])) for i in top]
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scale vectors to unit length, leaving zero vectors at zero.
+
+    Args:
+        vectors: A vector or a (N, D) matrix of row vectors
+
+    Returns:
+        float32 array of the same shape
+    """
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+# Report chunks never change after saving, so indexes stay valid until the report is deleted
+_report_indexes: "OrderedDict[str, ReportIndex]" = OrderedDict()
+_report_indexes_lock = threading.Lock()
+
+
+def invalidate_report_index(report_id: str):
+    """
+    Drop the cached index for a report.
+
+    Args:
+        report_id: Report ID
+    """
+    with _report_indexes_lock:
+        _report_indexes.pop(report_id, None)
+
 
 class VectorSearch:
     """Service for vector similarity search over report chunks."""
@@ -28,7 +186,8 @@ class VectorSearch:
         report_id: str,
         query_embedding: List[float],
         top_k: int = 5,
-        min_score: float = 0.0
+        min_score: float = 0.0,
+        section: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for top-k most relevant chunks using cosine similarity.
@@ -38,50 +197,69 @@ class VectorSearch:
             query_embedding: Query embedding vector
             top_k: Number of top results to return
             min_score: Minimum similarity score threshold
+            section: Only search chunks from this section
         
         Returns:
             List of chunk dictionaries with similarity scores, sorted by relevance
         """
-        # Get all chunks for the report with embeddings
-        chunks = self.db.get_chunks_by_report(report_id, include_embeddings=True)
+        index = self.get_report_index(report_id)
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
+
+        positions = None
+        if section is not None:
+            positions = index.sections.get(section)
+            if positions is None:
+                return []
+
+        results = []
+        for position, similarity in index.search(query_vec, top_k, positions=positions):
+            if similarity >= min_score:
+                results.append(self._result(index.chunks[position], similarity))
+        return results
+    
+    def get_report_index(self, report_id: str) -> ReportIndex:
+        """
+        Get the search index for a report, building it on first use.
         
-        if not chunks:
-            return []
+        Args:
+            report_id: Report ID
         
-        # Convert query embedding to numpy array
-        query_vec = np.array(query_embedding)
+        Returns:
+            ReportIndex over the report's chunks
+        """
+        with _report_indexes_lock:
+            index = _report_indexes.get(report_id)
+            if index is not None:
+                _report_indexes.move_to_end(report_id)
+                return index
         
-        # Calculate cosine similarity for each chunk
-        results = []
-        for chunk in chunks:
-            if not chunk.get('embedding'):
-                continue
-            
-            # Parse embedding if it's a JSON string
-            embedding = chunk['embedding']
-            if isinstance(embedding, str):
-                embedding = json.loads(embedding)
-            
-            chunk_vec = np.array(embedding)
-            
-            # Calculate cosine similarity
-            similarity = self._cosine_similarity(query_vec, chunk_vec)
-            
-            if similarity >= min_score:
-                results.append({
-                    'chunk_id': chunk['chunk_id'],
-                    'chunk_text': chunk['chunk_text'],
-                    'section': chunk.get('section'),
-                    'chunk_index': chunk['chunk_index'],
-                    'similarity_score': float(similarity),
-                    'created_at': chunk.get('created_at')
-                })
+        index = self._load_report_index(report_id)
+        if not index.chunks:
+            # Don't cache a miss; the report may not have been saved yet
+            return index
+        
+        with _report_indexes_lock:
+            _report_indexes[report_id] = index
+            while len(_report_indexes) > VECTOR_INDEX_CACHE_SIZE:
+                _report_indexes.popitem(last=False)
+        return index
+    
+    def _load_report_index(self, report_id: str) -> ReportIndex:
+        """
+        Build a report's index from the database.
         
-        # Sort by similarity score (descending)
-        results.sort(key=lambda x: x['similarity_score'], reverse=True)
+        Uses the report's stored embedding matrix when it has one, so no
+        per-chunk embedding is decoded; older reports fall back to the
+        embeddings on each chunk row.
+        """
+        stored = self.db.get_report_embeddings(report_id)
+        if stored is not None:
+            chunk_ids, matrix = stored
+            rows = {c['chunk_id']: c for c in self.db.get_chunks_by_report(report_id, include_embeddings=False)}
+            if len(rows) == len(chunk_ids) and all(chunk_id in rows for chunk_id in chunk_ids):
+                return ReportIndex([rows[chunk_id] for chunk_id in chunk_ids], matrix)
         
-        # Return top-k
-        return results[:top_k]
+        return ReportIndex(self.db.get_chunks_by_report(report_id, include_embeddings=True))
     
     def search_chunks_by_section(
         self,
@@ -102,64 +280,21 @@ class VectorSearch:
         Returns:
             List of relevant chunks from the specified section
         """
-        # Get all chunks and filter by section
-        chunks = self.db.get_chunks_by_report(report_id, include_embeddings=True)
-        section_chunks = [c for c in chunks if c.get('section') == section]
-        
-        if not section_chunks:
-            return []
-        
-        # Calculate similarities
-        query_vec = np.array(query_embedding)
-        results = []
-        
-        for chunk in section_chunks:
-            if not chunk.get('embedding'):
-                continue
-            
-            embedding = chunk['embedding']
-            if isinstance(embedding, str):
-                embedding = json.loads(embedding)
-            
-            chunk_vec = np.array(embedding)
-            similarity = self._cosine_similarity(query_vec, chunk_vec)
-            
-            results.append({
-                'chunk_id': chunk['chunk_id'],
-                'chunk_text': chunk['chunk_text'],
-                'section': chunk.get('section'),
-                'chunk_index': chunk['chunk_index'],
-                'similarity_score': float(similarity),
-                'created_at': chunk.get('created_at')
-            })
-        
-        # Sort and return top-k
-        results.sort(key=lambda x: x['similarity_score'], reverse=True)
-        return results[:top_k]
+        # No score floor: every chunk in the section is a candidate
+        return self.search_chunks(
+            report_id, query_embedding, top_k=top_k, min_score=float('-inf'), section=section
+        )
     
-    def _cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
-        """
-        Calculate cosine similarity between two vectors.
-        
-        Args:
-            vec1: First vector
-            vec2: Second vector
-        
-        Returns:
-            Cosine similarity score (0 to 1)
-        """
-        # Normalize vectors
-        norm1 = np.linalg.norm(vec1)
-        norm2 = np.linalg.norm(vec2)
-        
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
-        
-        # Calculate cosine similarity
-        dot_product = np.dot(vec1, vec2)
-        similarity = dot_product / (norm1 * norm2)
-        
-        return float(similarity)
+    def _result(self, chunk: Dict[str, Any], similarity: float) -> Dict[str, Any]:
+        """Build a search result from a chunk row."""
+        return {
+            'chunk_id': chunk['chunk_id'],
+            'chunk_text': chunk['chunk_text'],
+            'section': chunk.get('section'),
+            'chunk_index': chunk['chunk_index'],
+            'similarity_score': float(similarity),
+            'created_at': chunk.get('created_at')
+        }
     
     def get_all_chunks(self, report_id: str) -> List[Dict[str, Any]]:
         """
@@ -5,93 +5,181 @@ Run this to verify your environment is configured correctly.
 
 import os
 import sys
-from pathlib import Path
+
+# Status markers, with ASCII fallbacks for consoles that can't encode them (e.g. cp1252)
+if (getattr(sys.stdout, "encoding", None) or "").lower().startswith("utf"):
+    _OK, _ERR, _WARN = "✓", "❌", "⚠️"
+else:
+    _OK, _ERR, _WARN = "[OK]", "[ERR]", "[WARN]"
+
+# (distribution name, import name) of each package the app needs
+REQUIRED_PACKAGES = (
+    ("openai", "openai"),
+    ("gradio", "gradio"),
+    ("python-dotenv", "dotenv"),
+)
+
+# Values copied from .env.example that don't count as a configured key
+_PLACEHOLDER_VALUES = frozenset({"your_openai_api_key_here", "your_alpha_vantage_api_key_here"})
+
+# Parsed .env contents keyed by (path, mtime), so repeat checks in one process skip the file read
+_DOTENV_CACHE = {}
+
+
+def _stat(path):
+    """Return os.stat(path), or None if the file doesn't exist."""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _load_dotenv_once(path=".env", st=None):
+    """Load .env into os.environ (existing variables win), parsing each version of the file once."""
+    st = st or _stat(path)
+    key = (path, st.st_mtime_ns if st else None)
+    if key in _DOTENV_CACHE:
+        return
+    from dotenv import dotenv_values
+    _DOTENV_CACHE[key] = dotenv_values(path) if st else {}
+    for name, value in _DOTENV_CACHE[key].items():
+        if name not in os.environ and value is not None:
+            os.environ[name] = value
+
+
+# mcp.json check results keyed by (path, mtime)
+_MCP_CACHE = {}
+
+
+def _check_mcp_config(path, st):
+    """
+    Check mcp.json for a placeholder key and valid JSON, once per version of the file.
+    
+    Args:
+        path: mcp.json path
+        st: os.stat result for path
+    
+    Returns:
+        Tuple of (configured, message)
+    """
+    key = (path, st.st_mtime_ns)
+    if key not in _MCP_CACHE:
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            # Scan the raw bytes; a placeholder file doesn't need parsing at all
+            if b"YOUR_API_KEY" in raw:
+                _MCP_CACHE[key] = (False, "mcp.json contains placeholder API key")
+            else:
+                try:
+                    from orjson import loads
+                except ImportError:  # Optional speedup; stdlib json works the same
+                    from json import loads
+                loads(raw)
+                _MCP_CACHE[key] = (True, "mcp.json appears to be configured")
+        except Exception as e:
+            _MCP_CACHE[key] = (False, f"Could not parse mcp.json: {e}")
+    return _MCP_CACHE[key]
+
 
 def check_environment():
     """Check if environment is set up correctly."""
-    print("Checking environment setup...\n")
+    # Report lines are written in one go at the end instead of one print per check
+    out = []
+    try:
+        return _run_checks(out)
+    finally:
+        sys.stdout.write("\n".join(out) + "\n")
+
+
+def _run_checks(out):
+    """
+    Run the setup checks.
+    
+    Args:
+        out: List the report lines are appended to
+    
+    Returns:
+        True if no critical errors were found
+    """
+    # Deferred so that importing this module (e.g. to reuse check_environment)
+    # loads nothing beyond os and sys; dotenv and json are likewise imported where used
+    import importlib.util
+    
+    out.append("Checking environment setup...\n")
     
     errors = []
     warnings = []
     
     # Check Python version
-    if sys.version_info < (3, 10):
+    version = sys.version_info
+    if version < (3, 10):
         errors.append(f"Python 3.10+ required, found {sys.version}")
     else:
-        print(f"✓ Python version: {sys.version.split()[0]}")
+        out.append(f"{_OK} Python version: {version.major}.{version.minor}.{version.micro}")
     
     # Check for .env file
-    env_file = Path(".env")
-    if not env_file.exists():
+    env_st = _stat(".env")
+    if env_st is None:
         warnings.append(".env file not found. Please create it from .env.example")
     else:
-        print("✓ .env file exists")
+        out.append(f"{_OK} .env file exists")
     
     # Check for required environment variables
-    from dotenv import load_dotenv
-    load_dotenv()
+    _load_dotenv_once(".env", env_st)
     
-    openai_key = os.getenv("OPENAI_API_KEY")
-    if not openai_key or openai_key == "your_openai_api_key_here":
-        errors.append("OPENAI_API_KEY not set in .env file")
-    else:
-        print("✓ OPENAI_API_KEY is set")
-    
-    alpha_vantage_key = os.getenv("ALPHA_VANTAGE_API_KEY")
-    if not alpha_vantage_key or alpha_vantage_key == "your_alpha_vantage_api_key_here":
-        warnings.append("ALPHA_VANTAGE_API_KEY not set in .env file (may be in mcp.json)")
-    else:
-        print("✓ ALPHA_VANTAGE_API_KEY is set")
+    for var, problems, message in (
+        ("OPENAI_API_KEY", errors, "OPENAI_API_KEY not set in .env file"),
+        ("ALPHA_VANTAGE_API_KEY", warnings, "ALPHA_VANTAGE_API_KEY not set in .env file (may be in mcp.json)"),
+    ):
+        value = os.environ.get(var)
+        if not value or value in _PLACEHOLDER_VALUES:
+            problems.append(message)
+        else:
+            out.append(f"{_OK} {var} is set")
     
     # Check for mcp.json
-    mcp_file = Path("mcp.json")
-    if not mcp_file.exists():
+    mcp_st = _stat("mcp.json")
+    if mcp_st is None:
         warnings.append("mcp.json not found. Please create it from mcp.json.example")
     else:
-        print("✓ mcp.json exists")
-        # Try to load it
-        try:
-            import json
-            with open(mcp_file) as f:
-                mcp_config = json.load(f)
-            if "YOUR_API_KEY" in str(mcp_config):
-                warnings.append("mcp.json contains placeholder API key")
-            else:
-                print("✓ mcp.json appears to be configured")
-        except Exception as e:
-            warnings.append(f"Could not parse mcp.json: {e}")
+        out.append(f"{_OK} mcp.json exists")
+        configured, message = _check_mcp_config("mcp.json", mcp_st)
+        if configured:
+            out.append(f"{_OK} {message}")
+        else:
+            warnings.append(message)
     
     # Check for required packages
-    required_packages = ["openai", "gradio", "python-dotenv"]
     missing_packages = []
     
-    for package in required_packages:
-        try:
-            __import__(package.replace("-", "_"))
-            print(f"✓ {package} is installed")
-        except ImportError:
+    # find_spec locates a package without running its __init__ (gradio alone imports hundreds of modules)
+    for package, module in REQUIRED_PACKAGES:
+        if importlib.util.find_spec(module) is None:
             missing_packages.append(package)
             errors.append(f"{package} is not installed")
+        else:
+            out.append(f"{_OK} {package} is installed")
     
     # Summary
-    print("\n" + "="*50)
+    out.append("\n" + "="*50)
     if errors:
-        print("❌ ERRORS FOUND:")
+        out.append(f"{_ERR} ERRORS FOUND:")
         for error in errors:
-            print(f"  - {error}")
-        print("\nPlease fix these errors before running the application.")
+            out.append(f"  - {error}")
+        out.append("\nPlease fix these errors before running the application.")
         return False
     else:
-        print("✓ No critical errors found")
+        out.append(f"{_OK} No critical errors found")
     
     if warnings:
-        print("\n⚠️  WARNINGS:")
+        out.append(f"\n{_WARN}  WARNINGS:")
         for warning in warnings:
-            print(f"  - {warning}")
-        print("\nThese warnings may not prevent the app from running, but should be addressed.")
+            out.append(f"  - {warning}")
+        out.append("\nThese warnings may not prevent the app from running, but should be addressed.")
     
-    print("\n" + "="*50)
-    print("Setup validation complete!")
+    out.append("\n" + "="*50)
+    out.append("Setup validation complete!")
     return len(errors) == 0
 
 